@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+
+#: levels of sub-commands, enough for a model nested as deep to pass the recursion limit
+DEPTH = 250
+
+
+def make() -> ArgumentParser:
+    parser = current = ArgumentParser(prog="deep")
+    for level in range(DEPTH):
+        current = current.add_subparsers().add_parser(f"l{level}", help=f"level {level}")
+    current.add_argument("--last", action="store_true", help="the deepest option")
+    return parser
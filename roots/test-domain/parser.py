@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+
+
+def make() -> ArgumentParser:
+    parser = ArgumentParser(prog="tool")
+    parser.add_argument("--verbose", action="store_true", help="talk more")
+    commands = parser.add_subparsers(dest="command")
+    build = commands.add_parser("build", help="build the project")
+    build.add_argument("--jobs", type=int, help="how many at once")
+    build.add_argument("target", help="what to build")
+    return parser
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+
+
+def make() -> ArgumentParser:
+    parser = ArgumentParser(prog="tool", description="see --flag")
+    parser.add_argument("--flag", action="store_true", help="like --other, but *more*")
+    parser.add_argument("--other", help="the other `one`")
+    return parser
+
+
+def make_linked() -> ArgumentParser:
+    parser = ArgumentParser(prog="linked")
+    parser.add_argument("--back", help="back to :doc:`first`")
+    return parser
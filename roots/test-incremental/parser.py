@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+
+
+def make() -> ArgumentParser:
+    parser = ArgumentParser(prog="incremental")
+    parser.add_argument("--flag", action="store_true", help="a flag")
+    return parser
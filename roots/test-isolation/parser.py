@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import os
+import pickle
+import time
+from argparse import ArgumentParser
+from typing import NoReturn
+
+
+def make() -> ArgumentParser:
+    parser = ArgumentParser(prog="isolated")
+    parser.add_argument("--flag", action="store_true", help="isolated flag")
+    return parser
+
+
+def main() -> None:
+    make().parse_args()
+
+
+def crash() -> ArgumentParser:
+    os._exit(3)
+
+
+def hang() -> ArgumentParser:
+    time.sleep(60)
+    return make()
+
+
+def slow() -> ArgumentParser:
+    time.sleep(1)
+    return make()
+
+
+class Unsendable(int):
+    """A number of arguments refusing to be pickled, as objects of an application may."""
+
+    def __reduce__(self) -> NoReturn:
+        msg = "not sent"
+        raise pickle.PicklingError(msg)
+
+
+def unsendable() -> ArgumentParser:
+    parser = make()
+    parser.add_argument("--pair", nargs=Unsendable(2), help="a pair")
+    return parser
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+
+
+def make() -> ArgumentParser:
+    parser = ArgumentParser(prog="tool", add_help=False)
+    parser.add_argument("--output", "-o", metavar="PATH", default="my  out dir", help="where to write")
+    parser.add_argument("--quiet", action="store_true")
+    parser.add_argument("target", help="what to build")
+    return parser
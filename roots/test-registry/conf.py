@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+extensions = ["sphinx_argparse_cli"]
+nitpicky = True
+sphinx_argparse_cli_parsers = {
+    "tool": {"module": "parser", "func": "make"},
+    "runner": {"module": "runner", "func": "main", "hook": True},
+}
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import signal
+from argparse import ArgumentParser
+
+
+def main() -> None:
+    signal.signal(signal.SIGINT, signal.getsignal(signal.SIGINT))  # only allowed on the main thread
+    parser = ArgumentParser(prog="runner", description="Run things.")
+    parser.add_argument("--fast", action="store_true", help="go fast")
+    parser.parse_args()
+
+
+def explode() -> None:
+    msg = "cannot build the parser"
+    raise RuntimeError(msg)
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+
+
+def make() -> ArgumentParser:
+    parser = ArgumentParser(prog="tool")
+    commands = parser.add_subparsers()
+    common = commands.add_parser("common", aliases=["c"], help="common operation")
+    common.add_argument("--level", help="how far to go")
+    group = commands.add_parser("group", help="group of operations")
+    group_commands = group.add_subparsers()
+    # the same parser object under a second parent, and a loop back to the root
+    group_commands.add_parser("again", help="common operation, again --level")
+    group_commands.choices["again"] = common
+    group_commands.choices["root"] = parser
+    return parser
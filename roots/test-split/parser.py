@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+
+
+def make() -> ArgumentParser:
+    parser = ArgumentParser(prog="tool")
+    parser.add_argument("--verbose", action="store_true", help="talk more")
+    commands = parser.add_subparsers()
+    build = commands.add_parser("build", aliases=["b"], help="build the project")
+    build.add_argument("--jobs", help="how many at once")
+    fast = build.add_subparsers().add_parser("fast", help="skip the checks")
+    fast.add_argument("--unsafe", action="store_true", help="skip even more")
+    serve = commands.add_parser("serve", help="serve the project")
+    serve.add_argument("--port", help="where to listen")
+    # links across pages, to a page further down and back to the root page
+    commands.choices["quick"] = fast
+    fast.add_subparsers().choices["top"] = parser
+    return parser
@@ -0,0 +1,3 @@
+from __future__ import annotations
+
+import missing_dependency  # noqa: F401  # not installed, so the package cannot be imported
@@ -0,0 +1,34 @@
+"""Build the project."""
+
+from __future__ import annotations
+
+import argparse
+from argparse import ArgumentParser
+from pathlib import Path
+
+from missing_dependency import __version__, run
+
+DEFAULT_JOBS = 4
+FORMATS: tuple[str, ...] = ("html", "text")
+
+
+def _add_common(parser: ArgumentParser, verbose_help: str = "be verbose") -> None:
+    parser.add_argument("--verbose", "-v", action="store_true", help=verbose_help)
+
+
+def main() -> None:
+    parser = ArgumentParser(prog="app", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--version", action="version", version=__version__)
+    _add_common(parser)
+    commands = parser.add_subparsers(title="commands", dest="command")
+    commands.required = True
+    build = commands.add_parser("build", aliases=["b"], help=f"build with {DEFAULT_JOBS} jobs")
+    build.add_argument("--jobs", "-j", type=int, default=DEFAULT_JOBS, help="parallel jobs")
+    build.add_argument("--format", choices=FORMATS, default="html")
+    build.add_argument("output", type=Path, help="where to write")
+    _add_common(build, verbose_help="show every step")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
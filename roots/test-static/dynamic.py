@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+
+
+def make() -> ArgumentParser:
+    parser = ArgumentParser(prog="dynamic")
+    for name in ("--one", "--two"):
+        parser.add_argument(name, action="store_true", help=f"the {name[2:]} flag")
+    return parser
@@ -2,23 +2,100 @@
 
 from __future__ import annotations
 
+import sys
+from importlib import import_module
 from typing import TYPE_CHECKING, Any
 
+from ._env import FINGERPRINTS, LABELS
 from .version import __version__
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from sphinx.application import Sphinx
+    from sphinx.config import Config
 
 
 def setup(app: Sphinx) -> dict[str, Any]:
-    from ._logic import SphinxArgparseCli  # noqa: PLC0415
+    from ._domain import CliDomain  # noqa: PLC0415
+    from ._logic import OptionDashes, SphinxArgparseCli  # noqa: PLC0415
+    from ._nodes import VISITORS, lower_nodes  # noqa: PLC0415
+    from ._timing import merge_timings, reset_timings, write_report  # noqa: PLC0415
 
+    app.add_domain(CliDomain)
+    for node, visitors in VISITORS.items():
+        app.add_node(node, **visitors)
     app.add_directive(SphinxArgparseCli.name, SphinxArgparseCli)
+    app.add_transform(OptionDashes)
     app.add_config_value("sphinx_argparse_cli_prefix_document", False, "env")  # noqa: FBT003
+    app.add_config_value("sphinx_argparse_cli_parsers", {}, "env", dict)
+    app.add_config_value("sphinx_argparse_cli_cache", False, "", bool)  # noqa: FBT003
+    app.add_config_value("sphinx_argparse_cli_cache_size", 64 * 1024 * 1024, "", int)
+    app.add_config_value("sphinx_argparse_cli_memo_size", 32, "", int)
+    app.add_config_value("sphinx_argparse_cli_workers", 0, "", int)
+    app.add_config_value("sphinx_argparse_cli_worker_timeout", 60.0, "", (int, float))
+    app.add_config_value("sphinx_argparse_cli_timing", False, "", bool)  # noqa: FBT003
+    app.add_config_value("sphinx_argparse_cli_timing_budget", 0.0, "", (int, float))
     app.add_css_file("sphinx_argparse_cli.css")
+    app.connect("config-inited", _check_workers)
+    # the modules doing the work of the other events are only imported by a build that needs them
+    app.connect("builder-inited", _deferred("_extract", "reset_memo", _loaded("_extract")))
+    app.connect("builder-inited", _deferred("_extract", "warm_up", lambda app: app.config.sphinx_argparse_cli_parsers))
+    app.connect("builder-inited", _deferred("_split", "generate_pages", lambda _: True))
+    app.connect("env-get-outdated", _deferred("_incremental", "get_outdated", _kept(FINGERPRINTS), ()))
+    app.connect("env-purge-doc", _deferred("_incremental", "purge_doc", _kept(FINGERPRINTS)))
+    app.connect("env-merge-info", _deferred("_incremental", "merge_info", _kept(FINGERPRINTS, at=3)))
+    app.connect("env-purge-doc", _deferred("_labels", "purge_labels", _kept(LABELS)))
+    app.connect("env-merge-info", _deferred("_labels", "merge_labels", _kept(LABELS, at=3)))
+    app.connect("env-before-read-docs", reset_timings)
+    app.connect("env-merge-info", merge_timings)
+    app.connect("doctree-resolved", lower_nodes)
+    app.connect("build-finished", _deferred("_extract", "close_worker_pool", _loaded("_extract")))
+    app.connect("build-finished", write_report)
     app.connect("build-finished", _write_css)
 
-    return {"parallel_read_safe": True}
+    # bumped whenever what the extension keeps in the environment changes shape, so older environments are discarded
+    return {"parallel_read_safe": True, "parallel_write_safe": True, "env_version": 3}
+
+
+def _deferred(module: str, name: str, needed: Callable[..., Any], default: Any = None) -> Callable[..., Any]:
+    """
+    Return an event handler calling *name* of *module*, imported on the first event *needed* says concerns it.
+
+    Events that do not concern it return *default* instead, so a build without the directive imports nothing more
+    than what registering the extension takes.
+    """
+
+    def handler(*args: Any) -> Any:
+        if not needed(*args):
+            return default
+        return getattr(import_module(f".{module}", __name__), name)(*args)
+
+    return handler
+
+
+def _loaded(module: str) -> Callable[..., bool]:
+    # nothing to reset or close before the module was imported
+    return lambda *_: f"{__name__}.{module}" in sys.modules
+
+
+def _kept(attr: str, at: int = 1) -> Callable[..., bool]:
+    # the environment, or the one merged in, holds no records before a directive was read
+    return lambda *args: hasattr(args[at], attr)
+
+
+def _check_workers(app: Sphinx, config: Config) -> None:  # noqa: ARG001
+    if config.sphinx_argparse_cli_workers >= 0:
+        return
+    from sphinx.util.logging import getLogger  # noqa: PLC0415
+
+    getLogger(__name__).warning(
+        "sphinx_argparse_cli_workers must not be negative, got %d; extracting in-process",
+        config.sphinx_argparse_cli_workers,
+        type="sphinx-argparse-cli",
+        subtype="config",
+    )
+    config.sphinx_argparse_cli_workers = 0
 
 
 def _write_css(app: Sphinx, exception: Exception | None) -> None:
@@ -0,0 +1,110 @@
+"""
+Render the command line interface of a parser without building a Sphinx project.
+
+``python -m sphinx_argparse_cli module:func`` writes what the directive would document, as reStructuredText,
+Markdown or the JSON model, taking the options of the directive as flags. Neither Sphinx nor docutils is imported.
+"""
+
+from __future__ import annotations
+
+import sys
+from argparse import ArgumentParser, ArgumentTypeError
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ._load import LoadParserError, load_parser
+from ._model import build_model
+from ._render import FORMATS, render
+from ._text import DEFAULT_USAGE_WIDTH
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Render the parser asked for by *argv* (by default the arguments of the process), return the exit code."""
+    args = _cli().parse_args(argv)
+    module, func = args.target
+    try:
+        parser, _ = _obtain(module, func, hook=args.hook, static=args.static)
+    except LoadParserError as exc:
+        print(f"error: {exc}", file=sys.stderr)  # noqa: T201
+        return 1
+    model = build_model(parser, args.usage_width, args.prog)
+    options: dict[str, Any] = {name: value for name in _TEXT_OPTIONS if (value := getattr(args, name)) is not None} | {
+        name: None for name in _FLAG_OPTIONS if getattr(args, name)
+    }
+    text = render(model, args.format, options)
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        args.output.write_text(text, encoding="utf-8")
+    return 0
+
+
+def _obtain(module: str, func: str, *, hook: bool, static: bool) -> tuple[ArgumentParser, list[str]]:
+    if static:
+        from ._static import TooDynamicError, static_parser  # noqa: PLC0415
+
+        try:
+            return static_parser(module, func, hook=hook)
+        except TooDynamicError as exc:
+            print(f"importing {module}:{func}, too dynamic to read: {exc}", file=sys.stderr)  # noqa: T201
+    return load_parser(module, func, hook=hook)
+
+
+#: directive options taking a value, and the flags, by their destination
+_TEXT_OPTIONS = ("title", "description", "epilog", "group_title_prefix", "group_sub_title_prefix", "max_depth")
+_FLAG_OPTIONS = ("usage_first", "no_default_values", "force_refs_lower")
+
+
+def _cli() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="python -m sphinx_argparse_cli",
+        description="Render the command line interface of an argparse parser, as the sphinx_argparse_cli directive.",
+    )
+    parser.add_argument("target", type=_target, metavar="module:func", help="the function returning the parser")
+    parser.add_argument("--hook", action="store_true", help="take the parser the function starts parsing with")
+    parser.add_argument("--static", action="store_true", help="read the parser from the source, without importing")
+    parser.add_argument("--format", choices=FORMATS, default="rst", help="what to write")
+    parser.add_argument("-o", "--output", type=Path, metavar="PATH", help="write to this file instead of stdout")
+    directive = parser.add_argument_group("directive options", "as the directive option of the same name")
+    directive.add_argument("--prog", help="the program name to document the parser under")
+    directive.add_argument("--title", help="title of the page, empty for none")
+    directive.add_argument("--description", help="description to show instead of the one of the parser")
+    directive.add_argument("--epilog", help="epilog to show instead of the one of the parser")
+    directive.add_argument("--usage-width", type=_width, default=DEFAULT_USAGE_WIDTH, metavar="N", help="wrap usage")
+    directive.add_argument("--usage-first", action="store_true", help="show the usage before the description")
+    directive.add_argument("--group-title-prefix", metavar="PREFIX", help="prefix of argument group titles")
+    directive.add_argument("--group-sub-title-prefix", metavar="PREFIX", help="prefix of sub-command group titles")
+    directive.add_argument("--no-default-values", action="store_true", help="do not show default values")
+    directive.add_argument("--force-refs-lower", action="store_true", help="mark upper case letters in reference ids")
+    directive.add_argument("--max-depth", type=_depth, metavar="N", help="only summarize sub-commands below N levels")
+    return parser
+
+
+def _target(value: str) -> tuple[str, str]:
+    module, _, func = value.partition(":")
+    if not module or not func:
+        msg = f"expected module:func, got {value!r}"
+        raise ArgumentTypeError(msg)
+    return module, func
+
+
+def _width(value: str) -> int:
+    # as the directive's positive_int
+    if not value.isdigit() or not int(value):
+        msg = f"expected a positive number of columns, got {value!r}"
+        raise ArgumentTypeError(msg)
+    return int(value)
+
+
+def _depth(value: str) -> int:
+    if not value.isdigit():
+        msg = f"expected a number of levels, got {value!r}"
+        raise ArgumentTypeError(msg)
+    return int(value)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Size bounded cache persisted between builds."""
+
+from __future__ import annotations
+
+import os
+import pickle  # the cache lives in the build directory, next to Sphinx's own pickled environment
+import zlib
+from typing import TYPE_CHECKING, Any, Final
+
+from sphinx.util.logging import getLogger
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from sphinx.util.logging import SphinxLoggerAdapter
+
+_LOGGER: Final[SphinxLoggerAdapter] = getLogger(__name__)
+
+
+class DiskCache:
+    """
+    Pickled values stored one file per key in a directory.
+
+    Reading a value marks it as recently used; once the directory grows past *max_size* bytes the least recently used
+    entries are evicted. With *compress* the pickles are stored compressed, for values large enough for that to pay off.
+    """
+
+    def __init__(self, path: Path, max_size: int, *, compress: bool = False) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.compress = compress
+
+    def get(self, key: str) -> Any:
+        """Return the value stored under *key*, ``None`` when missing or unreadable."""
+        entry = self.path / key
+        try:
+            data = entry.read_bytes()
+            value = pickle.loads(zlib.decompress(data) if self.compress else data)  # noqa: S301
+            os.utime(entry)
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store *value* under *key*, then evict entries to honor the size limit.
+
+        A value that cannot be pickled (one nested deeper than the recursion limit, say) is not stored, the cache only
+        saves work and must not fail the build.
+        """
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError) as exc:
+            _LOGGER.debug("sphinx_argparse_cli cannot cache %s: %r", key, exc)
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        entry = self.path / key
+        # write to a temporary file first, so parallel readers never observe a partially written entry
+        temporary = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        temporary.write_bytes(zlib.compress(data, 1) if self.compress else data)
+        temporary.replace(entry)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in self.path.iterdir():
+            try:
+                stat = entry.stat()
+            except OSError:  # pragma: no cover  # removed by a parallel writer in the meantime
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+
+
+__all__ = [
+    "DiskCache",
+]
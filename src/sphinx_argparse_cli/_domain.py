@@ -0,0 +1,141 @@
+"""The ``cli`` domain: programs, sub-commands and options the directive documents, as cross-referenceable objects."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, ClassVar, cast
+
+from sphinx.domains import Domain, Index, IndexEntry, ObjType
+from sphinx.roles import XRefRole
+from sphinx.util.nodes import make_refnode
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from collections.abc import Set as AbstractSet
+
+    from docutils.nodes import Element, reference
+    from sphinx.addnodes import pending_xref
+    from sphinx.builders import Builder
+    from sphinx.environment import BuildEnvironment
+
+
+class CliIndex(Index):
+    """Every documented program, with its sub-commands and options."""
+
+    name = "index"
+    localname = "Command Line Interface Index"
+    shortname = "CLI"
+
+    def generate(self, docnames: Iterable[str] | None = None) -> tuple[list[tuple[str, list[IndexEntry]]], bool]:
+        domain = cast("CliDomain", self.domain)
+        wanted = None if docnames is None else set(docnames)
+        content: dict[str, list[IndexEntry]] = {}
+        for name, _, objtype, docname, node_id, _ in sorted(domain.get_objects()):
+            if wanted is None or docname in wanted:
+                entry = IndexEntry(name, 0, docname, node_id, domain.object_types[objtype].lname, "", "")
+                content.setdefault(name.split(" ", maxsplit=1)[0], []).append(entry)
+        return sorted(content.items()), False
+
+
+class CliDomain(Domain):
+    """
+    Programs, their sub-commands and options, named as they are typed: ``tool``, ``tool build``, ``tool build --jobs``.
+
+    Objects are kept by type and name, so resolving a reference is a single lookup whatever the size of the CLIs. The
+    same object documented by several documents (see ``sphinx_argparse_cli_prefix_document``) resolves to the first of
+    them by name, unless the reference asks for a given one.
+    """
+
+    name = "cli"
+    label = "Command line interface"
+    object_types: ClassVar[dict[str, ObjType]] = {
+        "program": ObjType("program", "program", "command"),
+        "command": ObjType("sub-command", "command"),
+        "option": ObjType("option", "option"),
+    }
+    roles: ClassVar[dict[str, XRefRole]] = {
+        "program": XRefRole(warn_dangling=True),
+        "command": XRefRole(warn_dangling=True),
+        "option": XRefRole(warn_dangling=True),
+    }
+    indices: ClassVar[list[type[Index]]] = [CliIndex]
+    initial_data: ClassVar[dict[str, Any]] = {
+        "objects": {},  # (objtype, name) -> docname -> node id
+        "documents": {},  # docname -> (objtype, name) of its objects
+    }
+
+    @property
+    def objects(self) -> dict[tuple[str, str], dict[str, str]]:
+        return self.data["objects"]
+
+    @property
+    def documents(self) -> dict[str, list[tuple[str, str]]]:
+        return self.data["documents"]
+
+    def note_object(self, objtype: str, name: str, node_id: str, docname: str | None = None) -> None:
+        """Record that *docname* (by default the current document) documents *name* at *node_id*."""
+        docname = self.env.docname if docname is None else docname
+        key = objtype, name  # one tuple for both maps, pickled once
+        self.objects.setdefault(key, {})[docname] = node_id
+        self.documents.setdefault(docname, []).append(key)
+
+    def clear_doc(self, docname: str) -> None:
+        for key in dict.fromkeys(self.documents.pop(docname, ())):  # a document may note an object more than once
+            claims = self.objects[key]
+            del claims[docname]
+            if not claims:
+                del self.objects[key]
+
+    def merge_domaindata(self, docnames: AbstractSet[str], otherdata: dict[str, Any]) -> None:
+        for docname in docnames:
+            for objtype, name in otherdata["documents"].get(docname, ()):
+                self.note_object(objtype, name, otherdata["objects"][objtype, name][docname], docname)
+
+    def resolve_xref(  # noqa: PLR0913, PLR0917
+        self,
+        env: BuildEnvironment,  # noqa: ARG002
+        fromdocname: str,
+        builder: Builder,
+        typ: str,
+        target: str,
+        node: pending_xref,
+        contnode: Element,
+    ) -> Element | None:
+        name = " ".join(target.split())
+        for objtype in self.objtypes_for_role(typ) or ():
+            if (found := self._find(objtype, name, node.get("docname"))) is not None:
+                return make_refnode(builder, fromdocname, *found, contnode, name)
+        # links of the sub-command summary, to documentation there may or may not be, stay plain text without a warning
+        return contnode if node.get("optional") else None
+
+    def resolve_any_xref(  # noqa: PLR0913, PLR0917
+        self,
+        env: BuildEnvironment,  # noqa: ARG002
+        fromdocname: str,
+        builder: Builder,
+        target: str,
+        node: pending_xref,  # noqa: ARG002
+        contnode: Element,
+    ) -> list[tuple[str, reference]]:
+        name = " ".join(target.split())
+        return [
+            (f"cli:{objtype}", make_refnode(builder, fromdocname, *found, contnode, name))
+            for objtype in self.object_types
+            if (found := self._find(objtype, name, None)) is not None
+        ]
+
+    def get_objects(self) -> Iterator[tuple[str, str, str, str, str, int]]:
+        for (objtype, name), claims in self.objects.items():
+            docname = min(claims)
+            yield name, name, objtype, docname, claims[docname], 1
+
+    def _find(self, objtype: str, name: str, docname: str | None) -> tuple[str, str] | None:
+        if not (claims := self.objects.get((objtype, name))):
+            return None
+        docname = docname if docname in claims else min(claims)
+        return docname, claims[docname]
+
+
+__all__ = [
+    "CliDomain",
+    "CliIndex",
+]
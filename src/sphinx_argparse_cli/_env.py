@@ -0,0 +1,35 @@
+"""Bookkeeping the extension keeps on the build environment, per document."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Final
+
+if TYPE_CHECKING:
+    from sphinx.environment import BuildEnvironment
+
+#: environment attribute holding, per document, the options, fingerprint and project sources of each of its directives
+FINGERPRINTS: Final[str] = "sphinx_argparse_cli_fingerprints"
+#: environment attribute holding, per document, the names of the labels it registered
+LABELS: Final[str] = "sphinx_argparse_cli_labels"
+#: environment attribute holding, per document, the timings of the directives read during this build
+TIMINGS: Final[str] = "sphinx_argparse_cli_timings"
+
+
+def env_records(env: BuildEnvironment, attr: str) -> dict[str, Any]:
+    """
+    Return the records kept under *attr* of *env*, by document name, starting them on first use.
+
+    Being attributes of the environment they are pickled along with it, and so survive between builds.
+    """
+    if not hasattr(env, attr):
+        setattr(env, attr, {})
+    records: dict[str, Any] = getattr(env, attr)
+    return records
+
+
+__all__ = [
+    "FINGERPRINTS",
+    "LABELS",
+    "TIMINGS",
+    "env_records",
+]
@@ -0,0 +1,360 @@
+"""Obtain the parser a directive documents."""
+
+from __future__ import annotations
+
+import hashlib
+import sys
+from collections import OrderedDict
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final, NamedTuple
+
+from sphinx.util.logging import getLogger
+
+from ._load import LoadParserError, load_parser, project_files
+from ._text import DEFAULT_USAGE_WIDTH
+from ._timing import phase
+from .version import __version__
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+    from collections.abc import Callable, Hashable, Iterable, Mapping
+
+    from sphinx.application import Sphinx
+    from sphinx.environment import BuildEnvironment
+    from sphinx.util.logging import SphinxLoggerAdapter
+
+    from ._cache import DiskCache
+    from ._model import CliParser
+    from ._pool import WorkerPool
+
+_LOGGER: Final[SphinxLoggerAdapter] = getLogger(__name__)
+
+
+class ExtractRequest(NamedTuple):
+    """Everything that determines the model of a parser."""
+
+    module: str
+    func: str
+    hook: bool
+    prog: str | None
+    usage_width: int
+    #: read the parser from the source of the module, importing it only when that is too dynamic
+    static: bool = False
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any], parsers: Mapping[str, Any]) -> ExtractRequest:
+        """
+        Describe the parser of a directive with *options*.
+
+        A directive naming a ``:parser:`` takes its module, function, hook and static modes from the *parsers*
+        registered in ``sphinx_argparse_cli_parsers``.
+
+        :raises LoadParserError: for a parser name that is not registered, or registered without a module or function
+        """
+        if (name := options.get("parser")) is None:
+            module, func, hook, static = options["module"], options["func"], "hook" in options, "static" in options
+        else:
+            spec = parsers.get(name)
+            if not isinstance(spec, dict) or not isinstance(spec.get("module"), str) or not spec.get("func"):
+                msg = f"Parser {name!r} is not registered with a module and func in sphinx_argparse_cli_parsers"
+                raise LoadParserError(msg)
+            module, func, hook, static = spec["module"], spec["func"], bool(spec.get("hook")), bool(spec.get("static"))
+        width = options.get("usage_width", DEFAULT_USAGE_WIDTH)
+        return cls(module, func, hook, options.get("prog"), width, static)
+
+
+class Extraction(NamedTuple):
+    """The model of a parser, and the source files it was extracted from."""
+
+    model: CliParser
+    sources: tuple[str, ...]
+
+
+def obtain_parser(env: BuildEnvironment, options: Mapping[str, Any]) -> CliParser:
+    """Return the model of the parser described by the directive *options*, see :func:`obtain_extraction`."""
+    return obtain_extraction(env, options).model
+
+
+def obtain_extraction(env: BuildEnvironment, options: Mapping[str, Any]) -> Extraction:
+    """
+    Return the model of the parser described by the directive *options*, with the sources it was extracted from.
+
+    With ``sphinx_argparse_cli_cache`` enabled the model is looked up in the cache of the doctree directory first, and
+    is only extracted (importing the target module) when the sources it was extracted from changed since. With
+    ``sphinx_argparse_cli_workers`` set the extraction happens in a worker process.
+    """
+    request = ExtractRequest.from_options(options, env.config.sphinx_argparse_cli_parsers)
+    with phase("lookup"):
+        extraction = _lookup(env, request)
+    if extraction is not None:
+        return extraction
+    if env.config.sphinx_argparse_cli_workers:
+        with phase("worker"):
+            outcome = _worker_pool(env).extract([request])[0]
+        if isinstance(outcome, LoadParserError):
+            raise outcome
+        model, source_files = outcome
+    else:
+        parser_key = request.module, request.func, request.hook, request.static
+        if (loaded := _PARSERS.get(parser_key)) is None:
+            loaded = extract_parser(request)
+            _PARSERS.max_entries = env.config.sphinx_argparse_cli_memo_size
+            _PARSERS.put(parser_key, loaded)
+        parser, source_files = loaded
+        with phase("model"):
+            model = _model_of(parser, request)
+    return _store(env, request, model, source_files)
+
+
+def prefetch(env: BuildEnvironment, options: Iterable[Mapping[str, Any]]) -> None:
+    """
+    Extract the models for several directives ahead of their use.
+
+    Only does work when extraction happens in worker processes, as then independent modules are imported concurrently.
+    Failures are not reported here, they surface once a directive asks for the model.
+    """
+    if not env.config.sphinx_argparse_cli_workers:
+        return
+    parsers, requests = env.config.sphinx_argparse_cli_parsers, []
+    for opts in options:
+        with suppress(LoadParserError):
+            requests.append(ExtractRequest.from_options(opts, parsers))
+    extract_concurrently(env, requests)
+
+
+def extract_concurrently(
+    env: BuildEnvironment, requests: Iterable[ExtractRequest]
+) -> dict[ExtractRequest, LoadParserError]:
+    """
+    Extract the models of *requests* at once, overlapping what can be, and return why extractions failed.
+
+    Extraction happens in the worker processes when configured. Otherwise parsers read from the source of their module
+    are read on threads, while imports run one after the other on the calling thread: a program run under ``:hook:``
+    may need the main thread (to install signal handlers, say), and the project modules an import brings in are told
+    by what it adds to ``sys.modules``. The models are kept for the directives to come.
+    """
+    requests = [request for request in dict.fromkeys(requests) if _lookup(env, request) is None]
+    if env.config.sphinx_argparse_cli_workers:
+        outcomes: list[Any] = _worker_pool(env).extract(requests)
+    else:
+        static = [request for request in requests if request.static]
+        from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+        with ThreadPoolExecutor(thread_name_prefix="sphinx_argparse_cli") as executor:
+            read = dict(zip(static, executor.map(_read, static), strict=True))
+        # a parser too dynamic to read is imported, as any other
+        outcomes = [
+            _outcome(extract_parser, request._replace(static=False))
+            if (outcome := read.get(request)) is None
+            else outcome
+            for request in requests
+        ]
+    failures: dict[ExtractRequest, LoadParserError] = {}
+    for request, outcome in zip(requests, outcomes, strict=True):
+        if isinstance(outcome, LoadParserError):
+            failures[request] = outcome
+        elif env.config.sphinx_argparse_cli_workers:
+            _store(env, request, *outcome)
+        else:
+            parser, source_files = outcome
+            _PARSERS.max_entries = env.config.sphinx_argparse_cli_memo_size
+            _PARSERS.put((request.module, request.func, request.hook, request.static), outcome)
+            _store(env, request, _model_of(parser, request), source_files)
+    return failures
+
+
+def _model_of(parser: ArgumentParser, request: ExtractRequest) -> CliParser:
+    # the model classes are only loaded once a parser has to be captured, builds with nothing to read skip them
+    from ._model import build_model  # noqa: PLC0415
+
+    return build_model(parser, request.usage_width, request.prog)
+
+
+def _request_of(name: str, parsers: Mapping[str, Any]) -> ExtractRequest | LoadParserError:
+    try:
+        return ExtractRequest.from_options({"parser": name}, parsers)
+    except LoadParserError as exc:
+        return exc
+
+
+def _read(request: ExtractRequest) -> tuple[ArgumentParser, list[str]] | LoadParserError | None:
+    return _outcome(_read_static, request)
+
+
+def _outcome(
+    extract: Callable[[ExtractRequest], tuple[ArgumentParser, list[str]] | None], request: ExtractRequest
+) -> tuple[ArgumentParser, list[str]] | LoadParserError | None:
+    try:
+        return extract(request)
+    except LoadParserError as exc:
+        return exc
+    except (Exception, SystemExit) as exc:  # noqa: BLE001  # reported for the request, like a worker would
+        return LoadParserError(f"Failed to extract parser from {request.module}:{request.func}: {exc!r}")
+
+
+def warm_up(app: Sphinx) -> None:
+    """
+    Extract the parsers registered in ``sphinx_argparse_cli_parsers`` before any document is read.
+
+    The parsers are extracted as concurrently as :func:`extract_concurrently` allows, and the ones that cannot be
+    extracted are reported right away instead of by each directive using them.
+    """
+    parsers = app.config.sphinx_argparse_cli_parsers
+    requests = {name: _request_of(name, parsers) for name in parsers}
+    failures = extract_concurrently(
+        app.env, (request for request in requests.values() if isinstance(request, ExtractRequest))
+    )
+    for name, request in requests.items():
+        failure = request if isinstance(request, LoadParserError) else failures.get(request)
+        if failure is not None:
+            _LOGGER.warning(
+                "sphinx_argparse_cli parser %s cannot be extracted: %s",
+                name,
+                failure,
+                type="sphinx-argparse-cli",
+                subtype="parsers",
+            )
+
+
+def _lookup(env: BuildEnvironment, request: ExtractRequest) -> Extraction | None:
+    if (extraction := _MODELS.get(request)) is not None:
+        return extraction
+    if (cache := _disk_cache(env)) is not None and (entry := cache.get(_cache_key(request))) is not None:
+        sources, model = entry
+        if _unchanged(sources):
+            extraction = Extraction(model, tuple(sources))
+            _MODELS.max_entries = env.config.sphinx_argparse_cli_memo_size
+            _MODELS.put(request, extraction)
+            return extraction
+    return None
+
+
+def _store(env: BuildEnvironment, request: ExtractRequest, model: CliParser, source_files: list[str]) -> Extraction:
+    extraction = Extraction(model, tuple(source_files))
+    _MODELS.max_entries = env.config.sphinx_argparse_cli_memo_size
+    _MODELS.put(request, extraction)
+    if (cache := _disk_cache(env)) is not None:
+        cache.put(_cache_key(request), ({path: _digest(path) for path in source_files}, model))
+    return extraction
+
+
+def _disk_cache(env: BuildEnvironment) -> DiskCache | None:
+    if not env.config.sphinx_argparse_cli_cache:
+        return None
+    from ._cache import DiskCache  # noqa: PLC0415
+
+    return DiskCache(Path(env.doctreedir) / "sphinx_argparse_cli", env.config.sphinx_argparse_cli_cache_size)
+
+
+def _worker_pool(env: BuildEnvironment) -> WorkerPool:
+    global _POOL  # noqa: PLW0603
+    if _POOL is None:
+        from ._pool import WorkerPool  # noqa: PLC0415
+
+        _POOL = WorkerPool(env.config.sphinx_argparse_cli_workers, env.config.sphinx_argparse_cli_worker_timeout)
+    return _POOL
+
+
+class LruMemo:
+    """Values computed during a build, keeping only the *max_entries* most recently used ones."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        """Return the value stored under *key* and mark it as recently used, ``None`` when missing."""
+        if (value := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store *value* under *key*, evicting the least recently used entries beyond the limit."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+#: parsers imported during this build, keyed by module, function and hook mode
+_PARSERS: Final[LruMemo] = LruMemo(32)
+#: models built during this build with their sources, keyed by everything that affects them
+_MODELS: Final[LruMemo] = LruMemo(32)
+
+
+_POOL: WorkerPool | None = None
+
+
+def reset_memo(app: Sphinx) -> None:  # noqa: ARG001
+    """Forget parsers from an earlier build, as their modules may have changed since."""
+    _PARSERS.clear()
+    _MODELS.clear()
+
+
+def close_worker_pool(app: Sphinx, exception: Exception | None) -> None:  # noqa: ARG001
+    """Stop the extraction workers once the build is done."""
+    global _POOL  # noqa: PLW0603
+    if _POOL is not None:
+        _POOL.close()
+        _POOL = None
+
+
+def extract_parser(request: ExtractRequest) -> tuple[ArgumentParser, list[str]]:
+    """
+    Obtain the parser of *request*, reading it from the source of its module when the request is static.
+
+    A parser too dynamic to read is obtained by importing the module instead, see :func:`load_parser`.
+    """
+    if request.static and (read := _read_static(request)) is not None:
+        return read
+    return load_parser(request.module, request.func, hook=request.hook)
+
+
+def _read_static(request: ExtractRequest) -> tuple[ArgumentParser, list[str]] | None:
+    from ._static import TooDynamicError, static_parser  # noqa: PLC0415
+
+    try:
+        with phase("static"):
+            return static_parser(request.module, request.func, hook=request.hook)
+    except TooDynamicError as exc:
+        _LOGGER.verbose("sphinx_argparse_cli imports %s:%s, too dynamic to read: %s", *request[:2], exc)
+        return None
+
+
+def _cache_key(request: ExtractRequest) -> str:
+    # argparse output differs between interpreter versions, and the model between releases of this extension
+    payload = repr((__version__, sys.version_info[:2], *request))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _unchanged(sources: Mapping[str, str]) -> bool:
+    return all(_digest(path) == digest for path, digest in sources.items())
+
+
+def _digest(path: str) -> str:
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return ""
+
+
+__all__ = [
+    "ExtractRequest",
+    "Extraction",
+    "LoadParserError",
+    "LruMemo",
+    "close_worker_pool",
+    "extract_concurrently",
+    "extract_parser",
+    "load_parser",
+    "obtain_extraction",
+    "obtain_parser",
+    "prefetch",
+    "project_files",
+    "reset_memo",
+    "warm_up",
+]
@@ -0,0 +1,131 @@
+"""Rendered output of directives, reused by directives rendering the same parser the same way."""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import pickle  # the fragments are the directive's own output, stored next to Sphinx's own pickled doctrees
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final
+
+import docutils
+import sphinx
+from docutils.nodes import document
+from sphinx.util.logging import getLogger
+
+from ._extract import LruMemo
+from .version import __version__
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from docutils.nodes import Element
+    from sphinx.environment import BuildEnvironment
+    from sphinx.util.logging import SphinxLoggerAdapter
+
+    from ._cache import DiskCache
+
+_LOGGER: Final[SphinxLoggerAdapter] = getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Fragment:
+    """The nodes a directive rendered, and what the document they end up in needs to know of them."""
+
+    node: Element
+    #: labels to register: reference name, title, and whether it names an option
+    labels: tuple[tuple[str, str, bool], ...]
+    #: objects to note in the cli domain: type, name and node id
+    objects: tuple[tuple[str, str, str], ...]
+    #: positions, in document order, of the elements of *node* whose option dashes need protection
+    protected: tuple[int, ...]
+
+
+def fragment_key(env: BuildEnvironment, options: Mapping[str, Any], fingerprint: str) -> str:
+    """Key of what a directive with *options* in the current document renders of a parser with *fingerprint*."""
+    # generated pages and summaries list and link the pages of other sub-commands by document name
+    docname = env.docname if {"path", "split_depth", "max_depth"} & options.keys() else None
+    # rendering changes between releases of this extension and its dependencies, defaults show the working directory
+    versions = __version__, sphinx.__display_version__, docutils.__version__, sys.version_info[:2]
+    config = tuple(getattr(env.config, name) for name in _CONFIG)
+    payload = repr((versions, fingerprint, docname, config, str(Path.cwd())))
+    return hashlib.sha256(payload.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def load_fragment(env: BuildEnvironment, key: str) -> Fragment | None:
+    """Return a copy of the fragment stored under *key*, ``None`` when there is none (or caching is disabled)."""
+    if (cache := _disk_cache(env)) is None:
+        return None
+    if (data := _FRAGMENTS.get(key)) is None:
+        if (data := cache.get(key)) is None:
+            return None
+        _FRAGMENTS.put(key, data)
+    fragment: Fragment = _FragmentUnpickler(io.BytesIO(data)).load()
+    return fragment
+
+
+def store_fragment(env: BuildEnvironment, key: str, fragment: Fragment) -> None:
+    """
+    Store *fragment* under *key*, in memory and in the doctree directory, when caching is enabled.
+
+    A fragment that cannot be pickled is not stored, directives rendering it again render it anew.
+    """
+    if (cache := _disk_cache(env)) is None:
+        return
+    # pickled right away rather than copied: smaller to hold on to, and loading makes the copy for each reuse
+    buffer = io.BytesIO()
+    try:
+        _FragmentPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(fragment)
+    except (RecursionError, pickle.PicklingError) as exc:
+        _LOGGER.debug("sphinx_argparse_cli cannot cache the fragment %s: %r", key, exc)
+        return
+    _FRAGMENTS.max_entries = env.config.sphinx_argparse_cli_memo_size
+    _FRAGMENTS.put(key, buffer.getvalue())
+    cache.put(key, buffer.getvalue())
+
+
+class _FragmentPickler(pickle.Pickler):
+    # nodes refer to the document they were rendered for, which stays behind
+    def persistent_id(self, obj: Any) -> str | None:
+        return "document" if isinstance(obj, document) else None
+
+
+class _FragmentUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid: Any) -> None:  # noqa: ARG002  # once placed nodes find their document via the parent
+        return
+
+
+def _disk_cache(env: BuildEnvironment) -> DiskCache | None:
+    if not env.config.sphinx_argparse_cli_cache:
+        return None
+    from ._cache import DiskCache  # noqa: PLC0415
+
+    path = Path(env.doctreedir) / "sphinx_argparse_cli_fragments"
+    return DiskCache(path, env.config.sphinx_argparse_cli_cache_size, compress=True)
+
+
+#: settings shaping how help texts are parsed and the nodes rendered, beyond the options of the directive
+_CONFIG: Final[tuple[str, ...]] = (
+    "default_role",
+    "primary_domain",
+    "rst_prolog",
+    "rst_epilog",
+    "smartquotes",
+    "smartquotes_action",
+    "smartquotes_excludes",
+    "language",
+    "sphinx_argparse_cli_prefix_document",
+)
+
+#: pickled fragments rendered or loaded by this process, their keys change along with anything they depend on
+_FRAGMENTS: Final[LruMemo] = LruMemo(32)
+
+
+__all__ = [
+    "Fragment",
+    "fragment_key",
+    "load_fragment",
+    "store_fragment",
+]
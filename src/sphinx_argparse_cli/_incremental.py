@@ -0,0 +1,168 @@
+"""Decide when a document rendering a CLI needs to be read again."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final
+
+from sphinx.util.logging import getLogger
+
+from ._env import FINGERPRINTS, env_records
+from ._extract import project_files
+from ._split import find_sub_command, limit_depth, select_sub_commands, sub_command_path
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from sphinx.application import Sphinx
+    from sphinx.environment import BuildEnvironment
+    from sphinx.util.logging import SphinxLoggerAdapter
+
+    from ._model import CliParser, CliSubCommand
+
+_LOGGER: Final[SphinxLoggerAdapter] = getLogger(__name__)
+
+ENV_ATTR: Final[str] = FINGERPRINTS
+
+
+def parser_fingerprint(parser: CliParser, options: Mapping[str, Any]) -> str:
+    """
+    Digest of everything the directive renders: the parser structure and the directive options.
+
+    Only the sub-commands ``:include:`` and ``:exclude:`` select are rendered, under ``:path:`` only that one, with
+    ``:split_depth:`` those below it just by name, and below ``:max_depth:`` just by name, aliases and help, so changes
+    to other parts of the tree leave the document alone.
+    """
+    from ._model import CliSubCommand  # noqa: PLC0415  # loaded along with the parser, see find_sub_command
+
+    parser = select_sub_commands(parser, options)
+    digest = hashlib.sha256(repr(sorted(options.items())).encode("utf-8", "surrogatepass"))
+    if path := sub_command_path(options):
+        if (found := find_sub_command(parser, path)) is None:
+            return digest.hexdigest()  # the directive reports the missing sub-command
+        digest.update(repr((parser.prog, _shallow(found))).encode("utf-8", "surrogatepass"))
+        parser = found.parser
+    else:
+        digest.update(repr(_shallow(parser)).encode("utf-8", "surrogatepass"))
+    parser, summarized = limit_depth(parser, options)
+    split = "split_depth" in options
+    # sub-commands one by one, a repr of the nested model would recurse as deep as the tree
+    for sub_command in parser.sub_commands if split else parser.iter_sub_commands():
+        if isinstance(sub_command, CliSubCommand):
+            shown = sub_command.name if split else _shallow(sub_command)
+        else:
+            shown = sub_command
+        digest.update(repr(shown).encode("utf-8", "surrogatepass"))
+    for sub_command in summarized:
+        digest.update(repr((sub_command.prog, sub_command.aliases, sub_command.help)).encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+def _shallow(node: CliParser | CliSubCommand) -> CliParser | CliSubCommand:
+    from ._model import CliSubCommand  # noqa: PLC0415
+
+    if isinstance(node, CliSubCommand):
+        return replace(node, parser=_shallow(node.parser))
+    return replace(node, sub_commands=())
+
+
+def record_fingerprint(
+    env: BuildEnvironment, options: Mapping[str, Any], parser: CliParser | None, sources: Iterable[str] = ()
+) -> str:
+    """
+    Remember what the directive rendered so the next build can tell whether the document is outdated.
+
+    The project files among the *sources* the parser was extracted from are kept along, so the fingerprint is only
+    compared again once one of them is modified. A directive that failed to obtain its parser records no fingerprint,
+    so its document is retried on every build.
+
+    :return: the fingerprint recorded
+    """
+    fingerprint = "" if parser is None else parser_fingerprint(parser, options)
+    _records(env).setdefault(env.docname, []).append((dict(options), fingerprint, tuple(project_files(sources))))
+    return fingerprint
+
+
+def get_outdated(
+    app: Sphinx,  # noqa: ARG001
+    env: BuildEnvironment,
+    added: set[str],
+    changed: set[str],
+    removed: set[str],
+) -> list[str]:
+    """
+    Mark documents outdated whose rendered parsers no longer match the fingerprint stored on their last read.
+
+    A parser defined by project files is only imported again when one of those files was modified since the document
+    was read, so editing other modules costs nothing. The project files are not registered as Sphinx dependencies:
+    Sphinx would then read every document of the parser again, rather than only those whose rendering changed.
+    """
+    from ._extract import ExtractRequest, LoadParserError, obtain_parser, prefetch  # noqa: PLC0415
+
+    skip = added | changed | removed
+    records = {
+        docname: [
+            (options, fingerprint)
+            for options, fingerprint, sources in directives
+            if not sources or _modified(sources, env.all_docs[docname])
+        ]
+        for docname, directives in _records(env).items()
+        if docname not in skip
+    }
+    prefetch(env, (options for directives in records.values() for options, _ in directives))
+    outdated: list[str] = []
+    current: dict[ExtractRequest, CliParser | None] = {}
+    parsers = env.config.sphinx_argparse_cli_parsers
+    for docname, directives in records.items():
+        for options, fingerprint in directives:
+            if not fingerprint:  # the directive failed when read, try it again
+                outdated.append(docname)
+                break
+            request = ExtractRequest.from_options(options, parsers)
+            if request not in current:
+                try:
+                    current[request] = obtain_parser(env, options)
+                except LoadParserError:
+                    current[request] = None
+            parser = current[request]
+            if parser is None or parser_fingerprint(parser, options) != fingerprint:
+                _LOGGER.debug(
+                    "[sphinx-argparse-cli] %s: parser of %s:%s changed", docname, request.module, request.func
+                )
+                outdated.append(docname)
+                break
+    return outdated
+
+
+def _modified(sources: tuple[str, ...], since: int) -> bool:
+    # microseconds rounded up, as Sphinx compares the documents themselves with the time they were read
+    try:
+        return any(-(Path(path).stat().st_mtime_ns // -1_000) > since for path in sources)
+    except OSError:  # removed, the parser moved elsewhere
+        return True
+
+
+def purge_doc(app: Sphinx, env: BuildEnvironment, docname: str) -> None:  # noqa: ARG001
+    _records(env).pop(docname, None)
+
+
+def merge_info(app: Sphinx, env: BuildEnvironment, docnames: set[str], other: BuildEnvironment) -> None:  # noqa: ARG001
+    records, other_records = _records(env), _records(other)
+    for docname in docnames:
+        if docname in other_records:
+            records[docname] = other_records[docname]
+
+
+def _records(env: BuildEnvironment) -> dict[str, list[tuple[dict[str, Any], str, tuple[str, ...]]]]:
+    return env_records(env, ENV_ATTR)
+
+
+__all__ = [
+    "get_outdated",
+    "merge_info",
+    "parser_fingerprint",
+    "purge_doc",
+    "record_fingerprint",
+]
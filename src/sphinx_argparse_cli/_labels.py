@@ -0,0 +1,80 @@
+"""Labels the directive registers, kept per document so parallel reads can hand them back to the main process."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Final, cast
+
+from sphinx.locale import __
+from sphinx.util.logging import getLogger
+
+from ._env import LABELS, env_records
+
+if TYPE_CHECKING:
+    from docutils.nodes import Element
+    from sphinx.application import Sphinx
+    from sphinx.domains.std import StandardDomain
+    from sphinx.environment import BuildEnvironment
+    from sphinx.util.logging import SphinxLoggerAdapter
+
+_LOGGER: Final[SphinxLoggerAdapter] = getLogger(__name__)
+
+ENV_ATTR: Final[str] = LABELS
+
+
+def register_label(env: BuildEnvironment, name: str, ref_name: str, ref_title: str, node: Element) -> None:
+    """Make *name* a label of the current document pointing at *ref_name*, warning when another place owns it."""
+    std_domain = _std_domain(env)
+    if name in std_domain.labels:
+        _warn_duplicate(env, name, std_domain.labels[name][0], env.docname, node)
+    std_domain.anonlabels[name] = env.docname, ref_name
+    std_domain.labels[name] = env.docname, ref_name, ref_title
+    _records(env).setdefault(env.docname, []).append(name)
+
+
+def purge_labels(app: Sphinx, env: BuildEnvironment, docname: str) -> None:  # noqa: ARG001
+    _records(env).pop(docname, None)
+
+
+def merge_labels(app: Sphinx, env: BuildEnvironment, docnames: set[str], other: BuildEnvironment) -> None:  # noqa: ARG001
+    """
+    Take over the labels of *docnames* read by a parallel reader.
+
+    The standard domain merges its own copy of the labels. The reader already warned about duplicates among the labels
+    it knew of; those of documents merged in after the reader was started are only seen here.
+    """
+    records, other_records = _records(env), _records(other)
+    owners = {name: docname for docname, labels in records.items() for name in labels}
+    for docname in sorted(docnames & other_records.keys()):
+        records[docname] = other_records[docname]
+        for name in other_records[docname]:
+            owner = owners.get(name)
+            if owner is not None and owner != docname and name not in other_records.get(owner, ()):
+                _warn_duplicate(env, name, owner, docname, (docname, None))
+
+
+def _warn_duplicate(
+    env: BuildEnvironment, name: str, owner: str, docname: str, location: Element | tuple[str, None]
+) -> None:
+    _LOGGER.warning(
+        __("duplicate label %s, other instance in %s"),
+        name,
+        env.doc2path(owner),
+        location=location,
+        type="sphinx-argparse-cli",
+        subtype=docname,
+    )
+
+
+def _std_domain(env: BuildEnvironment) -> StandardDomain:
+    return cast("StandardDomain", env.get_domain("std"))
+
+
+def _records(env: BuildEnvironment) -> dict[str, list[str]]:
+    return env_records(env, ENV_ATTR)
+
+
+__all__ = [
+    "merge_labels",
+    "purge_labels",
+    "register_label",
+]
@@ -0,0 +1,120 @@
+"""Obtain a parser by importing its module, without Sphinx: shared by the directive and the command line renderer."""
+
+from __future__ import annotations
+
+import site
+import sys
+import sysconfig
+from argparse import ArgumentParser
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final
+
+from ._timing import phase
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from types import FrameType
+
+
+class LoadParserError(Exception):
+    """Raised when a parser cannot be obtained."""
+
+
+def load_parser(module_name: str, attr_name: str, *, hook: bool) -> tuple[ArgumentParser, list[str]]:
+    """
+    Import *module_name* and obtain the parser from its *attr_name* callable.
+
+    :return: the parser, and the source files of the package the module belongs to and of the project modules it
+        imported along the way
+    """
+    before = set(sys.modules)
+    try:
+        with phase("import"):
+            module = __import__(module_name, fromlist=[attr_name])
+    except ImportError:
+        msg = f"Failed to import module {module_name!r}"
+        raise LoadParserError(msg)  # noqa: B904
+    try:
+        parser_creator = getattr(module, attr_name)
+    except AttributeError:
+        del sys.modules[module_name]
+        msg = f"Module {module_name!r} has no attribute {attr_name!r}"
+        raise LoadParserError(msg)  # noqa: B904
+    with phase("call"):
+        parser = _hooked_parser(parser_creator) if hook else parser_creator()
+
+    source_files = _package_sources(module_name, before)
+    del sys.modules[module_name]
+    if parser is None:
+        msg = "Failed to hook argparse to get ArgumentParser"
+        raise LoadParserError(msg)
+    return parser, source_files
+
+
+class HookError(Exception):
+    def __init__(self, parser: ArgumentParser) -> None:  # pragma: no cover  # raised from the profile function
+        self.parser = parser
+
+
+_PARSE_KNOWN_ARGS_CODE: Final = ArgumentParser.parse_known_args.__code__
+
+
+def _hooked_parser(parser_creator: Callable[[], object]) -> ArgumentParser | None:
+    """
+    Call *parser_creator* and return the parser it starts parsing arguments with, aborting the call right there.
+
+    Rather than replacing ``ArgumentParser.parse_known_args`` for the whole process, a profile function of the calling
+    thread intercepts it; other threads (parallel readers, other extensions) keep using argparse undisturbed. A profile
+    function is used over a trace function so coverage and debuggers tracing the build stay in place.
+    """
+    previous = sys.getprofile()
+
+    def profile(frame: FrameType, event: str, arg: Any) -> None:  # pragma: no cover  # coverage cannot see profilers
+        if event == "call" and frame.f_code is _PARSE_KNOWN_ARGS_CODE:
+            raise HookError(frame.f_locals["self"])
+        if callable(previous):  # chain to a profiler of the build
+            previous(frame, event, arg)
+
+    sys.setprofile(profile)
+    try:
+        parser_creator()
+    except HookError as hooked:
+        return hooked.parser
+    finally:
+        sys.setprofile(previous)
+    return None
+
+
+def _package_sources(module_name: str, imported_before: set[str]) -> list[str]:
+    top_level = module_name.partition(".")[0]
+    files, imported = set(), set()
+    for name, module in list(sys.modules.items()):
+        if (file := getattr(module, "__file__", None)) is None:
+            continue
+        if name == top_level or name.startswith(f"{top_level}."):
+            files.add(file)
+        elif name not in imported_before:
+            imported.add(file)
+    # of the other modules the target imported, the standard library and installed packages do not change between builds
+    return sorted(files | set(project_files(imported)))
+
+
+def project_files(paths: Iterable[str]) -> list[str]:
+    """Return the files among *paths* belonging to the project, rather than to the interpreter or installed packages."""
+    installed = _installed_locations()
+    return [path for path in paths if not any(Path(path).resolve().is_relative_to(root) for root in installed)]
+
+
+@cache
+def _installed_locations() -> tuple[Path, ...]:
+    names = "stdlib", "platstdlib", "purelib", "platlib"
+    paths = {sysconfig.get_path(name) for name in names} | {site.getusersitepackages()}
+    return tuple(Path(path).resolve() for path in paths)
+
+
+__all__ = [
+    "LoadParserError",
+    "load_parser",
+    "project_files",
+]
@@ -1,59 +1,64 @@
 from __future__ import annotations
 
-import os
 import re
-import sys
-from argparse import (
-    SUPPRESS,
-    Action,
-    ArgumentParser,
-    HelpFormatter,
-    RawDescriptionHelpFormatter,
-    _ArgumentGroup,
-    _StoreFalseAction,
-    _StoreTrueAction,
-    _SubParsersAction,
-)
-from collections import defaultdict
-from contextlib import contextmanager
 from functools import cached_property
-from pathlib import Path
 from typing import TYPE_CHECKING, Any, ClassVar, Final, cast
-from unittest.mock import patch
 
 from docutils.nodes import (
     Element,
     FixedTextElement,
     Node,
     Text,
-    bullet_list,
+    colspec,
     container,
+    entry,
     fully_normalize_name,
-    inline,
-    list_item,
     literal,
     literal_block,
     paragraph,
+    problematic,
     reference,
+    row,
     section,
-    strong,
+    system_message,
+    table,
+    target,
+    tbody,
+    tgroup,
+    thead,
     title,
     whitespace_normalize_name,
 )
-from docutils.parsers.rst.directives import flag, positive_int, unchanged, unchanged_required
+from docutils.parsers.rst.directives import flag, nonnegative_int, positive_int, unchanged, unchanged_required
 from docutils.statemachine import StringList
-from sphinx.locale import __
+from sphinx.addnodes import pending_xref
+from sphinx.transforms import SphinxTransform
 from sphinx.util.docutils import SphinxDirective
-from sphinx.util.logging import getLogger
-
-if TYPE_CHECKING:
-    from collections.abc import Callable, Iterator
 
-    from sphinx.domains.std import StandardDomain
-    from sphinx.util.logging import SphinxLoggerAdapter
+from ._domain import CliDomain
+from ._nodes import cli_option, cli_option_name, cli_options, cli_usage
+from ._text import (
+    group_ref,
+    group_title,
+    id_maker,
+    load_help_text,
+    option_default,
+    option_metavar,
+    option_names,
+    root_title,
+    sub_command_ref,
+    sub_command_title,
+    summary_help,
+    summary_ref,
+    summary_title,
+)
+from ._timing import phase, time_directive
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
-_LOGGER: Final[SphinxLoggerAdapter] = getLogger(__name__)
+    from ._extract import Extraction
+    from ._model import CliAction, CliGroup, CliParser, CliSubCommand, CliSubCommandRef
 
 
 class SphinxArgparseCli(SphinxDirective):
@@ -63,6 +68,8 @@ class SphinxArgparseCli(SphinxDirective):
         "module": unchanged_required,
         "func": unchanged_required,
         "hook": flag,
+        "static": flag,
+        "parser": unchanged_required,
         "prog": unchanged,
         "title": unchanged,
         "description": unchanged,
@@ -75,93 +82,113 @@ class SphinxArgparseCli(SphinxDirective):
         # :ref: only supports lower-case, so this prefixes would-be-upper-case chars with _;
         # opt-in because it breaks existing URLs.
         "force_refs_lower": flag,
+        "path": unchanged_required,
+        "split_depth": positive_int,
+        "max_depth": nonnegative_int,
+        "include": unchanged_required,
+        "exclude": unchanged_required,
     }
 
     @cached_property
-    def parser(self) -> ArgumentParser:
-        module_name, attr_name = self.options["module"], self.options["func"]
-        try:
-            module = __import__(module_name, fromlist=[attr_name])
-        except ImportError:
-            msg = f"Failed to import module {module_name!r}"
-            raise self.error(msg)  # noqa: B904
-        try:
-            parser_creator = getattr(module, attr_name)
-        except AttributeError:
-            del sys.modules[module_name]
-            msg = f"Module {module_name!r} has no attribute {attr_name!r}"
-            raise self.error(msg)  # noqa: B904
-        parser: ArgumentParser | None = None
-        if "hook" in self.options:
-            original_parse_known_args = ArgumentParser.parse_known_args
-            ArgumentParser.parse_known_args = _parse_known_args_hook  # type: ignore[method-assign,assignment]
-            try:
-                parser_creator()
-            except HookError as hooked:
-                parser = hooked.parser
-            finally:
-                ArgumentParser.parse_known_args = original_parse_known_args
-        else:
-            parser = parser_creator()
+    def parser(self) -> CliParser:
+        from ._split import select_sub_commands  # noqa: PLC0415
 
-        del sys.modules[module_name]
-        if parser is None:
-            msg = "Failed to hook argparse to get ArgumentParser"
-            raise self.error(msg)
+        # pruned before rendering, so a selection of the tree only pays for what it shows
+        return select_sub_commands(self._whole_parser, self.options)
 
-        if "prog" in self.options:
-            old_prog, new_prog = parser.prog, self.options["prog"]
-            parser.prog = new_prog
-            _update_sub_parser_prog(parser, old_prog, new_prog)
-        return parser
+    @cached_property
+    def _whole_parser(self) -> CliParser:
+        return self._extraction.model
 
     @cached_property
-    def _std_domain(self) -> StandardDomain:
-        return cast("StandardDomain", self.env.get_domain("std"))
+    def _extraction(self) -> Extraction:
+        from ._extract import LoadParserError, obtain_extraction  # noqa: PLC0415
+        from ._incremental import record_fingerprint  # noqa: PLC0415
+
+        try:
+            return obtain_extraction(self.env, self.options)
+        except LoadParserError as exc:
+            record_fingerprint(self.env, self.options, None)
+            raise self.error(str(exc))  # noqa: B904
 
     @cached_property
     def _make_id(self) -> Callable[[str], str]:
-        return make_id_lower if "force_refs_lower" in self.options else make_id
-
-    @property
-    def _raw_format(self) -> bool:
-        formatter = self.parser.formatter_class
-        return isinstance(formatter, type) and issubclass(formatter, RawDescriptionHelpFormatter)
-
-    def _load_sub_parsers(
-        self, sub_parser: _SubParsersAction[ArgumentParser]
-    ) -> Iterator[tuple[list[str], str, ArgumentParser]]:
-        parser_to_args: dict[int, list[str]] = defaultdict(list)
-        for key, parser in sub_parser._name_parser_map.items():  # noqa: SLF001
-            parser_to_args[id(parser)].append(key)
-        done_parser: set[int] = set()
-
-        for name, parser in sub_parser.choices.items():
-            parser_id = id(parser)
-            if parser_id in done_parser:
-                continue
-            done_parser.add(parser_id)
-            aliases = parser_to_args[id(parser)]
-            aliases.remove(name)
-            # help is stored in a pseudo action
-            help_msg = next((a.help for a in sub_parser._choices_actions if a.dest == name), None) or ""  # noqa: SLF001
-            yield aliases, help_msg, parser
-
-            if parser._subparsers:  # noqa: SLF001
-                sub_sub_parser: _SubParsersAction[ArgumentParser] = parser._subparsers._group_actions[0]  # type: ignore[assignment]  # noqa: SLF001
-                if isinstance(sub_sub_parser, _SubParsersAction):
-                    yield from self._load_sub_parsers(sub_sub_parser)
-
-    def _iter_sub_commands(self) -> Iterator[tuple[list[str], str, ArgumentParser]]:
-        top_sub_parser = self.parser._subparsers  # noqa: SLF001
-        if not top_sub_parser:
-            return
-        sub_parser: _SubParsersAction[ArgumentParser] = top_sub_parser._group_actions[0]  # type: ignore[assignment]  # noqa: SLF001
-        yield from self._load_sub_parsers(sub_parser)
+        return id_maker(self.options)
 
     def run(self) -> list[Node]:
-        self.env.note_reread()  # this document needs to always be rebuilt
-        title_text = self.options.get("title", f"{self.parser.prog} - CLI interface").strip()
+        from ._fragments import fragment_key  # noqa: PLC0415
+        from ._incremental import record_fingerprint  # noqa: PLC0415
+
+        with time_directive(self.env, self.lineno) as timing:
+            fingerprint = record_fingerprint(self.env, self.options, self._whole_parser, self._extraction.sources)
+            if timing is not None:
+                timing.prog = self.parser.prog
+            home_section = self._reuse_or_render(fragment_key(self.env, self.options, fingerprint))
+            if self.content:
+                self.state.nested_parse(self.content, self.content_offset, home_section)
+            return [home_section]
+
+    def _reuse_or_render(self, key: str) -> Element:
+        from ._fragments import Fragment, load_fragment, store_fragment  # noqa: PLC0415
+
+        self._labels: list[tuple[str, str, bool]] = []
+        self._objects: list[tuple[str, str, str]] = []
+        self._protected: list[Element] = []
+        self._reusable = True
+        with phase("fragments"):
+            fragment = load_fragment(self.env, key)
+        if fragment is not None:
+            # the nodes are the same for any document, what is registered for them is not
+            for ref_name, ref_title, is_cli_option in fragment.labels:
+                self._register_ref(ref_name, ref_title, fragment.node, is_cli_option)
+            for objtype, name, node_id in fragment.objects:
+                self._note_object(objtype, name, node_id)
+            elements = list(fragment.node.findall(Element))
+            for at in fragment.protected:
+                self._protect_dashes(elements[at])
+            return fragment.node
+        home_section = self._render()
+        if self._reusable:
+            with phase("fragments"):
+                positions = {id(element): at for at, element in enumerate(home_section.findall(Element))}
+                protected = tuple(positions[id(node)] for node in self._protected)
+                fragment = Fragment(home_section, tuple(self._labels), tuple(self._objects), protected)
+                store_fragment(self.env, key, fragment)
+        return home_section
+
+    def _render(self) -> Element:
+        from ._model import CliSubCommandRef  # noqa: PLC0415  # loaded along with the parser, see find_sub_command
+        from ._split import find_sub_command, limit_depth, sub_command_path  # noqa: PLC0415
+
+        if path := sub_command_path(self.options):
+            if (found := find_sub_command(self.parser, path)) is None:
+                msg = f"{self.parser.prog} has no sub-command {' '.join(path)}"
+                raise self.error(msg)
+            home_section: Element = self._mk_sub_command(found.aliases, found.help, found.parser)
+            home_id: str | None = home_section["ids"][0]
+            parser = found.parser
+        else:
+            home_section, home_id = self._mk_root()
+            parser = self.parser
+
+        parser, summarized = limit_depth(parser, self.options)
+        if "split_depth" in self.options:
+            self._mk_sub_pages(home_section, parser, home_id)
+        else:
+            for sub_command in parser.iter_sub_commands():
+                if isinstance(sub_command, CliSubCommandRef):
+                    home_section += self._mk_sub_command_ref(sub_command, home_id)
+                else:
+                    home_section += self._mk_sub_command(sub_command.aliases, sub_command.help, sub_command.parser)
+        if summarized:
+            home_section += self._mk_summary(summarized, parser.prog if path else self.parser.prog.split("/")[-1])
+
+        if not path and (epilog := self._pre_format(self.options.get("epilog", self.parser.epilog))):
+            home_section += epilog
+        return home_section
+
+    def _mk_root(self) -> tuple[Element, str | None]:
+        title_text = root_title(self.parser.prog, self.options)
         if not title_text:
             home_section: Element = container("")
         else:
@@ -176,112 +203,139 @@ class SphinxArgparseCli(SphinxDirective):
         if "usage_first" not in self.options:
             home_section += self._mk_usage(self.parser)
 
-        for group in self.parser._action_groups:  # noqa: SLF001
-            if not group._group_actions or group is self.parser._subparsers:  # noqa: SLF001
-                continue
+        for group in self.parser.groups:
             home_section += self._mk_option_group(
                 group, prefix=self.parser.prog.split("/")[-1], prog=self.parser.prog.split("/")[-1]
             )
-        for aliases, help_msg, parser in self._iter_sub_commands():
-            home_section += self._mk_sub_command(aliases, help_msg, parser)
-
-        if epilog := self._pre_format(self.options.get("epilog", self.parser.epilog)):
-            home_section += epilog
-
-        if self.content:
-            self.state.nested_parse(self.content, self.content_offset, home_section)
-
-        return [home_section]
+        home_id = home_section["ids"][0] if title_text else None
+        self._note_object("program", self.parser.prog.split("/")[-1], home_id or "")
+        return home_section, home_id
+
+    def _mk_sub_pages(self, home_section: Element, parser: CliParser, home_id: str | None) -> None:
+        from ._model import CliSubCommand, CliSubCommandRef  # noqa: PLC0415
+
+        # sub-commands are on pages of their own (see generate_pages), apart from those that only link elsewhere
+        pages = [
+            f"   /{self.env.docname}/{sub_command.name}"
+            for sub_command in parser.sub_commands
+            if isinstance(sub_command, CliSubCommand)
+        ]
+        if pages:
+            toctree = StringList([".. toctree::", "   :maxdepth: 1", "", *pages])
+            self.state.nested_parse(toctree, self.content_offset, home_section)
+        for sub_command in parser.sub_commands:
+            if isinstance(sub_command, CliSubCommandRef):
+                home_section += self._mk_sub_command_ref(sub_command, home_id)
+
+    def _mk_summary(self, sub_commands: tuple[CliSubCommand | CliSubCommandRef, ...], prefix: str) -> section:
+        # the sub-commands below :max_depth: get a row each instead of a section: name, aliases and a line of help
+        title_text = summary_title(prefix, self.parser.prog.split("/")[-1], self.options)
+        ref_id = self._make_id(summary_ref(prefix))
+        summary_section = section("", title("", Text(title_text)), ids=[ref_id], names=[ref_id])
+        self._register_ref(ref_id, title_text, summary_section)
+        texts = [(sub.prog, ", ".join(sub.aliases), summary_help(sub.help)) for sub in sub_commands]
+        rows = [row("", *(entry() for _ in range(3))) for _ in texts]
+        for cells, (prog, aliases, help_text) in zip(rows, texts, strict=True):
+            cells[0] += paragraph("", "", self._mk_summary_link(prog))
+            if aliases:
+                cells[1] += paragraph("", Text(aliases))
+            if help_text:
+                cells[2] += paragraph("", Text(help_text))
+                self._protect_dashes(cells[2])
+        header = ("Sub-command", "Aliases", "Help")
+        # as wide as their longest text and some, for writers laying tables out by character (HTML sizes them itself)
+        widths = [max(map(len, column)) + 2 for column in zip(header, *texts, strict=True)]
+        columns = tgroup("", *(colspec(colwidth=width) for width in widths), cols=3)
+        columns += thead("", row("", *(entry("", paragraph("", Text(text))) for text in header)))
+        columns += tbody("", *rows)
+        summary_section += table("", columns, classes=["colwidths-auto", "sphinx-argparse-cli-summary"])
+        return summary_section
+
+    def _mk_summary_link(self, prog: str) -> pending_xref:
+        # to where the sub-command is documented in full, by another directive or a page of its own, if anywhere
+        return pending_xref(
+            "",
+            literal(text=prog),
+            refdomain=CliDomain.name,
+            reftype="command",
+            reftarget=prog,
+            refexplicit=True,
+            refdoc=self.env.docname,
+            optional=True,
+        )
 
     def _pre_format(self, block: str | None) -> paragraph | literal_block | None:
         if block is None:
             return None
-        if self._raw_format and "\n" in block:
+        if self.parser.raw_format and "\n" in block:
             lit = literal_block("", Text(block), classes=["sphinx-argparse-cli-wrap"])
             lit["language"] = "none"
             return lit
         para = paragraph("", Text(block))
-        _protect_option_dashes(para)
+        self._protect_dashes(para)
         return para
 
-    def _mk_option_group(self, group: _ArgumentGroup, prefix: str, prog: str) -> section:
-        sub_title_prefix: str = self.options.get("group_sub_title_prefix")
-        title_prefix = self.options.get("group_title_prefix")
-        title_text = self._build_opt_grp_title(group, prefix, prog, sub_title_prefix, title_prefix)
-        title_ref: str = f"{prefix}{' ' if prefix else ''}{group.title}"
-        ref_id = self._make_id(title_ref)
+    def _mk_option_group(self, group: CliGroup, prefix: str, prog: str) -> section:
+        title_text = group_title(group, prefix, prog, self.options)
+        ref_id = self._make_id(group_ref(prefix, group))
         # the text sadly needs to be prefixed, because otherwise the autosectionlabel will conflict
         header = title("", Text(title_text))
         group_section = section("", header, ids=[ref_id], names=[ref_id])
         if description := self._pre_format(group.description):
             group_section += description
         self._register_ref(ref_id, title_text, group_section)
-        opt_group = bullet_list()
-        for action in group._group_actions:  # noqa: SLF001
-            if action.help == SUPPRESS:
-                continue
+        opt_group = cli_options()
+        for action in group.actions:
             point = self._mk_option_line(action, prefix)
             opt_group += point
         group_section += opt_group
         return group_section
 
-    def _build_opt_grp_title(
-        self, group: _ArgumentGroup, prefix: str, prog: str, sub_title_prefix: str, title_prefix: str
-    ) -> str:
-        sub_cmd = prefix[len(prog) :].strip() or None if prefix != prog else None
-        title_text = self._resolve_prefix(prog, sub_cmd, prefix, title_prefix, sub_title_prefix)
-        title_text += group.title or ""
-        return title_text
-
-    def _mk_option_line(self, action: Action, prefix: str) -> list_item:
-        line = paragraph()
-        as_key = action.dest
-        if action.metavar:
-            as_key = action.metavar if isinstance(action.metavar, str) else action.metavar[0]
-        if action.option_strings:
-            for at, opt in enumerate(action.option_strings):
-                if at:
-                    line += Text(", ")
-                self._mk_option_name(line, prefix, opt)
-                if action.nargs != 0:
-                    line += Text(" ")
-                    metavar_text = (
-                        " ".join(meta.upper() for meta in action.metavar)
-                        if isinstance(action.metavar, tuple)
-                        else as_key.upper()
-                    )
-                    line += literal(text=metavar_text)
+    def _mk_option_line(self, action: CliAction, prefix: str) -> cli_option:
+        line = cli_option(action.help or "")
+        if (metavar := option_metavar(action)) is not None:
+            line["metavar"] = metavar
+        for opt in option_names(action):
+            line += self._mk_option_name(line, prefix, opt)
+        if action.help:
+            with phase("help"):
+                line += self._parse_help(load_help_text(action.help))
+        if (default := option_default(action, self.options)) is not None:
+            line["default"] = default
+        self._protect_dashes(line)
+        return line
+
+    def _parse_help(self, help_text: str) -> list[Node]:
+        if _PLAIN_HELP.fullmatch(help_text):
+            return [Text(help_text)]
+        # per document, as parsing may depend on what the document defined so far (substitutions, roles, ...)
+        memo: dict[str, list[Node]] = self.env.temp_data.setdefault(_HELP_MEMO, {})
+        if (parsed := memo.get(help_text)) is not None:
+            return [node.deepcopy() for node in parsed]
+        temp = paragraph()
+        self.state.nested_parse(StringList(help_text.split("\n")), 0, temp)
+        nodes = list(cast("paragraph", temp.children[0]).children)
+        if all(_reusable(node) for node in nodes):
+            memo[help_text] = [node.deepcopy() for node in nodes]
         else:
-            self._mk_option_name(line, prefix, as_key)
+            self._reusable = False  # nor is what renders it
+        return nodes
 
-        if action.help:
-            help_text = load_help_text(action.help)
-            temp = paragraph()
-            self.state.nested_parse(StringList(help_text.split("\n")), 0, temp)
-            line += Text(" - ")
-            for content in cast("paragraph", temp.children[0]).children:
-                line += content
-        if (
-            "no_default_values" not in self.options
-            and action.default is not None
-            and action.default != SUPPRESS
-            and not re.match(r".*[ (]default[s]? .*", (action.help or ""))
-            and not isinstance(action, _StoreTrueAction | _StoreFalseAction)
-        ):
-            line += Text(" (default: ")
-            line += literal(text=str(action.default).replace(str(Path.cwd()), "{cwd}"))
-            line += Text(")")
-        _protect_option_dashes(line)
-        return list_item("", line, ids=[])
+    def _protect_dashes(self, node: Element) -> None:
+        # protected in one go by OptionDashes, once the document is parsed
+        self.env.temp_data.setdefault(_DASHES, []).append(node)
+        self._protected.append(node)
 
-    def _mk_option_name(self, line: paragraph, prefix: str, opt: str) -> None:
+    def _mk_option_name(self, line: cli_option, prefix: str, opt: str) -> cli_option_name:
         ref_id = self._make_id(f"{prefix}-{opt}")
         ref_title = f"{prefix} {opt}"
-        ref = reference("", refid=ref_id, reftitle=ref_title)
-        line.attributes["ids"].append(ref_id)
-        ref += strong("", "", literal(text=opt))
-        self._register_ref(ref_id, ref_title, ref, is_cli_option=True)
-        line += ref
+        line["ids"].append(ref_id)
+        name = cli_option_name(opt, opt)
+        # not as keywords, which docutils lower-cases into new strings: the keys would be pickled again for every option
+        name["refid"], name["reftitle"] = ref_id, ref_title
+        self._register_ref(ref_id, ref_title, line, is_cli_option=True)
+        self._note_object("option", ref_title, ref_id)
+        return name
 
     def _register_ref(
         self,
@@ -290,42 +344,24 @@ class SphinxArgparseCli(SphinxDirective):
         node: Element,
         is_cli_option: bool = False,  # noqa: FBT001, FBT002
     ) -> None:
-        doc_name = self.env.docname
+        from ._labels import register_label  # noqa: PLC0415
+
+        self._labels.append((ref_name, ref_title, is_cli_option))
         normalize_name = whitespace_normalize_name if is_cli_option else fully_normalize_name
-        if self.env.config.sphinx_argparse_cli_prefix_document:
-            name = normalize_name(f"{doc_name}:{ref_name}")
-        else:
-            name = normalize_name(ref_name)
-        if name in self._std_domain.labels:
-            _LOGGER.warning(
-                __("duplicate label %s, other instance in %s"),
-                name,
-                self.env.doc2path(self._std_domain.labels[name][0]),
-                location=node,
-                type="sphinx-argparse-cli",
-                subtype=self.env.docname,
-            )
-        self._std_domain.anonlabels[name] = doc_name, ref_name
-        self._std_domain.labels[name] = doc_name, ref_name, ref_title
-
-    def _mk_sub_command(self, aliases: list[str], help_msg: str, parser: ArgumentParser) -> section:
-        sub_title_prefix: str = self.options.get("group_sub_title_prefix")
-        title_prefix: str = self.options.get("group_title_prefix")
-
-        if sys.version_info >= (3, 14):  # pragma: >=3.14 cover
-            # https://github.com/python/cpython/issues/139809
-            parser.prog = _strip_ansi_colors(parser.prog)
-
-        title_text = self._build_sub_cmd_title(parser, sub_title_prefix, title_prefix)
-        title_ref: str = parser.prog
-        if aliases:
-            aliases_text: str = f" ({', '.join(aliases)})"
-            title_text += aliases_text
-            title_ref += aliases_text
-        title_text = title_text.strip()
-        ref_id = self._make_id(title_ref)
-        group_section = section("", title("", Text(title_text)), ids=[ref_id], names=[title_ref])
-        self._register_ref(ref_id, title_ref, group_section)
+        name = normalize_name(self._label_name(ref_name, self.env.docname))
+        with phase("refs"):
+            register_label(self.env, name, ref_name, ref_title, node)
+
+    def _note_object(self, objtype: str, name: str, node_id: str) -> None:
+        self._objects.append((objtype, name, node_id))
+        with phase("refs"):
+            cast("CliDomain", self.env.get_domain(CliDomain.name)).note_object(objtype, name, node_id)
+
+    def _label_name(self, ref_name: str, doc_name: str) -> str:
+        return f"{doc_name}:{ref_name}" if self.env.config.sphinx_argparse_cli_prefix_document else ref_name
+
+    def _mk_sub_command(self, aliases: tuple[str, ...], help_msg: str, parser: CliParser) -> section:
+        group_section = self._mk_sub_command_section(parser.prog, aliases)
 
         if "usage_first" in self.options:
             group_section += self._mk_usage(parser)
@@ -333,142 +369,117 @@ class SphinxArgparseCli(SphinxDirective):
         command_desc = (parser.description or help_msg or "").strip()
         if command_desc:
             desc_paragraph = paragraph("", Text(command_desc))
-            _protect_option_dashes(desc_paragraph)
+            self._protect_dashes(desc_paragraph)
             group_section += desc_paragraph
 
         if "usage_first" not in self.options:
             group_section += self._mk_usage(parser)
 
-        for group in parser._action_groups:  # noqa: SLF001
-            if not group._group_actions:  # noqa: SLF001
-                continue
-            if isinstance(group._group_actions[0], _SubParsersAction):  # noqa: SLF001
-                continue
+        for group in parser.groups:
             group_section += self._mk_option_group(group, prefix=parser.prog, prog=self.parser.prog.split("/")[-1])
         return group_section
 
-    def _build_sub_cmd_title(self, parser: ArgumentParser, sub_title_prefix: str, title_prefix: str) -> str:
-        root_prog = self.parser.prog.split("/")[-1]
-        sub_cmd = parser.prog[len(root_prog) :].strip().split(" ", maxsplit=1)[0]
-        return self._resolve_prefix(root_prog, sub_cmd, parser.prog, title_prefix, sub_title_prefix).rstrip()
-
-    def _resolve_prefix(
-        self,
-        prog_name: str,
-        sub_cmd: str | None,
-        full_text: str,
-        title_prefix: str | None,
-        sub_title_prefix: str | None,
-    ) -> str:
-        title_text = ""
-        if title_prefix is not None:
-            title_prefix = title_prefix.replace("{prog}", prog_name)
-            if title_prefix:
-                title_text += f"{title_prefix} "
-            if sub_cmd is not None:
-                if sub_title_prefix is not None:
-                    title_text = self._apply_sub_title(title_text, sub_title_prefix, prog_name, sub_cmd)
-                else:
-                    title_text += f"{sub_cmd} "
-        elif sub_cmd is not None:
-            if sub_title_prefix is not None:
-                title_text += f"{prog_name} "
-                title_text = self._apply_sub_title(title_text, sub_title_prefix, prog_name, sub_cmd)
-            else:
-                title_text += f"{full_text} "
-        else:
-            title_text += f"{full_text} "
-        return title_text
-
-    @staticmethod
-    def _apply_sub_title(title_text: str, sub_title_prefix: str, prog: str, sub_cmd: str) -> str:
-        if sub_title_prefix:
-            sub_title_prefix = sub_title_prefix.replace("{prog}", prog).replace("{subcommand}", sub_cmd)
-            title_text += f"{sub_title_prefix} "
-        return title_text
-
-    def _mk_usage(self, parser: ArgumentParser) -> literal_block:
-        parser.formatter_class = lambda prog: HelpFormatter(prog, width=self.options.get("usage_width", 100))
-        with self._no_color():
-            texts = parser.format_usage()[len("usage: ") :].splitlines()
-        texts = [line if at == 0 else f"{' ' * (len(parser.prog) + 1)}{line.lstrip()}" for at, line in enumerate(texts)]
-        return literal_block("", Text("\n".join(texts)), classes=["sphinx-argparse-cli-wrap"])
-
-    @contextmanager
-    def _no_color(self) -> Iterator[None]:
-        with patch.dict(os.environ, {"NO_COLOR": "1"}, clear=False):
-            yield
-
-
-def make_id_lower(key: str) -> str:
-    return re.sub("[A-Z]", lambda m: f"_{m.group(0).lower()}", make_id(key))
-
-
-def make_id(key: str) -> str:
-    return "-".join(key.split()).rstrip("-")
-
-
-_HELP_SUBSTITUTIONS: Final[list[tuple[re.Pattern[str], str]]] = [
-    (re.compile(r"[']+(.+?)[']+"), "``'\\1'``"),
-    (re.compile(r'["]+(.+?)["]+'), '``"\\1"``'),
-    (re.compile(r"[{](.+?)[}]"), "``{\\1}``"),
-]
-
-
-def load_help_text(help_text: str) -> str:
-    for pattern, replacement in _HELP_SUBSTITUTIONS:
-        help_text = pattern.sub(replacement, help_text)
-    return help_text
+    def _mk_sub_command_ref(self, sub_command: CliSubCommandRef, home_id: str | None) -> section:
+        # the parser is shared with (or loops back to) another sub-command, document it there only and link to it
+        group_section = self._mk_sub_command_section(sub_command.prog, sub_command.aliases)
+        if command_desc := sub_command.help.strip():
+            desc_paragraph = paragraph("", Text(command_desc))
+            self._protect_dashes(desc_paragraph)
+            group_section += desc_paragraph
+        see = paragraph("", Text("See "))
+        see += self._mk_sub_command_link(sub_command, home_id)
+        see += Text(".")
+        group_section += see
+        return group_section
 
+    def _mk_sub_command_link(self, sub_command: CliSubCommandRef, home_id: str | None) -> Node:
+        from ._split import find_sub_command, page_of, sub_command_path  # noqa: PLC0415
+
+        target_text = literal(text=self.parser.prog if sub_command.target is None else sub_command.target[0])
+        target_id = None if sub_command.target is None else self._make_id(sub_command_ref(*sub_command.target))
+        path, target_path = sub_command_path(self.options), sub_command.target_path
+        if target_path and find_sub_command(self.parser, target_path) is None:
+            return target_text  # not selected to be documented
+        below = target_path[: len(path)] == path
+        depth = len(target_path) - len(path)
+        if below and sub_command.target is not None and depth > self.options.get("max_depth", depth):
+            return self._mk_summary_link(sub_command.target[0])  # only summarized, here and on the pages split off
+        if below and ("split_depth" not in self.options or not depth):
+            # rendered by this directive
+            target_id = home_id if target_id is None else target_id
+            return target_text if target_id is None else reference("", "", target_text, refid=target_id)
+        docname = page_of(self.env.docname, self.options, target_path)
+        if sub_command.target is None:
+            refdomain, reftype, reftarget = "std", "doc", f"/{docname}"
+        else:  # the page rendering it is asked for, the same sub-command may be documented elsewhere too
+            refdomain, reftype, reftarget = CliDomain.name, "command", sub_command.target[0]
+        return pending_xref(
+            "",
+            target_text,
+            refdomain=refdomain,
+            reftype=reftype,
+            reftarget=reftarget,
+            refexplicit=True,
+            refdoc=self.env.docname,
+            docname=docname,
+        )
 
-_OPTION_TOKEN: Final[re.Pattern[str]] = re.compile(r"((?<!\w)--[a-zA-Z0-9][\w-]*)")
+    def _mk_sub_command_section(self, prog: str, aliases: tuple[str, ...]) -> section:
+        title_text = sub_command_title(self.parser.prog.split("/")[-1], prog, aliases, self.options)
+        title_ref = sub_command_ref(prog, aliases)
+        ref_id = self._make_id(title_ref)
+        group_section = section("", title("", Text(title_text)), ids=[ref_id], names=[title_ref])
+        self._register_ref(ref_id, title_ref, group_section)
+        self._note_object("command", prog, ref_id)
+        return group_section
 
+    @staticmethod
+    def _mk_usage(parser: CliParser) -> cli_usage:
+        return cli_usage(parser.usage, parser.usage, classes=["sphinx-argparse-cli-wrap"], language="none")
 
-def _protect_option_dashes(node: Element) -> None:
-    """Wrap each ``--option`` in a smartquotes-exempt inline so its ``--`` survives Sphinx's en-dash transform."""
-    for text in list(node.findall(Text)):
-        if isinstance(text.parent, (literal, FixedTextElement)):
-            continue
-        # A capturing group makes split() interleave the option tokens (odd indices) with the surrounding text.
-        parts = _OPTION_TOKEN.split(text)
-        if len(parts) == 1:
-            continue
-        text.parent.replace(
-            text,
-            [
-                inline("", part, support_smartquotes=False) if index % 2 else Text(part)
-                for index, part in enumerate(parts)
-                if part
-            ],
-        )
 
+#: help texts that reStructuredText turns into a paragraph holding just the same text: no inline markup, references,
+#: URIs, e-mail addresses, or line-start constructs such as lists
+_PLAIN_HELP: Final[re.Pattern[str]] = re.compile(r"(?!\w+[.)](?:\s|$))\w(?:[^\\`*|\n\t@_:]|_(?=\w)|:(?=\s))*(?<=\S)")
+#: temporary data of the document being read, mapping help texts to their parsed nodes
+_HELP_MEMO: Final[str] = "sphinx_argparse_cli_help"
 
-class HookError(Exception):
-    def __init__(self, parser: ArgumentParser) -> None:
-        self.parser = parser
 
+def _reusable(node: Node) -> bool:
+    # nodes that are registered or resolved per occurrence (ids, references, messages) are parsed every time
+    for element in node.findall(Element):
+        if isinstance(element, (system_message, problematic, pending_xref, target)) or any(
+            element.get(attribute) for attribute in ("ids", "names", "refname", "refid")
+        ):
+            return False
+    return True
 
-def _parse_known_args_hook(self: ArgumentParser, *args: Any, **kwargs: Any) -> None:  # noqa: ARG001
-    raise HookError(self)
 
+#: temporary data of the document being read, listing the generated nodes whose option names need protection
+_DASHES: Final[str] = "sphinx_argparse_cli_dashes"
+_OPTION_DASHES: Final[re.Pattern[str]] = re.compile(r"(?<!\w)--(?=[a-zA-Z0-9])")
 
-_ANSI_COLOR_RE: Final[re.Pattern[str]] = re.compile(r"\x1b\[[0-9;]*m")
 
+class OptionDashes(SphinxTransform):
+    """
+    Keep the ``--`` of options mentioned in the generated text from becoming an en dash.
 
-def _strip_ansi_colors(text: str) -> str:  # pragma: >=3.14 cover
-    # needed due to https://github.com/python/cpython/issues/139809
-    return _ANSI_COLOR_RE.sub("", text)
+    The dashes get null-escaped, as docutils does for backslash-escaped characters: smart quotes leave escaped
+    characters alone, and writers drop the escapes (see :meth:`docutils.nodes.Text.astext`).
+    """
 
+    default_priority = 745  # before SphinxSmartQuotes
 
-def _update_sub_parser_prog(parser: ArgumentParser, old_prog: str, new_prog: str) -> None:
-    if not (sub_parsers := parser._subparsers):  # noqa: SLF001
-        return
-    sub_action: _SubParsersAction[ArgumentParser] = sub_parsers._group_actions[0]  # type: ignore[assignment]  # noqa: SLF001
-    for sub_parser in sub_action.choices.values():
-        sub_parser.prog = sub_parser.prog.replace(old_prog, new_prog, 1)
-        _update_sub_parser_prog(sub_parser, old_prog, new_prog)
+    def apply(self, **kwargs: Any) -> None:  # noqa: ARG002
+        for node in self.env.temp_data.pop(_DASHES, ()):
+            for text in list(node.findall(Text)):
+                if isinstance(text.parent, (literal, FixedTextElement)):
+                    continue
+                if (escaped := _OPTION_DASHES.sub("\x00-\x00-", text)) != text:
+                    text.parent.replace(text, Text(escaped))
 
 
 __all__ = [
+    "OptionDashes",
     "SphinxArgparseCli",
 ]
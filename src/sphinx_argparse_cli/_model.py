@@ -0,0 +1,357 @@
+"""Argparse independent description of a command line interface, as rendered by the directive."""
+
+from __future__ import annotations
+
+import re
+import sys
+from argparse import (
+    SUPPRESS,
+    Action,
+    ArgumentParser,
+    RawDescriptionHelpFormatter,
+    _ArgumentGroup,
+    _StoreFalseAction,
+    _StoreTrueAction,
+    _SubParsersAction,
+)
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Final, NamedTuple
+
+from ._usage import UsageRenderer
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+
+@dataclass(frozen=True, slots=True)
+class CliAction:
+    """A single argument of a parser."""
+
+    option_strings: tuple[str, ...]
+    dest: str
+    metavar: str | tuple[str, ...] | None
+    nargs: int | str | None
+    #: the default value as text, ``None`` when there is none worth showing
+    default: str | None
+    help: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class CliGroup:
+    """An argument group of a parser with the arguments that are not suppressed."""
+
+    title: str | None
+    description: str | None
+    actions: tuple[CliAction, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class CliSubCommand:
+    """A sub-command reachable from a parser, the name it is documented under and its aliases."""
+
+    name: str
+    aliases: tuple[str, ...]
+    help: str
+    parser: CliParser
+
+    @property
+    def prog(self) -> str:
+        """The program name of the sub-command, as for :attr:`CliSubCommandRef.prog`."""
+        return self.parser.prog
+
+
+@dataclass(frozen=True, slots=True)
+class CliSubCommandRef:
+    """A sub-command whose parser is already documented at another place of the tree."""
+
+    name: str
+    aliases: tuple[str, ...]
+    help: str
+    #: the program name at this place
+    prog: str
+    #: program name and aliases of the sub-command documenting the parser, ``None`` when that is the root parser
+    target: tuple[str, tuple[str, ...]] | None
+    #: names leading from the root parser to that sub-command
+    target_path: tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class CliParser:
+    """
+    A parser together with its argument groups and sub-commands.
+
+    The tree of sub-commands may be arbitrarily deep: it is walked, compared, hashed and pickled without recursion.
+    """
+
+    prog: str
+    description: str | None
+    epilog: str | None
+    #: the description and epilog are pre-formatted (the parser uses a raw description formatter)
+    raw_format: bool
+    usage: str
+    groups: tuple[CliGroup, ...]
+    sub_commands: tuple[CliSubCommand | CliSubCommandRef, ...]
+
+    def iter_sub_commands(self) -> Iterator[CliSubCommand | CliSubCommandRef]:
+        """Sub-commands of the whole tree, depth first, in the order they were added."""
+        pending = list(reversed(self.sub_commands))
+        while pending:
+            sub_command = pending.pop()
+            yield sub_command
+            if isinstance(sub_command, CliSubCommand):
+                pending.extend(reversed(sub_command.parser.sub_commands))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CliParser):
+            return NotImplemented
+        return self is other or self._flatten() == other._flatten()
+
+    def __hash__(self) -> int:
+        return hash(tuple(self._flatten()))
+
+    def __reduce__(self) -> tuple[Callable[[list[tuple[Any, ...]]], CliParser], tuple[list[tuple[Any, ...]]]]:
+        return _unflatten, (self._flatten(),)
+
+    def _flatten(self) -> list[tuple[Any, ...]]:
+        # the fields of each parser of the tree, breadth first, with sub-commands referring to the position of theirs
+        parsers, flat = [self], []
+        for parser in parsers:
+            sub_commands: list[tuple[str, tuple[str, ...], str, int] | CliSubCommandRef] = []
+            for sub_command in parser.sub_commands:
+                if isinstance(sub_command, CliSubCommand):
+                    sub_commands.append((sub_command.name, sub_command.aliases, sub_command.help, len(parsers)))
+                    parsers.append(sub_command.parser)
+                else:
+                    sub_commands.append(sub_command)
+            flat.append((
+                parser.prog,
+                parser.description,
+                parser.epilog,
+                parser.raw_format,
+                parser.usage,
+                parser.groups,
+                tuple(sub_commands),
+            ))
+        return flat
+
+    def limit_depth(self, max_depth: int) -> tuple[CliParser, tuple[CliSubCommand | CliSubCommandRef, ...]]:
+        """
+        Cut the tree of sub-commands below *max_depth* levels.
+
+        :return: the parser keeping the sub-commands down to that depth, and the sub-commands cut off (together with
+            the ones below them) in the order :meth:`iter_sub_commands` yields them
+        """
+        if max_depth == 0:
+            return replace(self, sub_commands=()), tuple(self.iter_sub_commands())
+        # walk the kept levels depth first, numbering them in visit order
+        visited: list[tuple[int, CliSubCommand | CliSubCommandRef]] = []
+        cut: list[CliSubCommand | CliSubCommandRef] = []
+        pending = [(-1, 1, sub_command) for sub_command in reversed(self.sub_commands)]
+        while pending:
+            parent, depth, sub_command = pending.pop()
+            at = len(visited)
+            visited.append((parent, sub_command))
+            if not isinstance(sub_command, CliSubCommand):
+                continue
+            if depth < max_depth:
+                pending.extend((at, depth + 1, child) for child in reversed(sub_command.parser.sub_commands))
+            else:
+                cut.extend(sub_command.parser.iter_sub_commands())
+        # rebuild bottom up, the sub-commands at the limit lose theirs
+        children: dict[int, list[CliSubCommand | CliSubCommandRef]] = {}
+        for at in reversed(range(len(visited))):
+            parent, sub_command = visited[at]
+            if isinstance(sub_command, CliSubCommand):
+                below = tuple(reversed(children.pop(at, [])))
+                sub_command = replace(sub_command, parser=replace(sub_command.parser, sub_commands=below))
+            children.setdefault(parent, []).append(sub_command)
+        return replace(self, sub_commands=tuple(reversed(children.get(-1, [])))), tuple(cut)
+
+
+def _unflatten(flat: list[tuple[Any, ...]]) -> CliParser:
+    # a parser comes before those of its sub-commands, so build them in reverse
+    parsers: dict[int, CliParser] = {}
+    for at in reversed(range(len(flat))):
+        *fields, sub_commands = flat[at]
+        parsers[at] = CliParser(
+            *fields,
+            tuple(
+                sub if isinstance(sub, CliSubCommandRef) else CliSubCommand(*sub[:3], parsers[sub[3]])
+                for sub in sub_commands
+            ),
+        )
+    return parsers[0]
+
+
+def build_model(parser: ArgumentParser, usage_width: int, prog: str | None = None) -> CliParser:
+    """
+    Capture what the directive renders of *parser*, with usage lines wrapped at *usage_width*.
+
+    The parser is only read, never modified. When *prog* is given it replaces the program name of the parser, and the
+    leading program name of its sub-commands.
+    """
+    builder = _ModelBuilder(usage_width, (parser.prog, prog) if prog is not None else None)
+    return builder.build(parser)
+
+
+class _ModelBuilder:
+    def __init__(self, usage_width: int, rename: tuple[str, str] | None) -> None:
+        self._usage = UsageRenderer(usage_width)
+        self._rename = rename
+
+    def build(self, parser: ArgumentParser) -> CliParser:
+        # a single depth first pass over the tree records where each parser object is documented first; any later place
+        # it shows up at (shared, or looping back) only refers to that
+        root_prog = parser.prog if self._rename is None else self._rename[1]
+        progs: dict[int, str] = {id(parser): root_prog}
+        places: dict[int, tuple[str, tuple[str, ...]] | None] = {id(parser): None}
+        paths: dict[int, tuple[str, ...]] = {id(parser): ()}
+        children: dict[int, list[_Child | CliSubCommandRef]] = {id(parser): []}
+        visited = [parser]
+        pending = [(parser, child) for child in reversed(_children(parser))]
+        while pending:
+            parent, child = pending.pop()
+            siblings = children[id(parent)]
+            if (key := id(child.parser)) in places:
+                prog = sys.intern(f"{progs[id(parent)]} {child.name}")
+                siblings.append(CliSubCommandRef(*child[:3], prog, places[key], paths[key]))
+                continue
+            progs[key] = prog = self._sub_prog(child.parser)
+            places[key] = prog, child.aliases
+            paths[key] = (*paths[id(parent)], child.name)
+            children[key] = []
+            siblings.append(child)
+            visited.append(child.parser)
+            pending.extend((child.parser, grandchild) for grandchild in reversed(_children(child.parser)))
+
+        # a parser is visited before the parsers it documents, so build the models in reverse
+        models: dict[int, CliParser] = {}
+        for current in reversed(visited):
+            sub_commands = tuple(
+                sub if isinstance(sub, CliSubCommandRef) else CliSubCommand(*sub[:3], models[id(sub.parser)])
+                for sub in children[id(current)]
+            )
+            models[id(current)] = self._parser(current, progs[id(current)], sub_commands, root=current is parser)
+        return models[id(parser)]
+
+    def _sub_prog(self, parser: ArgumentParser) -> str:
+        prog = parser.prog
+        if self._rename is not None:
+            prog = prog.replace(*self._rename, 1)
+        if sys.version_info >= (3, 14):  # pragma: >=3.14 cover
+            # https://github.com/python/cpython/issues/139809
+            prog = _strip_ansi_colors(prog)
+        return sys.intern(prog)
+
+    def _parser(
+        self,
+        parser: ArgumentParser,
+        prog: str,
+        sub_commands: tuple[CliSubCommand | CliSubCommandRef, ...],
+        *,
+        root: bool,
+    ) -> CliParser:
+        formatter = parser.formatter_class
+        groups = tuple(
+            self._group(group)
+            for group in parser._action_groups  # noqa: SLF001
+            if group._group_actions  # noqa: SLF001
+            and not (
+                group is parser._subparsers  # noqa: SLF001
+                if root
+                else isinstance(group._group_actions[0], _SubParsersAction)  # noqa: SLF001
+            )
+        )
+        return CliParser(
+            prog=_intern(prog),
+            description=_intern(parser.description),
+            epilog=_intern(parser.epilog),
+            raw_format=isinstance(formatter, type) and issubclass(formatter, RawDescriptionHelpFormatter),
+            usage=self._usage.render(parser, prog),
+            groups=groups,
+            sub_commands=sub_commands,
+        )
+
+    @staticmethod
+    def _group(group: _ArgumentGroup) -> CliGroup:
+        actions = tuple(_action(action) for action in group._group_actions if action.help != SUPPRESS)  # noqa: SLF001
+        return CliGroup(_intern(group.title), _intern(group.description), actions)
+
+
+class _Child(NamedTuple):
+    name: str
+    aliases: tuple[str, ...]
+    help: str
+    parser: ArgumentParser
+
+
+def _children(parser: ArgumentParser) -> list[_Child]:
+    if (sub_parsers := _sub_parsers_action(parser)) is None:
+        return []
+    # a parser is registered under its name and each of its aliases, the name coming first
+    names: dict[int, list[str]] = defaultdict(list)
+    for key, sub_parser in sub_parsers._name_parser_map.items():  # noqa: SLF001
+        names[id(sub_parser)].append(key)
+    # help is stored in pseudo actions, one per parser
+    helps: dict[str, str | None] = {}
+    for choice_action in sub_parsers._choices_actions:  # noqa: SLF001
+        helps.setdefault(choice_action.dest, choice_action.help)
+    result: list[_Child] = []
+    for name, sub_parser in sub_parsers.choices.items():
+        if (keys := names.pop(id(sub_parser), None)) is None:  # an alias of a parser already seen
+            continue
+        aliases = tuple(sys.intern(key) for key in keys if key != name)
+        result.append(_Child(sys.intern(name), aliases, sys.intern(helps.get(name) or ""), sub_parser))
+    return result
+
+
+def _sub_parsers_action(parser: ArgumentParser) -> _SubParsersAction[ArgumentParser] | None:
+    if not (sub_parsers := parser._subparsers):  # noqa: SLF001
+        return None
+    first = sub_parsers._group_actions[0]  # noqa: SLF001
+    return first if isinstance(first, _SubParsersAction) else None
+
+
+def _action(action: Action) -> CliAction:
+    default: str | None = None
+    if (
+        action.default is not None
+        and action.default != SUPPRESS
+        and not isinstance(action, _StoreTrueAction | _StoreFalseAction)
+    ):
+        default = str(action.default)
+    metavar = action.metavar
+    metavar = tuple(map(sys.intern, metavar)) if isinstance(metavar, tuple) else _intern(metavar)
+    nargs = sys.intern(action.nargs) if isinstance(action.nargs, str) else action.nargs
+    return CliAction(
+        tuple(map(sys.intern, action.option_strings)),
+        sys.intern(action.dest),
+        metavar,
+        nargs,
+        default,
+        _intern(action.help),
+    )
+
+
+def _intern(text: str | None) -> str | None:
+    # the same names and help texts repeat across sub-commands, share a single copy of them
+    return None if text is None else sys.intern(text)
+
+
+_ANSI_COLOR_RE: Final[re.Pattern[str]] = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def _strip_ansi_colors(text: str) -> str:  # pragma: >=3.14 cover
+    # needed due to https://github.com/python/cpython/issues/139809
+    return _ANSI_COLOR_RE.sub("", text)
+
+
+__all__ = [
+    "CliAction",
+    "CliGroup",
+    "CliParser",
+    "CliSubCommand",
+    "CliSubCommandRef",
+    "build_model",
+]
@@ -0,0 +1,240 @@
+"""
+Nodes the directive renders options and usages into, holding what they show rather than how it is marked up.
+
+The HTML, text and LaTeX writers get the markup of a node from the visitors here in one step. For other builders the
+nodes are lowered to the standard nodes they stand for once the doctree is resolved, see :func:`lower_nodes`.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Final, cast
+
+from docutils import nodes
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from sphinx.application import Sphinx
+    from sphinx.writers.html5 import HTML5Translator
+    from sphinx.writers.latex import LaTeXTranslator
+    from sphinx.writers.text import TextTranslator
+
+
+class cli_options(nodes.Sequential, nodes.Element):  # noqa: N801
+    """The options of an argument group, one :class:`cli_option` each, shown as a bullet list."""
+
+    def lower(self) -> nodes.bullet_list:
+        return nodes.bullet_list("", *(cast("cli_option", option).lower() for option in self.children))
+
+
+class cli_option(nodes.Part, nodes.TextElement):  # noqa: N801
+    """
+    An option or positional argument: its :class:`cli_option_name` children followed by the nodes of its help.
+
+    ``metavar`` is shown after every name when the option takes a value, ``default`` closes the line.
+    """
+
+    @property
+    def names(self) -> list[cli_option_name]:
+        return [child for child in self.children if isinstance(child, cli_option_name)]
+
+    @property
+    def help(self) -> list[nodes.Node]:
+        return self.children[len(self.names) :]
+
+    def lower(self) -> nodes.list_item:
+        line = nodes.paragraph("", ids=self["ids"])
+        for at, name in enumerate(self.names):
+            if at:
+                line += nodes.Text(", ")
+            line += name.lower()
+            if "metavar" in self:
+                line += [nodes.Text(" "), nodes.literal(text=self["metavar"])]
+        if help_nodes := self.help:
+            line += nodes.Text(" - ")
+            line.extend(help_nodes)
+        if "default" in self:
+            line += [nodes.Text(" (default: "), nodes.literal(text=self["default"]), nodes.Text(")")]
+        return nodes.list_item("", line)
+
+
+class cli_option_name(nodes.literal):  # noqa: N801
+    """A name of an option linking to it, ``refid`` and ``reftitle`` as for a reference."""
+
+    def lower(self) -> nodes.reference:
+        name = self.astext()
+        ref = nodes.reference(name, refid=self["refid"], reftitle=self["reftitle"])
+        ref += nodes.strong(name, "", nodes.literal(name, name))
+        return ref
+
+
+class cli_usage(nodes.literal_block):  # noqa: N801
+    """The usage of a parser, shown as is."""
+
+    def lower(self) -> nodes.literal_block:
+        block = nodes.literal_block(self.rawsource, self.astext())
+        block.update_all_atts(self)
+        return block
+
+
+def lower_nodes(app: Sphinx, doctree: nodes.document, docname: str) -> None:  # noqa: ARG001
+    """Replace the nodes the builder's writer has no visitor for with standard nodes."""
+    # the same lookup the registry does when creating the translator
+    handlers = app.registry.translation_handlers
+    known = handlers.get(app.builder.name, handlers.get(app.builder.format, {}))
+    for node_type in (cli_options, cli_usage):
+        if node_type.__name__ not in known:
+            for node in list(doctree.findall(node_type)):
+                node.replace_self(node.lower())
+
+
+def _html_literal(self: HTML5Translator, text: str) -> str:
+    # what the translator writes for a literal node, word by word so only spaces wrap
+    words = []
+    for token in self.words_and_spaces.findall(self.encode(text)):
+        if token.strip():
+            words.append(f'<span class="pre">{token}</span>')
+        elif token in {" ", "\n"}:
+            words.append(token)
+        else:
+            words.append("&#160;" * (len(token) - 1) + " ")
+    return f'<code class="docutils literal notranslate">{"".join(words)}</code>'
+
+
+def _visit_options_html(self: HTML5Translator, node: cli_options) -> None:
+    self.body.append(self.starttag(node, "ul", CLASS="simple"))
+
+
+def _depart_options_html(self: HTML5Translator, node: cli_options) -> None:  # noqa: ARG001
+    self.body.append("</ul>\n")
+
+
+def _visit_option_html(self: HTML5Translator, node: cli_option) -> None:
+    parts = ["<li>", self.starttag(node, "p", "")]
+    for at, name in enumerate(node.names):
+        if at:
+            parts.append(", ")
+        href, title = self.attval(f"#{name['refid']}"), self.attval(name["reftitle"])
+        parts.append(f'<a class="reference internal" href="{href}" title="{title}">')
+        parts.append(f"<strong>{_html_literal(self, name.astext())}</strong></a>")
+        if "metavar" in node:
+            parts.append(f" {_html_literal(self, node['metavar'])}")
+    if node.help:
+        parts.append(" - ")
+    self.body.append("".join(parts))
+
+
+def _depart_option_html(self: HTML5Translator, node: cli_option) -> None:
+    default = f" (default: {_html_literal(self, node['default'])})" if "default" in node else ""
+    self.body.append(f"{default}</p></li>\n")
+
+
+def _visit_usage_html(self: HTML5Translator, node: cli_usage) -> None:
+    # plain text, the highlighter would only make something up for it
+    div = self.starttag(node, "div", suffix="", CLASS="highlight-none notranslate")
+    self.body.append(f'{div}<div class="highlight"><pre>{self.encode(node.astext())}\n</pre></div>\n</div>\n')
+    raise nodes.SkipNode
+
+
+def _visit_option_text(self: TextTranslator, node: cli_option) -> None:
+    self.new_state(2)
+    parts = []
+    for at, name in enumerate(node.names):
+        if at:
+            parts.append(", ")
+        parts.append(f'**"{name.astext()}"**')
+        if "metavar" in node:
+            parts.append(f' "{node["metavar"]}"')
+    if node.help:
+        parts.append(" - ")
+    self.add_text("".join(parts))
+
+
+def _depart_option_text(self: TextTranslator, node: cli_option) -> None:
+    if "default" in node:
+        self.add_text(f' (default: "{node["default"]}")')
+    self.end_state(first="* ")
+
+
+def _visit_options_latex(self: LaTeXTranslator, node: cli_options) -> None:  # noqa: ARG001
+    self.body.append("\\begin{itemize}\n")
+
+
+def _depart_options_latex(self: LaTeXTranslator, node: cli_options) -> None:  # noqa: ARG001
+    self.body.append("\\end{itemize}\n")
+
+
+def _latex_literal(self: LaTeXTranslator, text: str) -> str:
+    return f"\\sphinxcode{{\\sphinxupquote{{{self.encode(text)}}}}}"
+
+
+def _visit_option_latex(self: LaTeXTranslator, node: cli_option) -> None:
+    # unlike a paragraph, the ids get labels: links to the option from other documents have a target
+    parts = ["\\item {} \n\\sphinxAtStartPar\n", self.hypertarget_to(node, anchor=True)]
+    for at, name in enumerate(node.names):
+        if at:
+            parts.append(", ")
+        target = f"{self.curfilestack[-1]}:{name['refid']}"
+        parts.append(f"{self.hyperlink(target)}\\sphinxcrossref{{\\sphinxstylestrong{{")
+        parts.append(f"{_latex_literal(self, name.astext())}}}}}}}}}")
+        if self.config.latex_show_pagerefs:
+            parts.append(f" ({self.hyperpageref(target)})")
+        if "metavar" in node:
+            parts.append(f" {_latex_literal(self, node['metavar'])}")
+    if node.help:
+        parts.append(self.encode(" - "))
+    self.body.append("".join(parts))
+
+
+def _depart_option_latex(self: LaTeXTranslator, node: cli_option) -> None:
+    if "default" in node:
+        self.body.append(f"{self.encode(' (default: ')}{_latex_literal(self, node['default'])})")
+    self.body.append("\n\n")
+
+
+def _visit_usage(self: TextTranslator | LaTeXTranslator, node: cli_usage) -> None:
+    self.visit_literal_block(node)
+
+
+def _depart_usage(self: TextTranslator | LaTeXTranslator, node: cli_usage) -> None:
+    self.depart_literal_block(node)
+
+
+def _skip(self: Any, node: nodes.Element) -> None:  # noqa: ARG001
+    # written by the visitor of the option it names
+    raise nodes.SkipNode
+
+
+def _ignore(self: Any, node: nodes.Element) -> None:
+    pass
+
+
+#: visit and depart functions of every node, per writer
+VISITORS: Final[dict[type[nodes.Element], dict[str, tuple[Callable[..., None], Callable[..., None] | None]]]] = {
+    cli_options: {
+        "html": (_visit_options_html, _depart_options_html),
+        "text": (_ignore, _ignore),
+        "latex": (_visit_options_latex, _depart_options_latex),
+    },
+    cli_option: {
+        "html": (_visit_option_html, _depart_option_html),
+        "text": (_visit_option_text, _depart_option_text),
+        "latex": (_visit_option_latex, _depart_option_latex),
+    },
+    cli_option_name: {"html": (_skip, None), "text": (_skip, None), "latex": (_skip, None)},
+    cli_usage: {
+        "html": (_visit_usage_html, None),
+        "text": (_visit_usage, _depart_usage),
+        "latex": (_visit_usage, _depart_usage),
+    },
+}
+
+
+__all__ = [
+    "VISITORS",
+    "cli_option",
+    "cli_option_name",
+    "cli_options",
+    "cli_usage",
+    "lower_nodes",
+]
@@ -0,0 +1,136 @@
+"""Extract parsers in worker processes, keeping the application out of the Sphinx process."""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from contextlib import suppress
+from multiprocessing.connection import wait
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from ._extract import ExtractRequest, LoadParserError, extract_parser
+from ._model import CliParser, build_model
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+
+
+#: a successfully extracted model with the source files it came from, or the reason the extraction failed
+ExtractResult = tuple[CliParser, list[str]] | LoadParserError
+
+
+class _Worker(NamedTuple):
+    process: BaseProcess
+    connection: Connection
+
+
+class WorkerPool:
+    """
+    Reusable worker processes that import the target modules and send back the extracted parser models.
+
+    A worker that crashes or does not answer within *timeout* seconds is discarded and its extraction reported as
+    failed; the remaining requests carry on with fresh workers. A model the worker cannot send back (one holding
+    application objects that refuse pickling) is reported as failed too, the application is never imported here.
+    """
+
+    def __init__(self, size: int, timeout: float) -> None:
+        self.size = size
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: list[_Worker] = []
+        self._pid = os.getpid()
+
+    def extract(self, requests: Sequence[ExtractRequest]) -> list[ExtractResult]:
+        """Extract the models of *requests*, running up to ``size`` of them concurrently."""
+        if self._pid != os.getpid():  # pragma: no cover  # inherited through a fork by a parallel reader
+            self._idle, self._pid = [], os.getpid()  # the workers belong to the parent process
+        results: list[ExtractResult] = [LoadParserError("not extracted")] * len(requests)
+        pending = deque(enumerate(requests))
+        busy: dict[Connection, tuple[_Worker, int, float]] = {}
+        while pending or busy:
+            while pending and len(busy) < self.size:
+                at, request = pending.popleft()
+                worker = self._idle.pop() if self._idle else self._start()
+                worker.connection.send(request)
+                busy[worker.connection] = worker, at, time.monotonic() + self.timeout
+            next_deadline = min(deadline for _, _, deadline in busy.values())
+            for connection in wait(list(busy), timeout=max(0.0, next_deadline - time.monotonic())):
+                worker, at, _ = busy.pop(connection)  # type: ignore[call-overload]
+                results[at] = self._receive(worker, requests[at])
+            now = time.monotonic()
+            for connection, (worker, at, deadline) in list(busy.items()):
+                if deadline <= now:
+                    del busy[connection]
+                    _kill(worker)
+                    request = requests[at]
+                    msg = f"Extracting parser from {request.module}:{request.func} timed out after {self.timeout}s"
+                    results[at] = LoadParserError(msg)
+        return results
+
+    def close(self) -> None:
+        """Stop the idle workers."""
+        for worker in self._idle if self._pid == os.getpid() else []:
+            with suppress(OSError):  # the worker may have exited already
+                worker.connection.send(None)
+            worker.process.join(timeout=1)
+            _kill(worker)
+        self._idle = []
+
+    def _start(self) -> _Worker:
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=_serve, args=(child,), name="sphinx-argparse-cli", daemon=True)
+        process.start()
+        child.close()
+        return _Worker(process, parent)
+
+    def _receive(self, worker: _Worker, request: ExtractRequest) -> ExtractResult:
+        try:
+            outcome = worker.connection.recv()
+        except (EOFError, OSError):
+            worker.process.join(timeout=1)
+            _kill(worker)
+            msg = (
+                f"Extracting parser from {request.module}:{request.func} crashed (exit code {worker.process.exitcode})"
+            )
+            return LoadParserError(msg)
+        self._idle.append(worker)
+        return outcome
+
+
+def _kill(worker: _Worker) -> None:
+    if worker.process.is_alive():
+        worker.process.kill()
+        worker.process.join()
+    worker.connection.close()
+
+
+def _serve(connection: Connection) -> None:  # pragma: no cover  # runs in the worker process
+    while True:
+        try:
+            request: ExtractRequest | None = connection.recv()
+        except EOFError:  # the Sphinx process went away
+            return
+        if request is None:
+            return
+        outcome: Any
+        try:
+            parser, sources = extract_parser(request)
+            outcome = build_model(parser, request.usage_width, request.prog), sources
+        except LoadParserError as exc:
+            outcome = exc
+        except BaseException as exc:  # noqa: BLE001  # the application may raise anything, including SystemExit
+            outcome = LoadParserError(f"Failed to extract parser from {request.module}:{request.func}: {exc!r}")
+        try:
+            connection.send(outcome)  # pickled in full before anything is written
+        except Exception as exc:  # noqa: BLE001  # pickling objects of the application may raise anything
+            connection.send(LoadParserError(f"Cannot send back the parser of {request.module}:{request.func}: {exc!r}"))
+
+
+__all__ = [
+    "ExtractResult",
+    "WorkerPool",
+]
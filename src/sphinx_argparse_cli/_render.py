@@ -0,0 +1,364 @@
+"""
+Render the model of a parser as reStructuredText, Markdown or JSON, without Sphinx.
+
+The text formats lay the parser out as the directive does: the same sections, titles and option lines. Markdown anchors
+carry the reference ids the directive gives them, so links into a rendered page keep working either way; the labels of
+reStructuredText are named after them for ``:ref:``, but docutils derives HTML ids of its own from the names, squeezing
+runs of dashes (``tool---flag`` becomes ``tool-flag``).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, Final
+
+from ._model import CliSubCommandRef
+from ._text import (
+    group_ref,
+    group_title,
+    id_maker,
+    load_help_text,
+    option_default,
+    option_metavar,
+    option_names,
+    root_title,
+    sub_command_ref,
+    sub_command_title,
+    summary_help,
+    summary_ref,
+    summary_title,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from ._model import CliAction, CliGroup, CliParser, CliSubCommand
+
+
+def render(parser: CliParser, fmt: str, options: Mapping[str, Any]) -> str:
+    """
+    Render *parser* in the format *fmt*, one of :data:`FORMATS`.
+
+    *options* are those of the directive (``title``, ``group_title_prefix``, ``usage_first``, ...), keyed by their
+    name with underscores; flags are set by being present. The JSON model ignores them.
+    """
+    if fmt == "json":
+        return _json(parser) + "\n"
+    return _Renderer(_STYLES[fmt], parser, options).render()
+
+
+def _json(parser: CliParser) -> str:
+    # as json.dumps(asdict(parser), indent=2) would, but without recursing once per level of sub-commands
+    out: list[str] = []
+    pending: list[str | tuple[CliParser, int]] = [(parser, 0)]
+    while pending:
+        if isinstance(item := pending.pop(), str):
+            out.append(item)
+            continue
+        current, level = item
+        pad = "  " * level
+        pieces: list[str | tuple[CliParser, int]] = ["{\n"]
+        fields = (
+            ("prog", current.prog),
+            ("description", current.description),
+            ("epilog", current.epilog),
+            ("raw_format", current.raw_format),
+            ("usage", current.usage),
+            ("groups", [asdict(group) for group in current.groups]),
+        )
+        pieces.extend(f'{pad}  "{name}": {_json_value(value, level + 1)},\n' for name, value in fields)
+        if not current.sub_commands:
+            pieces.append(f'{pad}  "sub_commands": []\n')
+        else:
+            pieces.append(f'{pad}  "sub_commands": [\n')
+            for at, sub_command in enumerate(current.sub_commands):
+                end = ",\n" if at < len(current.sub_commands) - 1 else "\n"
+                if isinstance(sub_command, CliSubCommandRef):
+                    pieces.append(f"{pad}    {_json_value(asdict(sub_command), level + 2)}{end}")
+                    continue
+                pieces.append(f"{pad}    {{\n")
+                pieces.extend(
+                    f'{pad}      "{name}": {_json_value(getattr(sub_command, name), level + 3)},\n'
+                    for name in ("name", "aliases", "help")
+                )
+                pieces.extend((f'{pad}      "parser": ', (sub_command.parser, level + 3), f"\n{pad}    }}{end}"))
+            pieces.append(f"{pad}  ]\n")
+        pieces.append(f"{pad}}}")
+        pending.extend(reversed(pieces))
+    return "".join(out)
+
+
+def _json_value(value: Any, level: int) -> str:
+    return json.dumps(value, indent=2).replace("\n", "\n" + "  " * level)
+
+
+class _Style(ABC):
+    """How a text format marks up the parts of a page."""
+
+    @abstractmethod
+    def heading(self, text: str, ref_id: str | None, level: int) -> str:
+        """Mark up a section title at *level*, with an anchor for *ref_id*."""
+
+    @abstractmethod
+    def usage(self, usage: str) -> str:
+        """Mark up a pre-formatted block."""
+
+    @abstractmethod
+    def text(self, text: str) -> str:
+        """Escape plain text, so nothing in it reads as markup."""
+
+    @abstractmethod
+    def code(self, text: str) -> str:
+        """Mark up inline code."""
+
+    @abstractmethod
+    def help(self, text: str) -> str:
+        """Convert a help text, which is reStructuredText, to go within a list item."""
+
+    @abstractmethod
+    def link(self, text: str, ref_id: str) -> str:
+        """Link *text* to the anchor of *ref_id*."""
+
+    @abstractmethod
+    def name(self, text: str) -> str:
+        """Stress the name of an argument."""
+
+    @abstractmethod
+    def option(self, ref_ids: list[str], line: str) -> str:
+        """Mark up the list item of an option, with anchors for its *ref_ids*."""
+
+    def options(self, lines: list[str]) -> str:
+        return "\n\n".join(lines)
+
+    @abstractmethod
+    def table(self, header: tuple[str, ...], rows: list[tuple[str, ...]]) -> str:
+        """Mark up a table with a header row."""
+
+    def block(self, text: str) -> str:
+        # a pre-formatted description or epilog is shown as is, just as the usage
+        return self.usage(text.strip("\n"))
+
+
+class _RstStyle(_Style):
+    _UNDERLINES: Final[str] = "=-~^\"'"
+
+    def heading(self, text: str, ref_id: str | None, level: int) -> str:
+        text = self.text(text) or "\\ "  # an escaped space, for a title that is empty
+        heading = f"{text}\n{self._UNDERLINES[level - 1] * max(len(text), 4)}"
+        return heading if ref_id is None else f"{self._label(ref_id)}\n\n{heading}"
+
+    def usage(self, usage: str) -> str:
+        return ".. code:: text\n\n" + "\n".join(f"   {line}" if line else "" for line in usage.split("\n"))
+
+    def text(self, text: str) -> str:
+        escaped = _escape(_RST_SPECIAL, " ".join(text.split()))
+        if escaped[:1] in {"", "\\"} or (escaped[0].isalnum() and not _RST_ENUMERATOR.match(escaped)):
+            return escaped
+        return f"\\{escaped}"  # nor may it start a list, a section or an explicit markup block
+
+    def code(self, text: str) -> str:
+        if not text or text != text.strip() or "`" in text:  # not expressible as an inline literal
+            return f'"{_escape(_RST_SPECIAL, text)}"'
+        return f"``{text}``"
+
+    def help(self, text: str) -> str:
+        # already reStructuredText, continued lines are indented to stay in the list item
+        return load_help_text(text).replace("\n", "\n  ")
+
+    def link(self, text: str, ref_id: str) -> str:
+        # anonymous, so that linking the same text twice does not define its name twice
+        return f"`{self.text(text)} <{_escape(_RST_ALIAS, ref_id)}_>`__"
+
+    def name(self, text: str) -> str:
+        return self.code(text)  # inline markup does not nest
+
+    def option(self, ref_ids: list[str], line: str) -> str:
+        return "\n".join(self._label(ref_id) for ref_id in ref_ids) + f"\n\n* {line}"
+
+    def table(self, header: tuple[str, ...], rows: list[tuple[str, ...]]) -> str:
+        lines = [".. list-table::", "   :header-rows: 1", ""]
+        for cells in (header, *rows):
+            lines.extend(f"   {'*' if at == 0 else ' '} -{' ' if cell else ''}{cell}" for at, cell in enumerate(cells))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _label(ref_id: str) -> str:
+        return f".. _`{_escape(_RST_QUOTED, ref_id)}`:"
+
+
+def _escape(special: re.Pattern[str], text: str) -> str:
+    return special.sub(r"\\\g<0>", text)
+
+
+_RST_SPECIAL: Final[re.Pattern[str]] = re.compile(r"[\\`*_|]")
+_RST_ENUMERATOR: Final[re.Pattern[str]] = re.compile(r"\w+[.)](?:\s|$)")
+_RST_ALIAS: Final[re.Pattern[str]] = re.compile(r"[\\`:<>]")
+_RST_QUOTED: Final[re.Pattern[str]] = re.compile(r"[\\`]")
+
+
+class _MarkdownStyle(_Style):
+    def heading(self, text: str, ref_id: str | None, level: int) -> str:
+        return f"{'#' * level} {'' if ref_id is None else self._anchor(ref_id)}{self.text(text)}"
+
+    def usage(self, usage: str) -> str:
+        return f"```text\n{usage}\n```"
+
+    def text(self, text: str) -> str:
+        escaped = _escape(_MD_SPECIAL, " ".join(text.split()))
+        return _escape(_MD_LIST_MARKER, escaped)  # nor may it start a list or a heading
+
+    def code(self, text: str) -> str:
+        if not text.strip():
+            return f'"{text}"'
+        fence = "`" * (max(map(len, re.findall("`+", text)), default=0) + 1)
+        pad = " " if text[0] in "` " or text[-1] in "` " else ""  # one space each side is dropped
+        return f"{fence}{pad}{text}{pad}{fence}"
+
+    def help(self, text: str) -> str:
+        # the reStructuredText inline literals of the help become code spans, the rest reads the same
+        return _RST_LITERAL.sub(lambda match: self.code(match.group(1)), load_help_text(text)).replace("\n", "\n  ")
+
+    def link(self, text: str, ref_id: str) -> str:
+        return f"[{self.code(text)}](#{ref_id})"
+
+    def name(self, text: str) -> str:
+        return f"**{self.code(text)}**"
+
+    def option(self, ref_ids: list[str], line: str) -> str:
+        return f"- {''.join(map(self._anchor, ref_ids))}{line}"
+
+    def options(self, lines: list[str]) -> str:
+        return "\n".join(lines)  # a tight list
+
+    def table(self, header: tuple[str, ...], rows: list[tuple[str, ...]]) -> str:
+        lines = [header, tuple("---" for _ in header), *rows]
+        # a pipe splits the row even inside a code span, unless escaped
+        return "\n".join(f"| {' | '.join(_escape(_MD_PIPE, cell) for cell in cells)} |" for cells in lines)
+
+    @staticmethod
+    def _anchor(ref_id: str) -> str:
+        escaped = ref_id.replace("&", "&amp;").replace('"', "&quot;")
+        return f'<a id="{escaped}"></a>'
+
+
+_MD_SPECIAL: Final[re.Pattern[str]] = re.compile(r"[\\`*_\[\]<>#|]")
+_MD_LIST_MARKER: Final[re.Pattern[str]] = re.compile(r"^[-+=]|(?<=^\d)[.)](?=\s|$)|(?<=^\d\d)[.)](?=\s|$)")
+_MD_PIPE: Final[re.Pattern[str]] = re.compile(r"(?<!\\)\|")
+_RST_LITERAL: Final[re.Pattern[str]] = re.compile(r"``(.+?)``")
+
+#: styles of the text formats, by their name
+_STYLES: Final[dict[str, _Style]] = {"rst": _RstStyle(), "md": _MarkdownStyle()}
+#: formats a parser renders to
+FORMATS: Final[tuple[str, ...]] = (*_STYLES, "json")
+
+
+class _Renderer:
+    """Walk the model as the directive does, collecting the blocks of the page."""
+
+    def __init__(self, style: _Style, parser: CliParser, options: Mapping[str, Any]) -> None:
+        self._style = style
+        self._parser = parser
+        self._options = options
+        self._make_id = id_maker(options)
+        self._root_prog = parser.prog.split("/")[-1]
+        self._blocks: list[str] = []
+
+    def render(self) -> str:
+        parser, options = self._parser, self._options
+        home_id: str | None = None
+        if title_text := root_title(parser.prog, options):
+            home_id = self._make_id(title_text)
+            self._blocks.append(self._style.heading(title_text, home_id, 1))
+        level = 2 if title_text else 1
+        self._intro(parser, self._pre_format(options.get("description", parser.description)))
+        for group in parser.groups:
+            self._group(group, self._root_prog, level)
+        tree: CliParser = parser
+        summarized: tuple[CliSubCommand | CliSubCommandRef, ...] = ()
+        if (max_depth := options.get("max_depth")) is not None:
+            tree, summarized = parser.limit_depth(max_depth)
+        for sub_command in tree.iter_sub_commands():
+            if isinstance(sub_command, CliSubCommandRef):
+                self._sub_command_ref(sub_command, home_id, level)
+            else:
+                self._sub_command(sub_command, level)
+        if summarized:
+            self._summary(summarized, level)
+        if epilog := self._pre_format(options.get("epilog", parser.epilog)):
+            self._blocks.append(epilog)
+        return "\n\n".join(self._blocks) + "\n"
+
+    def _intro(self, parser: CliParser, description: str | None) -> None:
+        blocks = [self._style.usage(parser.usage)]
+        if description:
+            blocks.insert(0 if "usage_first" not in self._options else 1, description)
+        self._blocks.extend(blocks)
+
+    def _pre_format(self, block: str | None) -> str | None:
+        if not block:
+            return None
+        return self._style.block(block) if self._parser.raw_format and "\n" in block else self._style.text(block)
+
+    def _group(self, group: CliGroup, prefix: str, level: int) -> None:
+        title_text = group_title(group, prefix, self._root_prog, self._options)
+        self._blocks.append(self._style.heading(title_text, self._make_id(group_ref(prefix, group)), level))
+        if description := self._pre_format(group.description):
+            self._blocks.append(description)
+        if group.actions:
+            self._blocks.append(self._style.options([self._option(action, prefix) for action in group.actions]))
+
+    def _option(self, action: CliAction, prefix: str) -> str:
+        style, metavar = self._style, option_metavar(action)
+        names = option_names(action)
+        line = ", ".join(
+            style.name(name) if metavar is None else f"{style.name(name)} {style.code(metavar)}" for name in names
+        )
+        if action.help:
+            line += f" - {style.help(action.help)}"
+        if (default := option_default(action, self._options)) is not None:
+            line += f" (default: {style.code(default)})"
+        return style.option([self._make_id(f"{prefix}-{name}") for name in names], line)
+
+    def _section(self, prog: str, aliases: tuple[str, ...], level: int) -> None:
+        title_text = sub_command_title(self._root_prog, prog, aliases, self._options)
+        self._blocks.append(self._style.heading(title_text, self._make_id(sub_command_ref(prog, aliases)), level))
+
+    def _sub_command(self, sub_command: CliSubCommand, level: int) -> None:
+        parser = sub_command.parser
+        self._section(parser.prog, sub_command.aliases, level)
+        description = (parser.description or sub_command.help or "").strip()
+        self._intro(parser, self._style.text(description) if description else None)
+        for group in parser.groups:
+            self._group(group, parser.prog, level + 1)
+
+    def _sub_command_ref(self, sub_command: CliSubCommandRef, home_id: str | None, level: int) -> None:
+        # the parser is shared with (or loops back to) another sub-command, documented there only
+        self._section(sub_command.prog, sub_command.aliases, level)
+        if description := sub_command.help.strip():
+            self._blocks.append(self._style.text(description))
+        style = self._style
+        target_text = self._parser.prog if sub_command.target is None else sub_command.target[0]
+        target_id = home_id if sub_command.target is None else self._make_id(sub_command_ref(*sub_command.target))
+        if len(sub_command.target_path) > self._options.get("max_depth", len(sub_command.target_path)):
+            target_id = None  # only summarized
+        see = style.code(target_text) if target_id is None else style.link(target_text, target_id)
+        self._blocks.append(f"See {see}.")
+
+    def _summary(self, sub_commands: tuple[CliSubCommand | CliSubCommandRef, ...], level: int) -> None:
+        style, prefix = self._style, self._root_prog
+        title_text = summary_title(prefix, prefix, self._options)
+        self._blocks.append(style.heading(title_text, self._make_id(summary_ref(prefix)), level))
+        rows = [
+            (style.code(sub.prog), style.text(", ".join(sub.aliases)), style.text(summary_help(sub.help)))
+            for sub in sub_commands
+        ]
+        self._blocks.append(style.table(("Sub-command", "Aliases", "Help"), rows))
+
+
+__all__ = [
+    "FORMATS",
+    "render",
+]
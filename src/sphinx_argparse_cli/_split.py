@@ -0,0 +1,273 @@
+"""Document parts of large command line interfaces: single sub-commands, a selection of them, or a page for each."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import replace
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING, Any, Final
+
+from sphinx.util.logging import getLogger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+    from pathlib import Path
+
+    from sphinx.application import Sphinx
+    from sphinx.util.logging import SphinxLoggerAdapter
+
+    from ._model import CliParser, CliSubCommand, CliSubCommandRef
+
+_LOGGER: Final[SphinxLoggerAdapter] = getLogger(__name__)
+
+#: options describing the whole tree, so the pages of its sub-commands get them too
+INHERITED_OPTIONS: Final[tuple[str, ...]] = (
+    "parser",
+    "module",
+    "func",
+    "hook",
+    "static",
+    "prog",
+    "usage_width",
+    "usage_first",
+    "group_title_prefix",
+    "group_sub_title_prefix",
+    "no_default_values",
+    "force_refs_lower",
+    "include",
+    "exclude",
+)
+#: first line of every generated page, naming the document it was generated for
+_MARKER: Final[str] = ".. generated by sphinx_argparse_cli for {docname}, changes are overwritten"
+_GENERATED: Final[re.Pattern[str]] = re.compile(r"\.\. generated by sphinx_argparse_cli for \S+, ")
+_DIRECTIVE: Final[re.Pattern[str]] = re.compile(
+    r"^(?P<indent>[ \t]*)\.\.[ \t]+sphinx_argparse_cli::[ \t]*\n(?P<options>(?:(?P=indent)[ \t]+:.*(?:\n|$))*)",
+    re.MULTILINE,
+)
+_OPTION: Final[re.Pattern[str]] = re.compile(r":(?P<name>[^:\s]+):(?:\s+(?P<value>.*))?")
+
+
+def sub_command_path(options: Mapping[str, Any]) -> tuple[str, ...]:
+    """Names (or aliases) leading from the root parser to the sub-command the directive documents."""
+    return tuple(options.get("path", "").split())
+
+
+def find_sub_command(parser: CliParser, path: tuple[str, ...]) -> CliSubCommand | None:
+    """Find the sub-command reached from *parser* by following *path*, ``None`` when there is none such."""
+    # the model classes load along with the first model, a build reading no directive needs none of them
+    from ._model import CliSubCommand  # noqa: PLC0415
+
+    found: CliSubCommand | None = None
+    for name in path:
+        found = next(
+            (
+                sub_command
+                for sub_command in parser.sub_commands
+                if isinstance(sub_command, CliSubCommand) and name in (sub_command.name, *sub_command.aliases)
+            ),
+            None,
+        )
+        if found is None:
+            return None
+        parser = found.parser
+    return found
+
+
+def select_sub_commands(parser: CliParser, options: Mapping[str, Any]) -> CliParser:
+    """
+    Prune the tree of *parser* to the sub-commands the ``:include:`` and ``:exclude:`` patterns of a directive select.
+
+    Patterns are comma separated globs, matched against the names leading from the root parser to a sub-command (as in
+    ``:path:``). A sub-command an include pattern matches is kept together with what is below it, and with the parents
+    leading to it; one an exclude pattern matches is dropped together with what is below it.
+    """
+    include, exclude = _patterns(options, "include"), _patterns(options, "exclude")
+    if not include and not exclude:
+        return parser
+    from ._model import CliSubCommand  # noqa: PLC0415
+
+    # walk the tree depth first, numbering the sub-commands in visit order
+    visited: list[tuple[int, CliSubCommand | CliSubCommandRef]] = []
+    selected: list[bool] = []
+    pending = [(-1, (), sub_command) for sub_command in reversed(parser.sub_commands)]
+    while pending:
+        parent, parent_path, sub_command = pending.pop()
+        path = (*parent_path, sub_command.name)
+        if _matches(path, exclude):
+            continue
+        at = len(visited)
+        visited.append((parent, sub_command))
+        selected.append(not include or (parent >= 0 and selected[parent]) or _matches(path, include))
+        if isinstance(sub_command, CliSubCommand):
+            pending.extend((at, path, child) for child in reversed(sub_command.parser.sub_commands))
+    # rebuild bottom up, keeping the parents of selected sub-commands too
+    children: dict[int, list[CliSubCommand | CliSubCommandRef]] = {}
+    for at in reversed(range(len(visited))):
+        parent, sub_command = visited[at]
+        if not selected[at]:
+            continue
+        if parent >= 0:
+            selected[parent] = True
+        if isinstance(sub_command, CliSubCommand):
+            below = tuple(reversed(children.pop(at, [])))
+            sub_command = replace(sub_command, parser=replace(sub_command.parser, sub_commands=below))
+        children.setdefault(parent, []).append(sub_command)
+    return replace(parser, sub_commands=tuple(reversed(children.get(-1, []))))
+
+
+def limit_depth(
+    parser: CliParser, options: Mapping[str, Any]
+) -> tuple[CliParser, tuple[CliSubCommand | CliSubCommandRef, ...]]:
+    """
+    Cut the tree of *parser*, the one a directive renders, at its ``:max_depth:``.
+
+    :return: the tree to render in full, and the sub-commands below it to only summarize; with ``:split_depth:`` the
+        pages of the sub-commands cut their own trees, so a directive only cuts its own at a depth of 0
+    """
+    max_depth: int | None = options.get("max_depth")
+    if max_depth is None or (max_depth and "split_depth" in options):
+        return parser, ()
+    return parser.limit_depth(max_depth)
+
+
+def _matches(path: tuple[str, ...], patterns: tuple[str, ...]) -> bool:
+    name = " ".join(path)
+    return any(fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def _patterns(options: Mapping[str, Any], name: str) -> tuple[str, ...]:
+    return tuple(pattern for pattern in (part.strip() for part in options.get(name, "").split(",")) if pattern)
+
+
+def page_of(docname: str, options: Mapping[str, Any], target_path: tuple[str, ...]) -> str:
+    """
+    Name the document rendering the sub-command at *target_path* of the tree a directive in *docname* belongs to.
+
+    Generated pages live below the page of their parent, named after their sub-command, so the root page and the page
+    of any sub-command follow from the document and its ``:path:`` and ``:split_depth:``.
+    """
+    path = sub_command_path(options)
+    root = docname.rsplit("/", len(path))[0] if path else docname
+    depth = len(path) + options.get("split_depth", 0)
+    return "/".join((root, *target_path[:depth]))
+
+
+def generate_pages(app: Sphinx) -> None:
+    """
+    Write the pages of the sub-commands of directives with ``:split_depth:``, and remove those no longer needed.
+
+    Pages are only written when their content changes, so untouched ones are not read again. They are written as
+    reStructuredText whichever suffix comes first in ``source_suffix``, and not at all without ``.rst`` among them.
+    """
+    docnames, generated, pending = _scan_sources(app)
+    if ".rst" not in app.config.source_suffix:
+        for docname in dict.fromkeys(docname for docname, _ in pending):
+            _LOGGER.warning(
+                "sphinx_argparse_cli cannot write the pages of :split_depth:, .rst is not in source_suffix",
+                location=docname,
+                type="sphinx-argparse-cli",
+                subtype="split",
+            )
+        return
+    written: set[str] = set()
+    failed: list[str] = []
+    while pending:
+        docname, raw = pending.pop()
+        from ._extract import LoadParserError, obtain_parser  # noqa: PLC0415
+        from ._logic import SphinxArgparseCli  # noqa: PLC0415
+
+        try:
+            options = {name: SphinxArgparseCli.option_spec[name](value or None) for name, value in raw.items()}
+            parser = select_sub_commands(obtain_parser(app.env, options), options)
+        except (KeyError, ValueError, TypeError, LoadParserError):
+            failed.append(f"{docname}/")  # reported when the document is read, keep its pages meanwhile
+            continue
+        for page, child in _sub_pages(docname, raw, options, parser):
+            if page in written or (page in docnames and page not in generated):
+                _LOGGER.warning(
+                    "sphinx_argparse_cli page %s for sub-command %s already exists",
+                    page,
+                    child["path"],
+                    location=docname,
+                    type="sphinx-argparse-cli",
+                    subtype="split",
+                )
+                continue
+            _write_page(app.srcdir / f"{page}.rst", docname, child)
+            written.add(page)
+            if "split_depth" in child:
+                pending.append((page, child))
+
+    for docname, source in generated.items():
+        if docname not in written and not docname.startswith(tuple(failed)):
+            source.unlink()
+
+
+def _scan_sources(app: Sphinx) -> tuple[set[str], dict[str, Path], list[tuple[str, dict[str, str]]]]:
+    # the documents, which of them were generated, and the options of directives splitting their tree
+    project, config = app.project, app.config
+    docnames = project.discover([*config.exclude_patterns, *config.templates_path], config.include_patterns)
+    generated: dict[str, Path] = {}
+    splitting: list[tuple[str, dict[str, str]]] = []
+    for docname in sorted(docnames):
+        source = project.doc2path(docname, absolute=True)
+        text = source.read_text(encoding=config.source_encoding)
+        if _GENERATED.match(text):
+            generated[docname] = source
+        elif ":split_depth:" in text:
+            splitting.extend((docname, options) for options in _split_directives(text))
+    return docnames, generated, splitting
+
+
+def _sub_pages(
+    docname: str, raw: Mapping[str, str], options: Mapping[str, Any], parser: CliParser
+) -> Iterator[tuple[str, dict[str, str]]]:
+    from ._model import CliSubCommand  # noqa: PLC0415
+
+    path = sub_command_path(options)
+    if path and (found := find_sub_command(parser, path)) is None:
+        return
+    depth = options["split_depth"] - 1
+    max_depth = options.get("max_depth")
+    if max_depth == 0:
+        return  # the sub-commands are only summarized
+    for sub_command in (found.parser if path else parser).sub_commands:
+        if isinstance(sub_command, CliSubCommand):
+            child = {name: raw[name] for name in INHERITED_OPTIONS if name in raw}
+            child["path"] = " ".join((*path, sub_command.name))
+            if depth:
+                child["split_depth"] = str(depth)
+            if max_depth is not None:
+                child["max_depth"] = str(max_depth - 1)
+            yield f"{docname}/{sub_command.name}", child
+
+
+def _split_directives(text: str) -> Iterator[dict[str, str]]:
+    for directive in _DIRECTIVE.finditer(text):
+        options = {
+            match["name"]: (match["value"] or "").strip()
+            for line in directive["options"].splitlines()
+            if (match := _OPTION.match(line.strip()))
+        }
+        if "split_depth" in options:
+            yield options
+
+
+def _write_page(source: Path, docname: str, options: Mapping[str, str]) -> None:
+    lines = [_MARKER.format(docname=docname), "", ".. sphinx_argparse_cli::"]
+    lines.extend(f"  :{name}: {value}".rstrip() for name, value in options.items())
+    content = "\n".join(lines) + "\n"
+    if not source.is_file() or source.read_text(encoding="utf-8") != content:
+        source.parent.mkdir(parents=True, exist_ok=True)
+        source.write_text(content, encoding="utf-8")
+
+
+__all__ = [
+    "INHERITED_OPTIONS",
+    "find_sub_command",
+    "generate_pages",
+    "limit_depth",
+    "page_of",
+    "select_sub_commands",
+    "sub_command_path",
+]
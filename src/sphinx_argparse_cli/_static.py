@@ -0,0 +1,278 @@
+"""
+Obtain a parser by reading the source of its module instead of importing it.
+
+The factory is followed statement by statement and only its ``argparse`` calls are replayed, with arguments that are
+literals, literal constants of the module or ``argparse`` names. Plain functions of the module it calls are followed
+too. Anything else (importing, branching, calling into the application) makes the module too dynamic to read.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+from contextlib import suppress
+from importlib.machinery import PathFinder
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+#: methods replayed on the objects of each kind, calling any other is too dynamic
+_METHODS: Final[dict[type, frozenset[str]]] = {
+    argparse.ArgumentParser: frozenset({
+        "add_argument",
+        "add_argument_group",
+        "add_mutually_exclusive_group",
+        "add_subparsers",
+        "set_defaults",
+    }),
+    argparse._ArgumentGroup: frozenset({"add_argument", "add_argument_group", "add_mutually_exclusive_group"}),  # noqa: SLF001
+    argparse._SubParsersAction: frozenset({"add_parser"}),  # noqa: SLF001
+}
+#: methods a program hands its parser over with under ``:hook:``
+_PARSE_METHODS: Final[frozenset[str]] = frozenset({
+    "parse_args",
+    "parse_known_args",
+    "parse_intermixed_args",
+    "parse_known_intermixed_args",
+})
+#: arguments that do not show in the documentation, and are often values of the application (``type=Path``)
+_UNSHOWN: Final[frozenset[str]] = frozenset({"type", "version"})
+#: nesting of function calls beyond which the module is taken for recursive
+_MAX_DEPTH: Final = 32
+
+
+class TooDynamicError(Exception):
+    """Raised when the parser cannot be obtained without running the code of its module."""
+
+
+def static_parser(module_name: str, attr_name: str, *, hook: bool) -> tuple[argparse.ArgumentParser, list[str]]:
+    """
+    Obtain the parser from the *attr_name* function of *module_name* without importing anything.
+
+    Under *hook* the parser is the one the function first parses arguments with, the rest of the function is not read.
+
+    :return: the parser, and the source file of the module
+    :raises TooDynamicError: when the parser depends on code that has to run
+    """
+    path = _module_file(module_name)
+    reader = _Reader(ast.parse(Path(path).read_bytes(), filename=path), path)
+    try:
+        parser = reader.call(attr_name, [], {}, depth=0)
+    except _ParsedError as parsed:
+        if hook:
+            return parsed.parser, [path]
+        msg = f"{path}: {attr_name} parses arguments instead of returning a parser"
+        raise TooDynamicError(msg) from None
+    if hook or not isinstance(parser, argparse.ArgumentParser):
+        msg = f"{path}: {attr_name} does not {'parse arguments' if hook else 'return a parser'}"
+        raise TooDynamicError(msg)
+    return parser, [path]
+
+
+def _module_file(module_name: str) -> str:
+    # the path based finder of the import system, locating the module without running the packages it is in
+    search_path, origin = None, None
+    parts = module_name.split(".")
+    for at in range(len(parts)):
+        if (spec := PathFinder.find_spec(".".join(parts[: at + 1]), search_path)) is None:
+            msg = f"No module named {module_name!r} on the path"
+            raise TooDynamicError(msg)
+        search_path, origin = spec.submodule_search_locations, spec.origin
+    if origin is None or not origin.endswith(".py"):
+        msg = f"Module {module_name!r} has no Python source"
+        raise TooDynamicError(msg)
+    return origin
+
+
+class _ParsedError(Exception):
+    def __init__(self, parser: argparse.ArgumentParser) -> None:
+        self.parser = parser
+
+
+class _ReturnError(Exception):
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+
+class _Reader:
+    def __init__(self, tree: ast.Module, path: str) -> None:
+        self._path = path
+        self._functions: dict[str, ast.FunctionDef] = {}
+        self._constants: dict[str, Any] = {"__doc__": ast.get_docstring(tree, clean=False)}
+        bound: dict[str, int] = {}
+        for statement in tree.body:
+            for name in _bound_names(statement):
+                bound[name] = bound.get(name, 0) + 1
+            if isinstance(statement, ast.FunctionDef) and not statement.decorator_list:
+                self._functions[statement.name] = statement
+            elif isinstance(statement, ast.Import | ast.ImportFrom):
+                self._constants.update(_argparse_names(statement))
+            elif (constant := _constant(statement)) is not None:
+                with suppress(TooDynamicError):
+                    self._constants[constant[0]] = self._eval(constant[1], {}, 0)
+        # a name bound more than once may hold any of its values by the time the function runs
+        for name in (name for name, count in bound.items() if count > 1):
+            self._constants.pop(name, None)
+            self._functions.pop(name, None)
+
+    def call(self, name: str, args: list[Any], kwargs: dict[str, Any], depth: int) -> Any:
+        if (function := self._functions.get(name)) is None:
+            msg = f"{self._path}: {name} is not a plain function of the module"
+            raise TooDynamicError(msg)
+        if depth > _MAX_DEPTH:
+            raise self._dynamic(function, f"{name} nests calls too deep")
+        scope = self._bind(function, args, kwargs)
+        try:
+            for statement in function.body:
+                self._exec(statement, scope, depth)
+        except _ReturnError as returned:
+            return returned.value
+        return None
+
+    def _bind(self, function: ast.FunctionDef, args: list[Any], kwargs: dict[str, Any]) -> dict[str, Any]:
+        spec = function.args
+        if spec.vararg or spec.kwarg or spec.kwonlyargs or spec.posonlyargs or len(args) > len(spec.args):
+            raise self._dynamic(function, f"{function.name} is called with other than its plain parameters")
+        params = [arg.arg for arg in spec.args]
+        defaults = dict(zip(params[len(params) - len(spec.defaults) :], spec.defaults, strict=True))
+        scope = dict(zip(params, args, strict=False))
+        for param in params[len(args) :]:
+            if param in kwargs:
+                scope[param] = kwargs.pop(param)
+            elif param in defaults:
+                scope[param] = self._eval(defaults[param], {}, 0)
+            else:
+                raise self._dynamic(function, f"{function.name} is called without {param}")
+        if kwargs:
+            raise self._dynamic(function, f"{function.name} is called with unknown {', '.join(kwargs)}")
+        return scope
+
+    def _exec(self, statement: ast.stmt, scope: dict[str, Any], depth: int) -> None:
+        if isinstance(statement, ast.Pass):
+            return
+        if isinstance(statement, ast.Expr):
+            if not isinstance(statement.value, ast.Constant):  # a docstring
+                self._eval(statement.value, scope, depth)
+        elif isinstance(statement, ast.Return):
+            raise _ReturnError(None if statement.value is None else self._eval(statement.value, scope, depth))
+        elif isinstance(statement, ast.Assign | ast.AnnAssign) and statement.value is not None:
+            value = self._eval(statement.value, scope, depth)
+            for target in statement.targets if isinstance(statement, ast.Assign) else [statement.target]:
+                self._assign(target, value, scope, depth)
+        else:
+            raise self._dynamic(statement, f"{type(statement).__name__} statements are not followed")
+
+    def _assign(self, target: ast.expr, value: Any, scope: dict[str, Any], depth: int) -> None:
+        if isinstance(target, ast.Name):
+            scope[target.id] = value
+            return
+        if isinstance(target, ast.Attribute):
+            owner = self._eval(target.value, scope, depth)
+            if isinstance(owner, argparse._SubParsersAction):  # noqa: SLF001  # such as whether a sub-command is required
+                setattr(owner, target.attr, value)
+                return
+        raise self._dynamic(target, f"assigning {ast.unparse(target)} is not followed")
+
+    def _eval(self, node: ast.expr, scope: Mapping[str, Any], depth: int) -> Any:  # noqa: C901, PLR0911
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id in scope:
+                return scope[node.id]
+            if node.id in self._constants:
+                return self._constants[node.id]
+        elif isinstance(node, ast.Attribute):
+            if self._eval(node.value, scope, depth) is argparse and not node.attr.startswith("_"):
+                return getattr(argparse, node.attr)
+        elif isinstance(node, ast.Tuple | ast.List | ast.Set):
+            items = [self._eval(item, scope, depth) for item in node.elts]
+            return {ast.Tuple: tuple, ast.List: list, ast.Set: set}[type(node)](items)
+        elif isinstance(node, ast.Dict) and all(key is not None for key in node.keys):
+            keys = [self._eval(key, scope, depth) for key in node.keys if key is not None]
+            return dict(zip(keys, (self._eval(value, scope, depth) for value in node.values), strict=True))
+        elif isinstance(node, ast.JoinedStr):
+            return "".join(self._format(value, scope, depth) for value in node.values)
+        elif isinstance(node, ast.Call):
+            return self._call(node, scope, depth)
+        raise self._dynamic(node, f"{ast.unparse(node)} is not a literal")
+
+    def _format(self, node: ast.expr, scope: Mapping[str, Any], depth: int) -> str:
+        if isinstance(node, ast.FormattedValue):
+            if node.conversion != -1 or node.format_spec is not None:
+                raise self._dynamic(node, f"formatting {ast.unparse(node.value)} is not followed")
+            node = node.value
+        return str(self._eval(node, scope, depth))
+
+    def _call(self, node: ast.Call, scope: Mapping[str, Any], depth: int) -> Any:
+        if any(isinstance(arg, ast.Starred) for arg in node.args) or any(kw.arg is None for kw in node.keywords):
+            raise self._dynamic(node, f"unpacking arguments of {ast.unparse(node.func)} is not followed")
+        if isinstance(node.func, ast.Name) and node.func.id in self._functions and node.func.id not in scope:
+            args = [self._eval(arg, scope, depth) for arg in node.args]
+            kwargs = {str(kw.arg): self._eval(kw.value, scope, depth) for kw in node.keywords}
+            return self.call(node.func.id, args, kwargs, depth + 1)
+        try:
+            func = self._callee(node.func, scope, depth)
+        except TooDynamicError:
+            for value in (*node.args, *(kw.value for kw in node.keywords)):  # such as a program handing over its
+                self._eval(value, scope, depth)  # arguments as they are parsed: run(parser.parse_args())
+            raise
+        args = [self._eval(arg, scope, depth) for arg in node.args]
+        kwargs = {str(kw.arg): self._eval(kw.value, scope, depth) for kw in node.keywords if kw.arg not in _UNSHOWN}
+        return func(*args, **kwargs)
+
+    def _callee(self, func: ast.expr, scope: Mapping[str, Any], depth: int) -> Callable[..., Any]:
+        if isinstance(func, ast.Attribute) and (owner := self._eval(func.value, scope, depth)) is not argparse:
+            if isinstance(owner, argparse.ArgumentParser) and func.attr in _PARSE_METHODS:
+                raise _ParsedError(owner)
+            if any(isinstance(owner, kind) and func.attr in methods for kind, methods in _METHODS.items()):
+                return getattr(owner, func.attr)
+        elif self._eval(func, scope, depth) is argparse.ArgumentParser:
+            return argparse.ArgumentParser
+        raise self._dynamic(func, f"calling {ast.unparse(func)} is not followed")
+
+    def _dynamic(self, node: ast.AST, reason: str) -> TooDynamicError:
+        return TooDynamicError(f"{self._path}:{getattr(node, 'lineno', 0)}: {reason}")
+
+
+def _constant(statement: ast.stmt) -> tuple[str, ast.expr] | None:
+    # a module level assignment of a name, to a value that does not call anything (that would run at import)
+    if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+        target, value = statement.targets[0], statement.value
+    elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+        target, value = statement.target, statement.value
+    else:
+        return None
+    if not isinstance(target, ast.Name) or any(isinstance(node, ast.Call) for node in ast.walk(value)):
+        return None
+    return target.id, value
+
+
+def _argparse_names(statement: ast.Import | ast.ImportFrom) -> dict[str, Any]:
+    if isinstance(statement, ast.Import):
+        return {alias.asname or alias.name: argparse for alias in statement.names if alias.name == "argparse"}
+    if statement.module != "argparse" or statement.level:
+        return {}
+    return {alias.asname or alias.name: getattr(argparse, alias.name, None) for alias in statement.names}
+
+
+def _bound_names(statement: ast.stmt) -> list[str]:
+    if isinstance(statement, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef):
+        return [statement.name]
+    # other statements may bind names anywhere within, such as under a branch
+    names = []
+    for node in ast.walk(statement):
+        if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef):
+            names.append(node.name)
+        elif isinstance(node, ast.Import | ast.ImportFrom):
+            names.extend((alias.asname or alias.name).partition(".")[0] for alias in node.names)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.append(node.id)
+    return names
+
+
+__all__ = [
+    "TooDynamicError",
+    "static_parser",
+]
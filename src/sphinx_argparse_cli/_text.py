@@ -0,0 +1,179 @@
+"""
+The texts documenting a parser is made of: titles, reference ids and option lines, derived from its model.
+
+The directive and the command line renderer (``python -m sphinx_argparse_cli``) both build on these, so their output
+names and links things the same way. Options are those of the directive, such as ``group_title_prefix``.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+    from ._model import CliAction, CliGroup
+
+
+#: usage width when the directive does not set one
+DEFAULT_USAGE_WIDTH: Final[int] = 100
+
+
+def make_id(key: str) -> str:
+    return "-".join(key.split()).rstrip("-")
+
+
+def make_id_lower(key: str) -> str:
+    return re.sub("[A-Z]", lambda m: f"_{m.group(0).lower()}", make_id(key))
+
+
+def id_maker(options: Mapping[str, Any]) -> Callable[[str], str]:
+    """Pick the function turning reference names into ids, per the ``force_refs_lower`` of *options*."""
+    return make_id_lower if "force_refs_lower" in options else make_id
+
+
+_HELP_SUBSTITUTIONS: Final[list[tuple[re.Pattern[str], str]]] = [
+    (re.compile(r"[']+(.+?)[']+"), "``'\\1'``"),
+    (re.compile(r'["]+(.+?)["]+'), '``"\\1"``'),
+    (re.compile(r"[{](.+?)[}]"), "``{\\1}``"),
+]
+
+
+def load_help_text(help_text: str) -> str:
+    for pattern, replacement in _HELP_SUBSTITUTIONS:
+        help_text = pattern.sub(replacement, help_text)
+    return help_text
+
+
+def root_title(prog: str, options: Mapping[str, Any]) -> str:
+    """Title of the root parser, empty when the directive asks for none."""
+    return options.get("title", f"{prog} - CLI interface").strip()
+
+
+def group_ref(prefix: str, group: CliGroup) -> str:
+    """Name the reference to an argument *group* of the parser named *prefix*."""
+    return f"{prefix}{' ' if prefix else ''}{group.title}"
+
+
+def group_title(group: CliGroup, prefix: str, prog: str, options: Mapping[str, Any]) -> str:
+    """Title of an argument *group* of the parser named *prefix*, *prog* naming the root parser."""
+    return _prefixed(prefix, prog, options) + (group.title or "")
+
+
+def summary_ref(prefix: str) -> str:
+    """Name the reference to the table summarizing the sub-commands below ``:max_depth:`` of the parser *prefix*."""
+    return f"{prefix} {_SUMMARY_TITLE}"
+
+
+def summary_title(prefix: str, prog: str, options: Mapping[str, Any]) -> str:
+    """Title of that table, named as the argument groups of the parser *prefix* are."""
+    return _prefixed(prefix, prog, options) + _SUMMARY_TITLE
+
+
+#: title of the sub-command summary, after the prefix of the parser
+_SUMMARY_TITLE: Final[str] = "sub-command summary"
+
+
+def summary_help(help_text: str) -> str:
+    """Shorten the help of a sub-command to the single line of its summary: the first paragraph."""
+    return " ".join(help_text.strip().split("\n\n", maxsplit=1)[0].split())
+
+
+def _prefixed(prefix: str, prog: str, options: Mapping[str, Any]) -> str:
+    sub_cmd = prefix[len(prog) :].strip() or None if prefix != prog else None
+    return _resolve_prefix(prog, sub_cmd, prefix, options)
+
+
+def sub_command_ref(prog: str, aliases: tuple[str, ...]) -> str:
+    """Name the reference to the sub-command *prog*, known by *aliases* too."""
+    return f"{prog} ({', '.join(aliases)})" if aliases else prog
+
+
+def sub_command_title(root_prog: str, prog: str, aliases: tuple[str, ...], options: Mapping[str, Any]) -> str:
+    """Title of the sub-command *prog* of the root parser *root_prog*."""
+    sub_cmd = prog[len(root_prog) :].strip().split(" ", maxsplit=1)[0]
+    title_text = _resolve_prefix(root_prog, sub_cmd, prog, options).rstrip()
+    if aliases:
+        title_text += sub_command_ref(prog, aliases)[len(prog) :]
+    return title_text.strip()
+
+
+def _resolve_prefix(prog_name: str, sub_cmd: str | None, full_text: str, options: Mapping[str, Any]) -> str:
+    title_prefix: str | None = options.get("group_title_prefix")
+    sub_title_prefix: str | None = options.get("group_sub_title_prefix")
+    title_text = ""
+    if title_prefix is not None:
+        title_prefix = title_prefix.replace("{prog}", prog_name)
+        if title_prefix:
+            title_text += f"{title_prefix} "
+        if sub_cmd is not None:
+            if sub_title_prefix is not None:
+                title_text = _apply_sub_title(title_text, sub_title_prefix, prog_name, sub_cmd)
+            else:
+                title_text += f"{sub_cmd} "
+    elif sub_cmd is not None:
+        if sub_title_prefix is not None:
+            title_text += f"{prog_name} "
+            title_text = _apply_sub_title(title_text, sub_title_prefix, prog_name, sub_cmd)
+        else:
+            title_text += f"{full_text} "
+    else:
+        title_text += f"{full_text} "
+    return title_text
+
+
+def _apply_sub_title(title_text: str, sub_title_prefix: str, prog: str, sub_cmd: str) -> str:
+    if sub_title_prefix:
+        sub_title_prefix = sub_title_prefix.replace("{prog}", prog).replace("{subcommand}", sub_cmd)
+        title_text += f"{sub_title_prefix} "
+    return title_text
+
+
+def option_names(action: CliAction) -> tuple[str, ...]:
+    """Names an action is documented under: its option strings, or the name of a positional argument."""
+    if action.option_strings:
+        return action.option_strings
+    if action.metavar:
+        return (action.metavar if isinstance(action.metavar, str) else action.metavar[0],)
+    return (action.dest,)
+
+
+def option_metavar(action: CliAction) -> str | None:
+    """Show the value an option takes after each of its names, ``None`` for positionals and flags."""
+    if not action.option_strings or action.nargs == 0:
+        return None
+    if isinstance(action.metavar, tuple):
+        return " ".join(meta.upper() for meta in action.metavar)
+    return (action.metavar or action.dest).upper()
+
+
+def option_default(action: CliAction, options: Mapping[str, Any]) -> str | None:
+    """Show the default an option line ends with, ``None`` if there is none or the help mentions it already."""
+    if "no_default_values" in options or action.default is None or _MENTIONS_DEFAULT.match(action.help or ""):
+        return None
+    return action.default.replace(str(Path.cwd()), "{cwd}")
+
+
+_MENTIONS_DEFAULT: Final[re.Pattern[str]] = re.compile(r".*[ (]default[s]? .*")
+
+
+__all__ = [
+    "DEFAULT_USAGE_WIDTH",
+    "group_ref",
+    "group_title",
+    "id_maker",
+    "load_help_text",
+    "make_id",
+    "make_id_lower",
+    "option_default",
+    "option_metavar",
+    "option_names",
+    "root_title",
+    "sub_command_ref",
+    "sub_command_title",
+    "summary_help",
+    "summary_ref",
+    "summary_title",
+]
@@ -0,0 +1,168 @@
+"""Opt-in measurement of where the time of each directive goes."""
+
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import perf_counter, thread_time
+from typing import TYPE_CHECKING, Final
+
+from ._env import TIMINGS, env_records
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from sphinx.application import Sphinx
+    from sphinx.environment import BuildEnvironment
+    from sphinx.util.logging import SphinxLoggerAdapter
+
+ENV_ATTR: Final[str] = TIMINGS
+#: file name of the report, written into the doctree directory
+REPORT_NAME: Final[str] = "sphinx_argparse_cli_timing.json"
+#: number of directives listed in the build log
+SUMMARY_SIZE: Final[int] = 5
+
+
+@dataclass(slots=True)
+class PhaseTiming:
+    wall: float = 0.0
+    cpu: float = 0.0
+
+
+@dataclass(slots=True)
+class DirectiveTiming:
+    """
+    Time spent by a single directive, per phase.
+
+    The ``total`` phase covers the whole directive, the others are the parts of it that were measured: ``lookup``
+    (memo and cache), ``import`` (of the module), ``call`` (of the function, or the hooked program), ``model``
+    (capturing the parser, including the usage), ``worker`` (waiting for a worker process), ``help`` (parsing help
+    texts) and ``refs`` (registering labels).
+    """
+
+    docname: str
+    lineno: int
+    prog: str | None = None
+    phases: dict[str, PhaseTiming] = field(default_factory=dict)
+
+
+_CURRENT: ContextVar[DirectiveTiming | None] = ContextVar("sphinx_argparse_cli_timing", default=None)
+
+
+@contextmanager
+def time_directive(env: BuildEnvironment, lineno: int) -> Iterator[DirectiveTiming | None]:
+    """Measure the phases of the directive at *lineno* of the current document, when timing is enabled."""
+    config = env.config
+    if not config.sphinx_argparse_cli_timing and not config.sphinx_argparse_cli_timing_budget:
+        yield None
+        return
+    timing = DirectiveTiming(env.docname, lineno)
+    token = _CURRENT.set(timing)
+    try:
+        with phase("total"):
+            yield timing
+    finally:
+        _CURRENT.reset(token)
+        _records(env).setdefault(env.docname, []).append(timing)
+        spent = timing.phases["total"].wall
+        if (budget := config.sphinx_argparse_cli_timing_budget) and spent > budget:
+            _logger().warning(
+                "sphinx_argparse_cli directive for %s took %.3fs, over the budget of %ss",
+                timing.prog or "<unknown>",
+                spent,
+                budget,
+                location=(env.docname, lineno),
+                type="sphinx-argparse-cli",
+                subtype="timing",
+            )
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to phase *name* of the directive being measured, if any."""
+    if (timing := _CURRENT.get()) is None:
+        yield
+        return
+    wall, cpu = perf_counter(), thread_time()
+    try:
+        yield
+    finally:
+        spent = timing.phases.setdefault(name, PhaseTiming())
+        spent.wall += perf_counter() - wall
+        spent.cpu += thread_time() - cpu
+
+
+def reset_timings(app: Sphinx, env: BuildEnvironment, docnames: list[str]) -> None:  # noqa: ARG001
+    """Forget the timings of earlier builds, the report covers the documents read by this one."""
+    setattr(env, ENV_ATTR, {})
+
+
+def merge_timings(app: Sphinx, env: BuildEnvironment, docnames: set[str], other: BuildEnvironment) -> None:  # noqa: ARG001
+    records, other_records = _records(env), _records(other)
+    for docname in docnames:
+        if docname in other_records:
+            records[docname] = other_records[docname]
+
+
+def write_report(app: Sphinx, exception: Exception | None) -> None:
+    """Write the timings as JSON next to the doctrees and log the slowest directives."""
+    if exception or not app.config.sphinx_argparse_cli_timing:
+        return
+    timings = sorted(
+        (timing for directives in _records(app.env).values() for timing in directives),
+        key=lambda timing: timing.phases["total"].wall,
+        reverse=True,
+    )
+    phases: dict[str, PhaseTiming] = {}
+    for timing in timings:
+        for name, spent in timing.phases.items():
+            total = phases.setdefault(name, PhaseTiming())
+            total.wall += spent.wall
+            total.cpu += spent.cpu
+    report = Path(app.doctreedir) / REPORT_NAME
+    report.write_text(
+        json.dumps(
+            {
+                "phases": {name: asdict(spent) for name, spent in phases.items()},
+                "directives": list(map(asdict, timings)),
+            },
+            indent=2,
+        )
+    )
+    logger = _logger()
+    logger.info("sphinx_argparse_cli timing of %d directive(s) written to %s", len(timings), report)
+    for timing in timings[:SUMMARY_SIZE]:
+        parts = ", ".join(f"{name} {spent.wall:.3f}s" for name, spent in timing.phases.items() if name != "total")
+        logger.info(
+            "  %.3fs %s:%d %s (%s)",
+            timing.phases["total"].wall,
+            timing.docname,
+            timing.lineno,
+            timing.prog or "<unknown>",
+            parts,
+        )
+
+
+def _logger() -> SphinxLoggerAdapter:
+    # phases are measured outside of Sphinx too (python -m sphinx_argparse_cli), only reporting needs it
+    from sphinx.util.logging import getLogger  # noqa: PLC0415
+
+    return getLogger(__name__)
+
+
+def _records(env: BuildEnvironment) -> dict[str, list[DirectiveTiming]]:
+    return env_records(env, ENV_ATTR)
+
+
+__all__ = [
+    "DirectiveTiming",
+    "PhaseTiming",
+    "merge_timings",
+    "phase",
+    "reset_timings",
+    "time_directive",
+    "write_report",
+]
@@ -0,0 +1,176 @@
+"""Usage lines of a parser, as argparse prints them without colors, built straight from its actions."""
+
+from __future__ import annotations
+
+import re
+import sys
+from argparse import ONE_OR_MORE, OPTIONAL, PARSER, REMAINDER, SUPPRESS, ZERO_OR_MORE
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from argparse import Action, ArgumentParser, _MutuallyExclusiveGroup
+
+_PREFIX: Final[str] = "usage: "
+#: before 3.13 argparse split the usage text back into wrappable parts with this expression
+_LEGACY_PART: Final[re.Pattern[str]] = re.compile(r"\(.*?\)+(?=\s|$)|\[.*?\]+(?=\s|$)|\S+")
+_LONG_BREAK: Final[re.Pattern[str]] = re.compile(r"\n\n\n+")
+
+
+class UsageRenderer:
+    """
+    Render the usage of parsers wrapped at *width*, the way :meth:`argparse.ArgumentParser.format_usage` does.
+
+    Unlike going through :class:`argparse.HelpFormatter`, this touches neither the parser nor the environment.
+    """
+
+    def __init__(self, width: int) -> None:
+        self._width = width
+
+    def render(self, parser: ArgumentParser, prog: str) -> str:
+        """Usage of *parser* under the name *prog*, continuation lines indented to align after the program name."""
+        if parser.usage is SUPPRESS:
+            return ""
+        if parser.usage is not None:
+            usage = parser.usage % {"prog": prog}
+            lines = _LONG_BREAK.sub("\n\n", f"{_PREFIX}{usage}\n\n").strip("\n")[len(_PREFIX) :].splitlines()
+        elif not parser._actions:  # noqa: SLF001
+            lines = [prog]
+        else:
+            lines = self._lines(prog, parser._actions, parser._mutually_exclusive_groups)  # noqa: SLF001
+        indent = " " * (len(prog) + 1)
+        return "\n".join(line if at == 0 else f"{indent}{line.lstrip()}" for at, line in enumerate(lines))
+
+    def _lines(self, prog: str, actions: list[Action], groups: list[_MutuallyExclusiveGroup]) -> list[str]:
+        optionals = [action for action in actions if action.option_strings]
+        positionals = [action for action in actions if not action.option_strings]
+        usage = " ".join(part for part in (prog, " ".join(self._parts(optionals + positionals, groups))) if part)
+        if len(_PREFIX) + len(usage) <= self._width:
+            return [usage]
+
+        opt_parts, pos_parts = self._parts(optionals, groups), self._parts(positionals, groups)
+        if sys.version_info < (3, 13):  # pragma: <3.13 cover
+            # mutually exclusive groups stay on one line, but the option and its value of a required option may not
+            opt_parts = _LEGACY_PART.findall(" ".join(opt_parts))
+            pos_parts = _LEGACY_PART.findall(" ".join(pos_parts))
+        if len(_PREFIX) + len(prog) <= 0.75 * self._width:  # a short program name is followed by its arguments
+            indent = len(_PREFIX) + len(prog) + 1
+            if opt_parts:
+                return [*self._wrap([prog, *opt_parts], indent, first=len(_PREFIX)), *self._wrap(pos_parts, indent)]
+            return self._wrap([prog, *pos_parts], indent, first=len(_PREFIX))
+        # a long program name is on a line of its own
+        indent = len(_PREFIX)
+        lines = self._wrap(opt_parts + pos_parts, indent)
+        if len(lines) > 1:
+            lines = [*self._wrap(opt_parts, indent), *self._wrap(pos_parts, indent)]
+        return [prog, *lines]
+
+    def _wrap(self, parts: list[str], indent: int, first: int | None = None) -> list[str]:
+        lines: list[str] = []
+        line: list[str] = []
+        length = (indent if first is None else first) - 1
+        for part in parts:
+            if length + 1 + len(part) > self._width and line:
+                lines.append(" ".join(line))
+                line, length = [], indent - 1
+            line.append(part)
+            length += len(part) + 1
+        if line:
+            lines.append(" ".join(line))
+        return lines
+
+    def _parts(self, actions: list[Action], groups: list[_MutuallyExclusiveGroup]) -> list[str]:
+        at = {id(action): index for index, action in enumerate(actions)}
+        grouped: set[int] = set()
+        inserts: dict[tuple[int, int], _MutuallyExclusiveGroup] = {}
+        for group in groups:
+            members = group._group_actions  # noqa: SLF001
+            if not members:
+                msg = f"empty group {group}"
+                raise ValueError(msg)
+            if all(action.help is SUPPRESS for action in members) or (start := at.get(id(members[0]))) is None:
+                continue
+            end = start + len(members)
+            if actions[start:end] == members:
+                grouped.update(map(id, members))
+                inserts[start, end] = group
+
+        parts: list[str | None] = [
+            None if action.help is SUPPRESS else self._part(action, grouped) for action in actions
+        ]
+        separated: set[int] = set()
+        for start, end in sorted(inserts, reverse=True):
+            group = inserts[start, end]
+            group_parts = [part for part in parts[start:end] if part is not None]
+            size = len(group_parts)
+            if group.required:
+                opening, closing = ("(", ")") if size > 1 else ("", "")
+            else:
+                opening, closing = "[", "]"
+            group_parts[0] = f"{opening}{group_parts[0]}"
+            group_parts[-1] = f"{group_parts[-1]}{closing}"
+            for index, part in enumerate(group_parts[:-1], start=start):
+                # unless a nested group already did
+                parts[index] = parts[index] if index in separated else f"{part} |"
+                separated.add(index)
+            parts[start + size - 1] = group_parts[-1]
+            for index in range(start + size, end):
+                parts[index] = None
+        return [part for part in parts if part is not None]
+
+    @staticmethod
+    def _part(action: Action, grouped: set[int]) -> str:
+        text = _action_text(action)
+        if not action.option_strings:
+            if id(action) in grouped and text[:1] == "[" and text[-1:] == "]":
+                return text[1:-1]
+            return text
+        return text if action.required or id(action) in grouped else f"[{text}]"
+
+
+def _action_text(action: Action) -> str:
+    if not action.option_strings:
+        return _format_args(action, action.dest)
+    if action.nargs == 0:
+        return action.format_usage()
+    return f"{action.option_strings[0]} {_format_args(action, action.dest.upper())}"
+
+
+def _format_args(action: Action, default_metavar: str) -> str:
+    metavar: str | tuple[str, ...]
+    if action.metavar is not None:
+        metavar = action.metavar
+    elif action.choices is not None:
+        metavar = f"{{{','.join(map(str, action.choices))}}}"
+    else:
+        metavar = default_metavar
+    nargs = action.nargs
+    if nargs == ZERO_OR_MORE:
+        if isinstance(metavar, tuple) and len(metavar) == 2:  # noqa: PLR2004
+            return "[%s [%s ...]]" % metavar  # noqa: UP031
+        text, size = "[%s ...]", 1
+    elif nargs in _NARGS_FORMATS:
+        text, size = _NARGS_FORMATS[nargs]
+    elif isinstance(nargs, int):
+        text, size = " ".join(["%s"] * nargs), nargs
+    else:
+        msg = "invalid nargs value"
+        raise ValueError(msg)
+    if not size:
+        return text
+    return text % (metavar if isinstance(metavar, tuple) else (metavar,) * size)
+
+
+#: usage of the arguments, and how many metavars that takes, by number of arguments
+_NARGS_FORMATS: Final[dict[str | None, tuple[str, int]]] = {
+    None: ("%s", 1),
+    OPTIONAL: ("[%s]", 1),
+    ONE_OR_MORE: ("%s [%s ...]", 2),
+    REMAINDER: ("...", 0),
+    PARSER: ("%s ...", 1),
+    SUPPRESS: ("", 0),
+}
+
+
+__all__ = [
+    "UsageRenderer",
+]
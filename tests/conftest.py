@@ -9,6 +9,9 @@ from sphinx import __display_version__ as sphinx_version
 
 if TYPE_CHECKING:
     from _pytest.config import Config
+    from _pytest.config.argparsing import Parser
+    from _pytest.nodes import Item
+    from _pytest.terminal import TerminalReporter
 
 pytest_plugins = "sphinx.testing.fixtures"
 collect_ignore = ["roots"]
@@ -25,5 +28,39 @@ def root_dir() -> Path:
     return Path(__file__).parents[1].absolute() / "roots"
 
 
+def pytest_addoption(parser: Parser) -> None:
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark", action="store_true", help="run the benchmarks and compare them to the baseline")
+    group.addoption("--benchmark-update", action="store_true", help="run the benchmarks and store them as baseline")
+
+
 def pytest_configure(config: Config) -> None:
     config.addinivalue_line("markers", "prepare")
+    config.addinivalue_line("markers", "benchmark: measurement of a large command line interface, opt-in")
+
+
+def pytest_collection_modifyitems(config: Config, items: list[Item]) -> None:
+    if config.getoption("--benchmark") or config.getoption("--benchmark-update"):  # pragma: no cover
+        return
+    skip = pytest.mark.skip(reason="benchmark, enable with --benchmark")
+    for item in items:
+        if item.get_closest_marker("benchmark"):
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter: TerminalReporter) -> None:  # pragma: no cover  # after coverage stops
+    measurements = [
+        (report.nodeid.rpartition("[")[2].rstrip("]"), value)
+        for report in terminalreporter.stats.get("passed", [])
+        for name, value in report.user_properties
+        if name == "benchmark"
+    ]
+    if not measurements:
+        return
+    terminalreporter.section("benchmark")
+    metrics = list(measurements[0][1])
+    terminalreporter.write_line(" ".join(f"{name:>16}" for name in ["scenario", *metrics]))
+    for scenario, measured in measurements:
+        terminalreporter.write_line(
+            " ".join(f"{value:>16.4g}" for value in measured.values()).join([f"{scenario:>16} ", ""])
+        )
@@ -0,0 +1,104 @@
+"""Generate made up command line interfaces of any size, and Sphinx projects documenting them."""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from itertools import cycle, islice
+from pathlib import Path
+from textwrap import dedent
+
+_WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "a", "lazy", "dog", "while", "--verbose", "is", "printed")
+
+
+@dataclass(frozen=True)
+class Shape:
+    """The size of a synthetic command line interface."""
+
+    #: sub-commands of every parser above the deepest level
+    breadth: int = 4
+    #: levels of sub-commands below the root parser
+    depth: int = 1
+    #: argument groups of every parser
+    groups: int = 1
+    #: options of every argument group
+    options: int = 4
+    #: choices of every other option, none when zero
+    choices: int = 0
+    #: words of every help text and description
+    help_words: int = 8
+    #: end every help text and description with inline markup
+    markup: bool = False
+
+
+def build_parser(prog: str, shape: Shape) -> ArgumentParser:
+    """Create a parser of *shape*, with a ``--verbose`` flag and a ``source`` positional at the root."""
+    parser = ArgumentParser(prog=prog, description=_text(shape, prog))
+    parser.add_argument("--verbose", action="store_true", help=_text(shape, "verbose"))
+    parser.add_argument("source", help=_text(shape, "source"))
+    _populate(parser, shape, shape.depth)
+    return parser
+
+
+def _populate(parser: ArgumentParser, shape: Shape, depth: int) -> None:
+    for group_at in range(shape.groups):
+        group = parser.add_argument_group(f"group {group_at}", _text(shape, f"group {group_at}"))
+        for option in range(shape.options):
+            name = f"--option-{group_at}-{option}"
+            if shape.choices and option % 2 == 0:
+                choices = [f"choice-{choice}" for choice in range(shape.choices)]
+                group.add_argument(name, choices=choices, default=choices[0], help=_text(shape, name))
+            else:
+                group.add_argument(name, default=option, metavar="VALUE", help=_text(shape, name))
+    if depth:
+        sub_parsers = parser.add_subparsers(title="commands")
+        for command in range(shape.breadth):
+            name = f"command-{command}"
+            sub = sub_parsers.add_parser(name, aliases=[f"c{command}"], help=_text(shape, name))
+            _populate(sub, shape, depth - 1)
+
+
+def _text(shape: Shape, subject: str) -> str:
+    text = " ".join([subject, *islice(cycle(_WORDS), shape.help_words)])
+    return f"{text}, like ``{subject}`` is *marked up*" if shape.markup else text
+
+
+def write_project(path: Path, *, documents: int, shape: Shape) -> None:
+    """
+    Write a project with *documents* pages, each rendering its own program of *shape*.
+
+    An extra page references the ``--verbose`` option of all programs.
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "conf.py").write_text(
+        dedent("""\
+        from __future__ import annotations
+
+        import sys
+        from pathlib import Path
+
+        sys.path.insert(0, str(Path(__file__).parent))
+        extensions = ["sphinx_argparse_cli"]
+        nitpicky = True
+        """)
+    )
+    programs = [f"tool-{at}" for at in range(documents)]
+    module = dedent(f"""\
+        from __future__ import annotations
+
+        import sys
+
+        sys.path.insert(0, {str(Path(__file__).parent)!r})
+
+        from synthetic import Shape, build_parser
+        """)
+    for prog in programs:
+        factory = f"make_{prog.replace('-', '_')}"
+        module += f"\n\ndef {factory}():\n    return build_parser({prog!r}, {shape!r})\n"
+        (path / f"{prog}.rst").write_text(
+            f".. sphinx_argparse_cli::\n  :module: synthetic_cli\n  :func: {factory}\n  :title: {prog}\n"
+        )
+    (path / "synthetic_cli.py").write_text(module)
+    refs = "\n".join(f"- :ref:`{prog}---verbose`" for prog in programs)
+    toctree = "\n".join(f"  {prog}" for prog in programs)
+    (path / "index.rst").write_text(f"Synthetic\n=========\n\n{refs}\n\n.. toctree::\n\n{toctree}\n")
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from synthetic import Shape, write_project
+
+from sphinx_argparse_cli._extract import DEFAULT_USAGE_WIDTH, load_parser
+from sphinx_argparse_cli._logic import SphinxArgparseCli
+from sphinx_argparse_cli._model import build_model
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from docutils.nodes import Node
+    from sphinx.testing.util import SphinxTestApp
+
+SCENARIOS: dict[str, Shape] = {
+    "smoke": Shape(breadth=2, choices=3, markup=True),
+    "wide": Shape(breadth=100),
+    "deep": Shape(breadth=2, depth=6),
+    "choices": Shape(breadth=10, options=10, choices=50),
+    "long-help": Shape(breadth=10, help_words=300),
+    "markup": Shape(breadth=20, depth=2, options=6, markup=True),
+    "production": Shape(breadth=20, depth=2, options=6),  # 420 sub-commands
+    "options": Shape(depth=0, options=5000),  # a single parser, every help text mentioning an option
+}
+BASELINE = Path(__file__).parent / "benchmark_baseline.json"
+#: modules of the extension a build without the directive loads, the rest waits for the first directive
+SETUP_MODULES = {
+    "sphinx_argparse_cli",
+    *(
+        f"sphinx_argparse_cli.{name}"
+        for name in ("version", "_domain", "_env", "_timing", "_text", "_nodes", "_logic", "_split")
+    ),
+}
+#: share of the time importing Sphinx the extension may add, generous as both vary with the machine alike
+IMPORT_SHARE = 0.15
+#: builds a project, then lists the modules of the extension loaded, including those imported by ``import_module``
+BUILD_SCRIPT = """
+import sys
+from sphinx.cmd.build import main
+main(sys.argv[1:])
+print(*sorted(name for name in sys.modules if name.partition(".")[0] == "sphinx_argparse_cli"))
+"""
+#: how much a metric may grow over its baseline before it is reported as a regression, by unit
+TOLERANCE = {"seconds": 1.5, "memory": 1.25, "bytes": 1.1}
+
+
+@pytest.mark.parametrize(
+    "scenario", [pytest.param(name, marks=() if name == "smoke" else pytest.mark.benchmark) for name in SCENARIOS]
+)
+def test_benchmark(
+    scenario: str,
+    request: pytest.FixtureRequest,
+    record_property: Callable[[str, object], None],
+    tmp_path: Path,
+    make_app: Callable[..., SphinxTestApp],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    measured = _measure(SCENARIOS[scenario], tmp_path, make_app, monkeypatch)
+    record_property("benchmark", measured)
+    baseline: dict[str, dict[str, float]] = json.loads(BASELINE.read_text())
+    if request.config.getoption("--benchmark-update"):  # pragma: no cover  # run by hand to accept the new numbers
+        baseline[scenario] = {metric: round(value, 6) for metric, value in measured.items()}
+        BASELINE.write_text(f"{json.dumps(baseline, indent=2, sort_keys=True)}\n")
+        return
+    # timings and memory use are only comparable on the machine (and without the tracing) that recorded the baseline
+    units = ("seconds", "memory", "bytes") if request.config.getoption("--benchmark") else ("bytes",)
+    regressions = [
+        f"{metric}: {value:.4g} over baseline {baseline[scenario][metric]:.4g}"
+        for metric, value in measured.items()
+        if (unit := metric.rpartition("_")[2]) in units and value > baseline[scenario][metric] * TOLERANCE[unit]
+    ]
+    assert not regressions
+
+
+def _measure(
+    shape: Shape, tmp_path: Path, make_app: Callable[..., SphinxTestApp], monkeypatch: pytest.MonkeyPatch
+) -> dict[str, float]:
+    src = tmp_path / "src"
+    write_project(src, documents=1, shape=shape)
+    monkeypatch.syspath_prepend(str(src))
+    measured: dict[str, float] = {}
+
+    start = perf_counter()
+    parser, _ = load_parser("synthetic_cli", "make_tool_0", hook=False)
+    measured["extract_seconds"] = perf_counter() - start
+    start = perf_counter()
+    build_model(parser, DEFAULT_USAGE_WIDTH)
+    measured["model_seconds"] = perf_counter() - start
+    tracemalloc.start()
+    try:
+        model = build_model(parser, DEFAULT_USAGE_WIDTH)
+        measured["model_peak_memory"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del model
+
+    app = make_app(buildername="html", srcdir=src)
+    _accumulate(monkeypatch, SphinxArgparseCli, "run", measured, "run_seconds")  # includes obtaining the parser
+    _accumulate(monkeypatch, app.builder, "write_doc", measured, "write_seconds")
+    start = perf_counter()
+    app.build()
+    measured["build_seconds"] = perf_counter() - start
+    measured["doctree_bytes"] = (Path(app.doctreedir) / "tool-0.doctree").stat().st_size
+    measured["html_bytes"] = (Path(app.outdir) / "tool-0.html").stat().st_size
+    return measured
+
+
+def _accumulate(
+    monkeypatch: pytest.MonkeyPatch, owner: object, name: str, measured: dict[str, float], key: str
+) -> None:
+    method = getattr(owner, name)
+    measured[key] = 0.0
+
+    def timed(*args: Any, **kwargs: Any) -> list[Node] | None:
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            measured[key] += perf_counter() - start
+
+    monkeypatch.setattr(owner, name, timed)
+
+
+def test_import_time(request: pytest.FixtureRequest, tmp_path: Path) -> None:
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "conf.py").write_text('extensions = ["sphinx_argparse_cli"]\n')
+    (src / "index.rst").write_text("Empty\n=====\n")
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    cmd = [sys.executable, "-X", "importtime", "-X", f"pycache_prefix={tmp_path / 'pycache'}", "-c", BUILD_SCRIPT]
+    cmd.extend(["-b", "dummy", "-q", str(src), str(tmp_path / "out")])
+    for _ in range(2):  # the first run compiles the modules, only the second one measures importing them
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True, env=env)
+    assert set(result.stdout.split()) == SETUP_MODULES
+
+    # -X importtime leaves out what import_module loads, as the event handlers do for the modules doing their work
+    seconds, sphinx_seconds, depth = 0.0, 0.0, None
+    for line in reversed(result.stderr.splitlines()):  # a module is listed after the modules it imports
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        _, cumulative, name = line.split("|")
+        indent = len(name) - len(name.lstrip())
+        if depth is not None and indent <= depth:
+            depth = None
+        if (module := name.strip()) == "sphinx.cmd.build":
+            sphinx_seconds = int(cumulative) / 1_000_000
+        elif module.partition(".")[0] == "sphinx_argparse_cli" and depth is None:
+            seconds += int(cumulative) / 1_000_000  # the time of the modules it imports is included already
+            depth = indent
+    assert seconds <= sphinx_seconds * IMPORT_SHARE
+
+    measured = {"import_seconds": seconds}
+    baseline: dict[str, dict[str, float]] = json.loads(BASELINE.read_text())
+    if request.config.getoption("--benchmark-update"):  # pragma: no cover  # run by hand to accept the new numbers
+        baseline["import"] = {metric: round(value, 6) for metric, value in measured.items()}
+        BASELINE.write_text(f"{json.dumps(baseline, indent=2, sort_keys=True)}\n")
+        return
+    if request.config.getoption("--benchmark"):  # pragma: no cover  # timings only compare on the recording machine
+        assert seconds <= baseline["import"]["import_seconds"] * TOLERANCE["seconds"]
@@ -1,18 +1,64 @@
 from __future__ import annotations
 
+import argparse
+import dataclasses
+import importlib.util
+import json
+import operator
 import os
+import pickle
+import re
+import subprocess
 import sys
+import threading
+import time
+from argparse import SUPPRESS, ArgumentParser, BooleanOptionalAction, HelpFormatter, _SubParsersAction
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import TYPE_CHECKING
+from threading import Barrier
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, cast
 
 import pytest
-
-from sphinx_argparse_cli._logic import load_help_text, make_id, make_id_lower
+from docutils.core import publish_doctree
+from docutils.nodes import Text, bullet_list, paragraph, section, system_message
+from docutils.nodes import row as docutils_row
+from docutils.parsers.rst.states import RSTState
+from docutils.utils import new_document
+from sphinx.util.inventory import InventoryFile
+from synthetic import Shape, write_project
+
+from sphinx_argparse_cli import _extract, _fragments, _load
+from sphinx_argparse_cli.__main__ import main
+from sphinx_argparse_cli._cache import DiskCache
+from sphinx_argparse_cli._domain import CliIndex
+from sphinx_argparse_cli._extract import (
+    ExtractRequest,
+    LoadParserError,
+    LruMemo,
+    extract_parser,
+    load_parser,
+    project_files,
+)
+from sphinx_argparse_cli._incremental import parser_fingerprint
+from sphinx_argparse_cli._logic import _PLAIN_HELP, SphinxArgparseCli
+from sphinx_argparse_cli._model import CliSubCommandRef, build_model
+from sphinx_argparse_cli._nodes import cli_option
+from sphinx_argparse_cli._pool import WorkerPool
+from sphinx_argparse_cli._render import render
+from sphinx_argparse_cli._split import select_sub_commands
+from sphinx_argparse_cli._static import TooDynamicError, static_parser
+from sphinx_argparse_cli._text import load_help_text, make_id, make_id_lower
+from sphinx_argparse_cli._usage import UsageRenderer
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
     from io import StringIO
 
     from _pytest.fixtures import SubRequest
+    from docutils.nodes import Element
+    from sphinx.domains.std import StandardDomain
+    from sphinx.environment import BuildEnvironment
     from sphinx.testing.util import SphinxTestApp
 
 
@@ -145,14 +191,25 @@ def test_multiline_epilog_subclass_formatter_as_html(build_outcome: str) -> None
 @pytest.mark.sphinx(buildername="html", testroot="smartquotes")
 def test_option_dashes_survive_smartquotes(build_outcome: str) -> None:
     # option names mentioned in parser-supplied text keep their double hyphen
-    assert "Pass input via <span>--text</span> or stdin." in build_outcome
-    assert "see also <span>--2fa</span> and <span>--dry_run</span>." in build_outcome
-    assert "combine with <span>--output</span> for files" in build_outcome
-    assert "build things with <span>--flair</span>" in build_outcome
+    assert "Pass input via --text or stdin." in build_outcome
+    assert "see also --2fa and --dry_run." in build_outcome
+    assert "combine with --output for files" in build_outcome
+    assert "build things with --flair" in build_outcome
     for mangled in ("\u2013text", "\u2013output", "\u20132fa", "\u2013dry_run", "\u2013flair"):
         assert mangled not in build_outcome
     # the surrounding text keeps normal typography
     assert "north\u2013south and 10\u201320" in build_outcome
+    # protecting the dashes adds no markup
+    assert "<span>--" not in build_outcome
+    assert "\x00" not in build_outcome
+
+
+@pytest.mark.sphinx(buildername="text", testroot="smartquotes")
+def test_option_dashes_without_smartquotes(build_outcome: str) -> None:
+    # the text builder skips smart quotes, the escapes must not show up either way
+    assert "Pass input via --text or stdin." in build_outcome
+    assert "see also --2fa and --dry_run." in build_outcome
+    assert "\x00" not in build_outcome
 
 
 @pytest.mark.sphinx(buildername="text", testroot="complex")
@@ -440,3 +497,1512 @@ def test_empty_title_groups_in_toctree(app: SphinxTestApp, monkeypatch: pytest.M
     cli_html = (Path(app.outdir) / "cli.html").read_text()
     assert '<section id="tool-options">' in cli_html
     assert "be verbose" in cli_html
+
+
+def _docs_read_on_rebuild(make_app: Callable[..., SphinxTestApp], app: SphinxTestApp) -> list[str]:
+    rebuild = make_app(buildername=app.builder.name, srcdir=app.srcdir)
+    read: list[str] = []
+    rebuild.connect("env-before-read-docs", lambda _app, _env, docnames: read.extend(docnames))
+    rebuild.build()
+    return read
+
+
+@pytest.mark.sphinx(buildername="html", testroot="incremental", srcdir="incremental-noop")
+def test_incremental_noop_rebuild(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    assert _docs_read_on_rebuild(make_app, app) == []
+
+
+@pytest.mark.sphinx(buildername="html", testroot="incremental", srcdir="incremental-other")
+def test_incremental_unrelated_change(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    other = Path(app.srcdir) / "other.rst"
+    other.write_text(f"{other.read_text()}\nMore unrelated text.\n")
+    assert _docs_read_on_rebuild(make_app, app) == ["other"]
+
+
+@pytest.mark.sphinx(buildername="html", testroot="incremental", srcdir="incremental-parser")
+def test_incremental_parser_change(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    parser = Path(app.srcdir) / "parser.py"
+    parser.write_text(parser.read_text().replace('help="a flag"', 'help="a flag that changed"'))
+    assert _docs_read_on_rebuild(make_app, app) == ["again", "cli"]
+    assert "a flag that changed" in (Path(app.outdir) / "cli.html").read_text()
+
+
+@pytest.mark.sphinx(buildername="html", testroot="incremental", srcdir="incremental-untouched")
+def test_incremental_untouched_parser_not_imported(
+    app: SphinxTestApp, make_app: Callable[..., SphinxTestApp], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    app.build()
+    (Path(app.srcdir) / "unrelated.py").write_text("VALUE = 1\n")
+    imported: list[str] = []
+    monkeypatch.setattr(_extract, "load_parser", lambda module, *_, **__: imported.append(module))
+    assert _docs_read_on_rebuild(make_app, app) == []
+    assert imported == []
+
+
+@pytest.mark.sphinx(buildername="html", testroot="incremental", srcdir="incremental-imported")
+def test_incremental_imported_module_change(
+    app: SphinxTestApp, make_app: Callable[..., SphinxTestApp], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    src = Path(app.srcdir)
+    (src / "incremental_texts.py").write_text('FLAG = "a flag"\n')
+    parser = src / "parser.py"
+    parser.write_text(
+        parser
+        .read_text()
+        .replace("from argparse", "from incremental_texts import FLAG\nfrom argparse")
+        .replace('help="a flag"', "help=FLAG")
+    )
+    app.build()
+    (src / "incremental_texts.py").write_text('FLAG = "a flag from elsewhere"\n')
+    monkeypatch.delitem(sys.modules, "incremental_texts")
+    assert _docs_read_on_rebuild(make_app, app) == ["again", "cli"]
+    assert "a flag from elsewhere" in (Path(app.outdir) / "cli.html").read_text()
+    (src / "incremental_texts.py").unlink()
+    parser.write_text(parser.read_text().replace("from incremental_texts import FLAG", 'FLAG = "an inline flag"'))
+    assert _docs_read_on_rebuild(make_app, app) == ["again", "cli"]
+
+
+def test_project_files(tmp_path: Path) -> None:
+    own = str(tmp_path / "parser.py")
+    assert project_files([argparse.__file__, pytest.__file__, own]) == [own]
+
+
+@pytest.mark.sphinx(buildername="text", testroot="bad-module", srcdir="incremental-failed")
+def test_incremental_failed_parser_retried(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    assert _docs_read_on_rebuild(make_app, app) == ["index"]
+
+
+@pytest.mark.sphinx(buildername="html", testroot="split")
+def test_split_pages(app: SphinxTestApp, warning: StringIO) -> None:
+    app.build()
+    src, out = Path(app.srcdir), Path(app.outdir)
+    pages = sorted(path.relative_to(src).as_posix() for path in src.rglob("*.rst"))
+    assert pages == ["index.rst", "index/build.rst", "index/build/fast.rst", "index/serve.rst"]
+    assert (src / "index" / "build.rst").read_text() == (
+        ".. generated by sphinx_argparse_cli for index, changes are overwritten\n\n"
+        ".. sphinx_argparse_cli::\n  :module: parser\n  :func: make\n  :path: build\n  :split_depth: 1\n"
+    )
+    index = (out / "index.html").read_text()
+    assert '<a class="reference internal" href="index/build.html">tool build (b)</a>' in index
+    assert 'id="tool-build---jobs"' not in index
+    assert (
+        'See <a class="reference internal" href="index/build/fast.html#tool-build-fast" title="tool build fast">'
+        in index
+    )
+    build = (out / "index" / "build.html").read_text()
+    assert 'id="tool-build---jobs"' in build
+    assert '<a class="reference internal" href="build/fast.html">tool build fast</a>' in build
+    fast = (out / "index" / "build" / "fast.html").read_text()
+    assert 'id="tool-build-fast---unsafe"' in fast
+    assert 'See <a class="reference internal" href="../../index.html">' in fast
+    assert not warning.getvalue()
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="split",
+    srcdir="split-suffix",
+    confoverrides={"source_suffix": {".txt": "restructuredtext", ".rst": "restructuredtext"}},
+)
+def test_split_pages_written_as_rst(app: SphinxTestApp, warning: StringIO) -> None:
+    app.build()
+    assert (Path(app.srcdir) / "index" / "build" / "fast.rst").is_file()
+    assert not list((Path(app.srcdir) / "index").rglob("*.txt"))
+    assert 'id="tool-build-fast---unsafe"' in (Path(app.outdir) / "index" / "build" / "fast.html").read_text()
+    assert not warning.getvalue()
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="split",
+    srcdir="split-no-rst",
+    confoverrides={"source_suffix": {".txt": "restructuredtext"}},
+)
+def test_split_pages_without_rst_suffix(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    src = Path(app.srcdir)
+    (src / "index.rst").rename(src / "index.txt")
+    rebuild = make_app(
+        buildername="html", srcdir=app.srcdir, confoverrides={"source_suffix": {".txt": "restructuredtext"}}
+    )
+    rebuild.build()
+    assert not (src / "index").exists()
+    assert "index.txt: WARNING: sphinx_argparse_cli cannot write the pages of :split_depth:, .rst is not in" in (
+        rebuild.warning.getvalue()
+    )
+
+
+@pytest.mark.sphinx(buildername="html", testroot="split", srcdir="split-incremental")
+def test_split_rebuilds_changed_pages(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    assert _docs_read_on_rebuild(make_app, app) == []
+    parser = Path(app.srcdir) / "parser.py"
+    parser.write_text(parser.read_text().replace('help="skip even more"', 'help="skip all of them"'))
+    assert _docs_read_on_rebuild(make_app, app) == ["index/build/fast"]
+    added = '    commands.add_parser("clean", help="remove the output")\n    # links across'
+    parser.write_text(parser.read_text().replace("    # links across", added))
+    assert sorted(_docs_read_on_rebuild(make_app, app)) == ["index", "index/clean"]
+
+
+@pytest.mark.sphinx(buildername="html", testroot="split", srcdir="split-shallower")
+def test_split_pages_removed(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    index = Path(app.srcdir) / "index.rst"
+    index.write_text(index.read_text().replace(":split_depth: 2", ":split_depth: 1"))
+    assert sorted(_docs_read_on_rebuild(make_app, app)) == ["index", "index/build", "index/serve"]
+    assert not (Path(app.srcdir) / "index" / "build" / "fast.rst").exists()
+    build = (Path(app.outdir) / "index" / "build.html").read_text()
+    assert 'id="tool-build-fast---unsafe"' in build
+    assert 'See <a class="reference internal" href="../index.html">' in build
+
+
+@pytest.mark.sphinx(buildername="html", testroot="split", srcdir="split-failed")
+def test_split_pages_kept_while_parser_fails(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    parser = Path(app.srcdir) / "parser.py"
+    parser.write_text(parser.read_text().replace("def make(", "def make_tool("))
+    read = sorted(_docs_read_on_rebuild(make_app, app))
+    assert read == ["index", "index/build", "index/build/fast", "index/serve"]
+    assert (Path(app.srcdir) / "index" / "build" / "fast.rst").is_file()
+
+
+@pytest.mark.sphinx(buildername="html", testroot="split", srcdir="split-invalid")
+def test_split_invalid(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    src = Path(app.srcdir)
+    (src / "index" / "serve.rst").write_text("Serve\n=====\n")
+    directive = ".. sphinx_argparse_cli::\n  :module: parser\n  :func: make\n"
+    (src / "index.rst").write_text(
+        f"{directive}  :split_depth: 1\n\n{directive}  :title:\n  :split_depth: 1\n\n"
+        f"{directive}  :path: b missing\n  :split_depth: 1\n\n{directive}  :split_depth: many\n\n"
+        f"{directive}  :prog: inline\n"
+    )
+    rebuild = make_app(buildername="html", srcdir=app.srcdir)
+    rebuild.build()
+    assert (src / "index" / "serve.rst").read_text() == "Serve\n=====\n"
+    warnings = rebuild.warning.getvalue()
+    assert "sphinx_argparse_cli page index/serve for sub-command serve already exists" in warnings
+    assert "sphinx_argparse_cli page index/build for sub-command build already exists" in warnings
+    assert "tool has no sub-command b missing" in warnings
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="incremental",
+    srcdir="cache-hit",
+    confoverrides={"sphinx_argparse_cli_cache": True},
+)
+def test_cache_skips_import(
+    app: SphinxTestApp, make_app: Callable[..., SphinxTestApp], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    app.build()
+    cli = Path(app.srcdir) / "cli.rst"
+    cli.write_text(f"Intro\n=====\n\n{cli.read_text()}")
+
+    def fail(*_: object, **__: object) -> None:
+        raise AssertionError
+
+    monkeypatch.setattr(_extract, "load_parser", fail)
+    rebuild = make_app(buildername="html", srcdir=app.srcdir, confoverrides={"sphinx_argparse_cli_cache": True})
+    rebuild.build()
+    html = (Path(rebuild.outdir) / "cli.html").read_text()
+    assert "Intro" in html
+    assert "a flag" in html
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="incremental",
+    srcdir="cache-source-changed",
+    confoverrides={"sphinx_argparse_cli_cache": True},
+)
+def test_cache_invalidated_by_source_change(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    parser = Path(app.srcdir) / "parser.py"
+    parser.write_text(parser.read_text().replace('help="a flag"', 'help="a cached flag that changed"'))
+    rebuild = make_app(buildername="html", srcdir=app.srcdir, confoverrides={"sphinx_argparse_cli_cache": True})
+    rebuild.build()
+    assert "a cached flag that changed" in (Path(rebuild.outdir) / "cli.html").read_text()
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path, max_size=350)
+    for at, key in enumerate(("a", "b", "c")):
+        cache.put(key, "x" * 100)
+        os.utime(tmp_path / key, ns=(at, at))
+    assert cache.get("a") == "x" * 100  # touching it makes b the least recently used
+    cache.put("d", "x" * 100)
+    assert sorted(i.name for i in tmp_path.iterdir()) == ["a", "c", "d"]
+
+
+@pytest.fixture
+def rendered(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    monkeypatch.setattr(_fragments, "_FRAGMENTS", LruMemo(32))
+    documents: list[str] = []
+    render = SphinxArgparseCli._render  # noqa: SLF001
+
+    def tracked(directive: SphinxArgparseCli) -> Element:
+        documents.append(directive.env.docname)
+        return render(directive)
+
+    monkeypatch.setattr(SphinxArgparseCli, "_render", tracked)
+    return documents
+
+
+@pytest.mark.sphinx(buildername="html", testroot="fragment")
+def test_fragment_reused_across_documents(app: SphinxTestApp, rendered: list[str], warning: StringIO) -> None:
+    app.build()
+    assert rendered == ["first", "linked"]  # the help of linked refers to a document, so it is rendered every time
+    first, second = (_body((Path(app.outdir) / f"{name}.html").read_text()) for name in ("first", "second"))
+    assert first == second
+    assert "see --flag" in second
+    assert "like --other, but <em>more</em>" in second
+    labels = cast("StandardDomain", app.env.get_domain("std")).labels
+    assert labels["second:tool---flag"] == ("second", "tool---flag", "tool --flag")
+    assert not warning.getvalue()
+
+
+def _body(html: str) -> str:
+    return html[html.index('<div class="body"') : html.index('<div class="sphinxsidebar"')]
+
+
+@pytest.mark.sphinx(buildername="html", testroot="fragment", srcdir="fragment-builds")
+def test_fragment_reused_between_builds(
+    app: SphinxTestApp, make_app: Callable[..., SphinxTestApp], rendered: list[str]
+) -> None:
+    app.build()
+    html = (Path(app.outdir) / "first.html").read_text()
+    _fragments._FRAGMENTS.clear()  # noqa: SLF001
+    rendered.clear()
+    make_app(buildername="html", srcdir=app.srcdir, freshenv=True).build()
+    assert rendered == ["linked"]
+    assert (Path(app.outdir) / "first.html").read_text() == html
+
+
+@pytest.mark.sphinx(buildername="html", testroot="fragment", srcdir="fragment-config")
+def test_fragment_keyed_by_config(
+    app: SphinxTestApp, make_app: Callable[..., SphinxTestApp], rendered: list[str]
+) -> None:
+    app.build()
+    assert "the other <cite>one</cite>" in (Path(app.outdir) / "first.html").read_text()
+    rendered.clear()
+    rebuild = make_app(buildername="html", srcdir=app.srcdir, freshenv=True, confoverrides={"default_role": "code"})
+    rebuild.build()
+    assert rendered == ["first", "linked"]  # the help text parses differently, first is not reused
+    assert (
+        'the other <code class="code docutils literal notranslate"><span class="pre">one</span></code>'
+        in (Path(rebuild.outdir) / "first.html").read_text()
+    )
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="fragment",
+    srcdir="fragment-disabled",
+    confoverrides={"sphinx_argparse_cli_cache": False},
+)
+def test_fragment_cache_disabled(app: SphinxTestApp, rendered: list[str]) -> None:
+    app.build()
+    assert rendered == ["first", "linked", "second"]
+
+
+def test_fragment_leaves_document_behind(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(_fragments, "_FRAGMENTS", LruMemo(32))
+    config = SimpleNamespace(
+        sphinx_argparse_cli_cache=True, sphinx_argparse_cli_cache_size=1024 * 1024, sphinx_argparse_cli_memo_size=1
+    )
+    env = cast("BuildEnvironment", SimpleNamespace(config=config, doctreedir=str(tmp_path)))
+    node = paragraph("", "text")
+    node.document = new_document("index")
+    _fragments.store_fragment(env, "key", _fragments.Fragment(node, (), (), ()))
+    loaded = _fragments.load_fragment(env, "key")
+    assert loaded is not None
+    assert loaded.node.astext() == "text"
+    assert loaded.node.document is None
+
+
+@pytest.mark.parametrize("callback", [pytest.param(lambda: None, id="unpicklable")])
+def test_fragment_not_stored(callback: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(_fragments, "_FRAGMENTS", LruMemo(32))
+    config = SimpleNamespace(
+        sphinx_argparse_cli_cache=True, sphinx_argparse_cli_cache_size=1024 * 1024, sphinx_argparse_cli_memo_size=1
+    )
+    env = cast("BuildEnvironment", SimpleNamespace(config=config, doctreedir=str(tmp_path)))
+    node = paragraph("", "text", callback=callback)
+    _fragments.store_fragment(env, "key", _fragments.Fragment(node, (), (), ()))
+    assert _fragments.load_fragment(env, "key") is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_disk_cache_entry_over_limit(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path, max_size=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_cache_source_removed(tmp_path: Path) -> None:
+    assert _extract._unchanged({str(tmp_path / "gone.py"): "digest"}) is False  # noqa: SLF001
+
+
+def test_disk_cache_unreadable_entry(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path / "cache", max_size=1024)
+    assert cache.get("missing") is None
+    cache.put("broken", 1)
+    (tmp_path / "cache" / "broken").write_bytes(b"not a pickle")
+    assert cache.get("broken") is None
+
+
+def test_disk_cache_compressed(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path, max_size=1024, compress=True)
+    cache.put("a", "x" * 1000)
+    assert (tmp_path / "a").stat().st_size < 100
+    assert cache.get("a") == "x" * 1000
+    (tmp_path / "a").write_bytes(b"not compressed")
+    assert cache.get("a") is None
+
+
+@pytest.mark.parametrize("value", [pytest.param("deep", id="too-deep"), pytest.param(lambda: None, id="unpicklable")])
+def test_disk_cache_value_not_stored(value: Any, tmp_path: Path) -> None:
+    if value == "deep":
+        for _ in range(sys.getrecursionlimit()):
+            value = [value]
+    cache = DiskCache(tmp_path, max_size=1024)
+    cache.put("a", value)
+    assert cache.get("a") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.sphinx(buildername="dummy", testroot="deep", confoverrides={"sphinx_argparse_cli_cache": True})
+def test_cache_deep_tree(app: SphinxTestApp, warning: StringIO) -> None:
+    app.build()
+    assert list((Path(app.doctreedir) / "sphinx_argparse_cli").iterdir())  # the model is cached too
+    doctree = app.env.get_doctree("index")
+    assert any(node["ids"][0].endswith("-l249---last") for node in doctree.findall(cli_option))
+    assert not warning.getvalue()
+
+
+def _complex_parser() -> ArgumentParser:
+    return _root_parser("complex")
+
+
+def _root_parser(root: str) -> ArgumentParser:
+    spec = importlib.util.spec_from_file_location(
+        f"{root}_parser", Path(__file__).parents[1] / "roots" / f"test-{root}" / "parser.py"
+    )
+    assert spec is not None
+    assert spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.make()
+
+
+def _argparse_usage(parser: ArgumentParser, prog: str, width: int) -> str:
+    formatter = HelpFormatter(prog, width=width)
+    if hasattr(formatter, "_set_color"):  # pragma: >=3.14 cover
+        formatter._set_color(False)  # noqa: SLF001
+    formatter.add_usage(parser.usage, parser._actions, parser._mutually_exclusive_groups)  # noqa: SLF001
+    lines = formatter.format_help()[len("usage: ") :].splitlines()
+    return "\n".join(line if at == 0 else f"{' ' * (len(prog) + 1)}{line.lstrip()}" for at, line in enumerate(lines))
+
+
+_ROOTS_WITH_PARSER = sorted(
+    path.parent.name[len("test-") :]
+    for path in (Path(__file__).parents[1] / "roots").glob("*/parser.py")
+    if "def make()" in path.read_text()
+)
+
+
+@pytest.mark.parametrize("width", [40, 100])
+@pytest.mark.parametrize("root", _ROOTS_WITH_PARSER)
+def test_usage_matches_argparse(root: str, width: int) -> None:
+    renderer = UsageRenderer(width)
+    pending, seen = [_root_parser(root)], set()
+    while pending:
+        parser = pending.pop()
+        if id(parser) in seen:
+            continue
+        seen.add(id(parser))
+        assert renderer.render(parser, parser.prog) == _argparse_usage(parser, parser.prog, width)
+        for action in parser._actions:  # noqa: SLF001
+            if isinstance(action, _SubParsersAction):
+                pending.extend(action.choices.values())
+
+
+@pytest.mark.parametrize(
+    "usage",
+    [
+        pytest.param("%(prog)s [options] file\n\n\n\nthen more\n", id="custom"),
+        pytest.param(SUPPRESS, id="suppressed"),
+    ],
+)
+def test_usage_custom(usage: str) -> None:
+    parser = ArgumentParser(prog="tool", usage=usage)
+    assert UsageRenderer(100).render(parser, "tool") == _argparse_usage(parser, "tool", 100)
+
+
+@pytest.mark.parametrize("prog", ["tool", "a-very-long-program-name-taking-most-of-the-line"])
+@pytest.mark.parametrize("add_help", [True, False])
+def test_usage_wrapping(prog: str, add_help: bool) -> None:
+    parser = ArgumentParser(prog=prog, add_help=add_help)
+    for at in range(6):
+        parser.add_argument(f"source-{at}", nargs=["?", "*", "+", 2, None, "..."][at])
+    if add_help:
+        parser.add_argument("--level", required=True, metavar=("LOW", "HIGH"), nargs=2)
+        parser.add_argument("--items", choices=["a", "b"], nargs="*")
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--one", action="store_true")
+        group.add_argument("--two", action=BooleanOptionalAction)
+        single = parser.add_mutually_exclusive_group(required=True)
+        single.add_argument("--alone", nargs="?")
+        parser.add_argument("--spare", metavar=("A", "B"), nargs="*")
+        parser.add_mutually_exclusive_group().add_argument("extra", nargs="?")
+        # not next to each other, so not rendered as a group
+        apart = parser.add_mutually_exclusive_group()
+        apart.add_argument("--first")
+        parser.add_argument("--between")
+        apart.add_argument("--second")
+    for width in (30, 60, 200):
+        assert UsageRenderer(width).render(parser, prog) == _argparse_usage(parser, prog, width)
+
+
+def test_usage_no_arguments() -> None:
+    parser = ArgumentParser(prog="tool", add_help=False)
+    assert UsageRenderer(100).render(parser, "tool") == "tool"
+
+
+def test_usage_suppressed_in_group() -> None:
+    # argparse before 3.13 leaves extra spaces where suppressed arguments were
+    parser = ArgumentParser(prog="tool", add_help=False)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--one", action="store_true")
+    group.add_argument("--hidden", help=SUPPRESS)
+    group.add_argument("--two", action="store_true")
+    parser.add_mutually_exclusive_group().add_argument("--secret", help=SUPPRESS)
+    parser.add_argument("source")
+    assert UsageRenderer(100).render(parser, "tool") == "tool [--one | --two] source"
+
+
+def test_usage_invalid() -> None:
+    parser = ArgumentParser(prog="tool", add_help=False)
+    parser.add_argument("--odd").nargs = "x"
+    with pytest.raises(ValueError, match="invalid nargs value"):
+        UsageRenderer(100).render(parser, "tool")
+    parser.add_mutually_exclusive_group()
+    with pytest.raises(ValueError, match="empty group"):
+        UsageRenderer(100).render(parser, "tool")
+
+
+def test_model_leaves_parser_untouched() -> None:
+    parser = _complex_parser()
+    before = parser.prog, parser.formatter_class, parser.format_help()
+    model = build_model(parser, 100, "renamed")
+    assert (parser.prog, parser.formatter_class, parser.format_help()) == before
+    assert model.prog == "renamed"
+    assert [sub_command.parser.prog for sub_command in model.iter_sub_commands()] == [
+        "renamed first",
+        "renamed second",
+        "renamed third",
+    ]
+    assert model.usage.startswith("renamed [-h]")
+
+
+def test_model_compact_picklable_and_hashable() -> None:
+    model = build_model(_complex_parser(), 100)
+    assert not hasattr(model, "__dict__")
+    restored = pickle.loads(pickle.dumps(model))  # noqa: S301
+    assert restored == model
+    assert hash(restored) == hash(model)
+    first, second = (sub_command.parser for sub_command in model.iter_sub_commands() if sub_command.name != "third")
+    # option strings repeated across sub-commands share a single object
+    assert first.groups[1].actions[0].option_strings[0] is second.groups[1].actions[0].option_strings[0]
+
+
+@pytest.mark.sphinx(buildername="html", testroot="shared")
+def test_shared_sub_parser_rendered_once(build_outcome: str, warning: StringIO) -> None:
+    assert build_outcome.count('<section id="tool-common-options">') == 1
+    assert '<section id="tool-group-again">' in build_outcome
+    assert 'See <a class="reference internal" href="#tool-common-(c)">' in build_outcome
+    assert "<p>common operation, again --level</p>" in build_outcome
+    # looping back to the root parser links to the top, or names it when there is no title to link to
+    assert 'See <a class="reference internal" href="#tool---CLI-interface">' in build_outcome
+    assert '<p>See <code class="docutils literal notranslate"><span class="pre">other</span></code>.' in build_outcome
+    assert not warning.getvalue()
+
+
+@pytest.mark.sphinx(buildername="html", testroot="shared", srcdir="shared-exclude")
+@pytest.mark.prepare(directive_args=[":exclude: common, group root"])
+def test_exclude_sub_commands(build_outcome: str, warning: StringIO) -> None:
+    assert '<section id="tool-common-(c)">' not in build_outcome
+    assert '<section id="tool-group-root">' not in build_outcome
+    # what is shared with an excluded sub-command is named, there is nothing to link to
+    assert '<p>See <code class="docutils literal notranslate"><span class="pre">tool</span>' in build_outcome
+    assert not warning.getvalue()
+
+
+@pytest.mark.sphinx(buildername="html", testroot="split", srcdir="split-include")
+def test_include_sub_commands_on_pages(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    index = Path(app.srcdir) / "index.rst"
+    index.write_text(f"{index.read_text()}  :include: build fast\n")
+    rebuild = make_app(buildername="html", srcdir=app.srcdir)
+    rebuild.build()
+    pages = sorted(path.relative_to(app.srcdir).as_posix() for path in Path(app.srcdir).rglob("*.rst"))
+    assert pages == ["index.rst", "index/build.rst", "index/build/fast.rst"]
+    assert ":include: build fast" in (Path(app.srcdir) / "index" / "build" / "fast.rst").read_text()
+    assert "index/serve.html" not in (Path(app.outdir) / "index.html").read_text()
+
+
+def test_select_sub_commands() -> None:
+    parser = ArgumentParser(prog="tool")
+    commands = parser.add_subparsers()
+    cluster = commands.add_parser("cluster").add_subparsers()
+    node = cluster.add_parser("node").add_subparsers()
+    node.add_parser("list")
+    node.add_parser("drain")
+    cluster.add_parser("pool")
+    commands.add_parser("debug")
+    model = build_model(parser, 100)
+
+    def selected(**options: str) -> list[str]:
+        pruned = select_sub_commands(model, options)
+        return [sub.name for sub in pruned.iter_sub_commands()]
+
+    assert select_sub_commands(model, {}) is model
+    assert selected(include="cluster node") == ["cluster", "node", "list", "drain"]
+    assert selected(include="* list, debug") == ["cluster", "node", "list", "debug"]
+    assert selected(exclude="cluster node drain, debug") == ["cluster", "node", "list", "pool"]
+    assert selected(include="cluster", exclude="cluster node") == ["cluster", "pool"]
+    assert selected(include="nothing") == []
+
+
+def test_limit_depth() -> None:
+    parser = ArgumentParser(prog="tool")
+    commands = parser.add_subparsers()
+    node = commands.add_parser("cluster").add_subparsers().add_parser("node").add_subparsers()
+    node.add_parser("list")
+    node.choices["top"] = parser
+    commands.add_parser("debug")
+    model = build_model(parser, 100)
+
+    def cut(max_depth: int) -> tuple[list[str], list[str]]:
+        kept, summarized = model.limit_depth(max_depth)
+        return [sub.prog for sub in kept.iter_sub_commands()], [sub.prog for sub in summarized]
+
+    below = ["tool cluster node list", "tool cluster node top"]
+    everything = ["tool cluster", "tool cluster node", *below, "tool debug"]
+    assert cut(0) == ([], everything)
+    assert cut(1) == (["tool cluster", "tool debug"], ["tool cluster node", *below])
+    assert cut(2) == (["tool cluster", "tool cluster node", "tool debug"], below)
+    assert cut(3) == (everything, [])
+
+
+@pytest.mark.sphinx(buildername="html", testroot="split", srcdir="max-depth")
+def test_max_depth(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    directive = ".. sphinx_argparse_cli::\n  :module: parser\n  :func: make\n"
+    (Path(app.srcdir) / "index.rst").write_text(
+        f"{directive}  :max_depth: 1\n\n{directive}  :path: build fast\n  :max_depth: 0\n\n"
+        f"{directive}  :prog: other\n  :max_depth: 0\n"
+    )
+    rebuild = make_app(buildername="html", srcdir=app.srcdir)
+    rebuild.build()
+    assert [path.name for path in Path(app.srcdir).rglob("*.rst")] == ["index.rst"]
+    index = (Path(app.outdir) / "index.html").read_text()
+    # below the depth only a row, linking to the full documentation of the second directive
+    assert '<section id="tool-sub-command-summary">' in index
+    assert 'id="tool-build---jobs"' in index
+    assert index.count('id="tool-build-fast---unsafe"') == 1
+    link = '<a class="reference internal" href="#tool-build-fast" title="tool build fast">'
+    assert f'<tr class="row-even"><td><p>{link}' in index
+    assert f"<p>See {link}" in index
+    assert "<td><p>skip the checks</p></td>" in index
+    # with nothing documenting them in full, names stay plain, without a warning
+    assert '<section id="tool-build-fast-sub-command-summary">' in index
+    assert '<td><p><code class="docutils literal notranslate"><span class="pre">tool</span>' in index
+    assert '<section id="other-sub-command-summary">' in index
+    assert "<td><p>b</p></td>" in index
+    assert "not found" not in rebuild.warning.getvalue()
+
+
+@pytest.mark.sphinx(buildername="html", testroot="split", srcdir="max-depth-split")
+def test_max_depth_on_pages(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    index = Path(app.srcdir) / "index.rst"
+    index.write_text(f"{index.read_text()}  :max_depth: 1\n")
+    rebuild = make_app(buildername="html", srcdir=app.srcdir)
+    rebuild.build()
+    pages = sorted(path.relative_to(app.srcdir).as_posix() for path in Path(app.srcdir).rglob("*.rst"))
+    assert pages == ["index.rst", "index/build.rst", "index/serve.rst"]
+    assert ":split_depth: 1\n  :max_depth: 0\n" in (Path(app.srcdir) / "index" / "build.rst").read_text()
+    assert "sub-command-summary" not in (Path(app.outdir) / "index.html").read_text()
+    build = (Path(app.outdir) / "index" / "build.html").read_text()
+    assert '<section id="tool-build-sub-command-summary">' in build
+    assert 'id="tool-build-fast---unsafe"' not in build
+    assert "not found" not in rebuild.warning.getvalue()
+
+    # what is below the summary does not show, its rows do
+    parser = Path(app.srcdir) / "parser.py"
+    parser.write_text(parser.read_text().replace('help="skip even more"', 'help="skip all of them"'))
+    assert _docs_read_on_rebuild(make_app, app) == []
+    parser.write_text(parser.read_text().replace('help="skip the checks"', 'help="skip the tests"'))
+    assert _docs_read_on_rebuild(make_app, app) == ["index/build"]
+
+
+def test_model_shared_sub_parser() -> None:
+    parser = ArgumentParser(prog="tool")
+    commands = parser.add_subparsers()
+    common = commands.add_parser("common", aliases=["c"], help="common")
+    second = commands.add_parser("second").add_subparsers()
+    second.add_parser("again", help="again")
+    second.choices["again"] = common
+    second.choices["back"] = parser
+
+    model = build_model(parser, 100)
+
+    assert [(sub.name, sub.aliases, sub.help, type(sub).__name__) for sub in model.iter_sub_commands()] == [
+        ("common", ("c",), "common", "CliSubCommand"),
+        ("second", (), "", "CliSubCommand"),
+        ("again", (), "again", "CliSubCommandRef"),
+        ("back", (), "", "CliSubCommandRef"),
+    ]
+    again, back = model.sub_commands[1].parser.sub_commands  # type: ignore[union-attr]
+    assert again == CliSubCommandRef("again", (), "again", "tool second again", ("tool common", ("c",)), ("common",))
+    assert back == CliSubCommandRef("back", (), "", "tool second back", None, ())
+    assert pickle.loads(pickle.dumps(model)) == model  # noqa: S301
+    assert render(model, "json", {}) == json.dumps(dataclasses.asdict(model), indent=2) + "\n"
+
+
+def test_model_deep_tree() -> None:
+    depth = sys.getrecursionlimit()
+    parser = current = ArgumentParser(prog="deep")
+    for _ in range(depth):
+        current = current.add_subparsers().add_parser("command-0", help="one level deeper")
+
+    model = build_model(parser, 100)
+
+    sub_commands = list(model.iter_sub_commands())
+    assert len(sub_commands) == depth
+    assert sub_commands[-1].parser.prog.count(" command-0") == depth  # type: ignore[union-attr]
+    assert parser_fingerprint(model, {}) != parser_fingerprint(build_model(parser, 100, "renamed"), {})
+    restored = pickle.loads(pickle.dumps(model))  # noqa: S301  # pickled flat
+    assert restored == model
+    assert hash(restored) == hash(model)
+    assert restored != dataclasses.replace(model, prog="other")
+    assert model.__eq__(object()) is NotImplemented
+
+
+@pytest.mark.sphinx(buildername="html", testroot="incremental", srcdir="memo")
+def test_memo_imports_once_per_build(app: SphinxTestApp, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+    load_parser = _extract.load_parser
+
+    def counting(module_name: str, attr_name: str, *, hook: bool) -> tuple[ArgumentParser, list[str]]:
+        calls.append(module_name)
+        return load_parser(module_name, attr_name, hook=hook)
+
+    monkeypatch.setattr(_extract, "load_parser", counting)
+    again = Path(app.srcdir) / "again.rst"
+    again.write_text(f"{again.read_text()}  :prog: again\n")
+    app.build()
+    assert calls == ["parser"]  # both cli and again document the same parser, under different names
+
+
+def test_lru_memo_bound() -> None:
+    memo = LruMemo(2)
+    memo.put("a", 1)
+    memo.put("b", 2)
+    assert memo.get("a") == 1
+    memo.put("c", 3)
+    assert (memo.get("a"), memo.get("b"), memo.get("c")) == (1, None, 3)
+    memo.clear()
+    assert memo.get("a") is None
+
+
+@pytest.mark.sphinx(
+    buildername="text",
+    testroot="isolation",
+    confoverrides={"sphinx_argparse_cli_workers": 2, "sphinx_argparse_cli_worker_timeout": 2},
+)
+def test_workers_isolate_application(app: SphinxTestApp, warning: StringIO, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(*_: object, **__: object) -> None:
+        raise AssertionError
+
+    monkeypatch.setattr(_extract, "load_parser", fail)
+    app.build()
+    text = (Path(app.outdir) / "index.txt").read_text()
+    assert "isolated flag" in text
+    assert "hooked options" in text
+    warnings = warning.getvalue()
+    assert "Extracting parser from parser:crash crashed (exit code 3)" in warnings
+    assert "Extracting parser from parser:hang timed out after 2s" in warnings
+    assert "parser" not in sys.modules
+
+
+def test_worker_pool_unsendable(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(str(Path(__file__).parents[1] / "roots" / "test-isolation"))
+    pool = WorkerPool(1, timeout=30)
+    try:
+        unsendable, usable = pool.extract([
+            ExtractRequest("parser", "unsendable", hook=False, prog=None, usage_width=100),
+            ExtractRequest("parser", "make", hook=False, prog=None, usage_width=100),
+        ])
+    finally:
+        pool.close()
+    assert isinstance(unsendable, LoadParserError)
+    assert str(unsendable) == "Cannot send back the parser of parser:unsendable: PicklingError('not sent')"
+    assert "parser" not in sys.modules  # not extracted in this process instead
+    assert not isinstance(usable, Exception)  # the worker stays in use
+    assert usable[0].prog == "isolated"
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="registry",
+    srcdir="registry-negative-workers",
+    confoverrides={"sphinx_argparse_cli_workers": -2},
+)
+def test_worker_count_negative(app: SphinxTestApp) -> None:
+    app.build()
+    assert app.config.sphinx_argparse_cli_workers == 0
+    assert "sphinx_argparse_cli_workers must not be negative, got -2; extracting in-process" in app.warning.getvalue()
+    assert 'id="tool---flag"' in (Path(app.outdir) / "index.html").read_text()
+
+
+def test_worker_pool_concurrent(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(str(Path(__file__).parents[1] / "roots" / "test-isolation"))
+    pool = WorkerPool(2, timeout=30)
+    try:
+        start = time.monotonic()
+        outcomes = pool.extract([
+            ExtractRequest("parser", "slow", hook=False, prog=None, usage_width=100),
+            ExtractRequest("parser", "slow", hook=False, prog="other", usage_width=100),
+            ExtractRequest("parser", "missing", hook=False, prog=None, usage_width=100),
+        ])
+        elapsed = time.monotonic() - start
+    finally:
+        pool.close()
+    first, second, missing = outcomes
+    assert not isinstance(first, Exception)
+    assert not isinstance(second, Exception)
+    assert (first[0].prog, second[0].prog) == ("isolated", "other")
+    assert str(missing) == "Module 'parser' has no attribute 'missing'"
+    assert elapsed < 1.9  # the two slow extractions overlap
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="incremental",
+    srcdir="incremental-workers",
+    confoverrides={"sphinx_argparse_cli_workers": 2},
+)
+def test_incremental_noop_rebuild_with_workers(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    rebuild = make_app(buildername="html", srcdir=app.srcdir, confoverrides={"sphinx_argparse_cli_workers": 2})
+    read: list[str] = []
+    rebuild.connect("env-before-read-docs", lambda _app, _env, docnames: read.extend(docnames))
+    rebuild.build()
+    assert read == []
+
+
+@pytest.mark.sphinx(buildername="html", testroot="incremental", srcdir="incremental-workers-touched")
+def test_incremental_touched_parser_with_workers(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    (Path(app.srcdir) / "parser.py").touch()
+    rebuild = make_app(buildername="html", srcdir=app.srcdir, confoverrides={"sphinx_argparse_cli_workers": 2})
+    read: list[str] = []
+    rebuild.connect("env-before-read-docs", lambda _app, _env, docnames: read.extend(docnames))
+    rebuild.build()
+    assert read == []
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="incremental",
+    srcdir="incremental-workers-failed",
+    confoverrides={"sphinx_argparse_cli_workers": 2},
+)
+def test_incremental_failed_prefetch_with_workers(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    (Path(app.srcdir) / "parser.py").write_text("raise RuntimeError\n")
+    rebuild = make_app(buildername="html", srcdir=app.srcdir, confoverrides={"sphinx_argparse_cli_workers": 2})
+    read: list[str] = []
+    rebuild.connect("env-before-read-docs", lambda _app, _env, docnames: read.extend(docnames))
+    rebuild.build()
+    assert sorted(read) == ["again", "cli"]
+    assert "Failed to extract parser from parser:make: RuntimeError()" in rebuild.warning.getvalue()
+
+
+def test_hook_concurrent_threads() -> None:
+    original = ArgumentParser.parse_known_args
+    barrier = Barrier(16)
+
+    def hooked(at: int) -> str | None:
+        def main() -> None:
+            parser = ArgumentParser(prog=f"prog-{at}")
+            barrier.wait()
+            assert ArgumentParser.parse_known_args is original  # no process wide patch
+            parser.parse_args([])
+
+        found = _load._hooked_parser(main)  # noqa: SLF001
+        assert sys.getprofile() is None
+        return None if found is None else found.prog
+
+    def plain(at: int) -> int:
+        parser = ArgumentParser()
+        parser.add_argument("--value", type=int)
+        barrier.wait()
+        return parser.parse_args(["--value", str(at)]).value
+
+    with ThreadPoolExecutor(16) as executor:
+        hooked_progs = executor.map(hooked, range(8))
+        plain_values = executor.map(plain, range(8))
+        assert list(hooked_progs) == [f"prog-{at}" for at in range(8)]
+        assert list(plain_values) == list(range(8))
+
+
+def _build_synthetic(make_app: Callable[..., SphinxTestApp], srcdir: Path, parallel: int) -> SphinxTestApp:
+    app = make_app(buildername="html", srcdir=srcdir, builddir=srcdir.parent / f"build-{parallel}", parallel=parallel)
+    assert app.is_parallel_allowed("read")
+    assert app.is_parallel_allowed("write")
+    app.build()
+    return app
+
+
+def test_parallel_build_matches_serial(tmp_path: Path, make_app: Callable[..., SphinxTestApp]) -> None:
+    write_project(tmp_path / "src", documents=40, shape=Shape(breadth=4, options=6))
+    serial = _build_synthetic(make_app, tmp_path / "src", parallel=1)
+    parallel = _build_synthetic(make_app, tmp_path / "src", parallel=max(2, os.cpu_count() or 2))
+    for app in (serial, parallel):
+        # creating a second application within the process warns about docutils registrations already present
+        assert [line for line in app.warning.getvalue().splitlines() if "already registered" not in line] == []
+    serial_out, parallel_out = Path(serial.outdir), Path(parallel.outdir)
+    pages = sorted(path.relative_to(serial_out) for path in serial_out.rglob("*.html"))
+    assert len(pages) == 44  # the index, search, general and CLI index pages, and a page per program
+    assert pages == sorted(path.relative_to(parallel_out) for path in parallel_out.rglob("*.html"))
+    for page in pages:
+        assert (parallel_out / page).read_text() == (serial_out / page).read_text(), page
+
+
+def test_parallel_build_duplicate_label(tmp_path: Path, make_app: Callable[..., SphinxTestApp]) -> None:
+    write_project(tmp_path / "src", documents=10, shape=Shape(breadth=1, options=1))
+    # read in a different chunk than tool-0, the labels only meet when the environments are merged
+    (tmp_path / "src" / "tool-4.rst").write_text(
+        ".. sphinx_argparse_cli::\n  :module: synthetic_cli\n  :func: make_tool_0\n"
+    )
+    app = _build_synthetic(make_app, tmp_path / "src", parallel=2)
+    warnings = app.warning.getvalue()
+    assert warnings.count("duplicate label tool-0---verbose, other instance in") == 1
+    assert "tool-4" in warnings
+
+
+def test_pickled_bytes_per_option(tmp_path: Path, make_app: Callable[..., SphinxTestApp]) -> None:
+    write_project(tmp_path / "src", documents=1, shape=Shape(depth=0, options=1000))
+    app = _build_synthetic(make_app, tmp_path / "src", parallel=1)
+    options = 1003  # with -h/--help, --verbose and source
+    doctrees = Path(app.doctreedir)
+    assert (doctrees / "tool-0.doctree").stat().st_size / options < 900
+    assert (doctrees / "environment.pickle").stat().st_size / options < 135
+
+
+@pytest.mark.sphinx(
+    buildername="html", testroot="incremental", srcdir="timing", confoverrides={"sphinx_argparse_cli_timing": True}
+)
+def test_timing_report(app: SphinxTestApp) -> None:
+    app.build()
+    report = json.loads((Path(app.doctreedir) / "sphinx_argparse_cli_timing.json").read_text())
+    directives = sorted(report["directives"], key=operator.itemgetter("docname"))
+    assert [(timing["docname"], timing["lineno"], timing["prog"]) for timing in directives] == [
+        ("again", 1, "incremental"),
+        ("cli", 1, "incremental"),
+    ]
+    assert {"total", "lookup", "import", "call", "model", "help", "refs"} <= report["phases"].keys()
+    for timing in directives:
+        phases = timing["phases"]
+        assert sum(spent["wall"] for name, spent in phases.items() if name != "total") <= phases["total"]["wall"]
+    status = app.status.getvalue()
+    assert "sphinx_argparse_cli timing of 2 directive(s) written to" in status
+    assert "s cli:1 incremental (lookup " in status
+
+
+@pytest.mark.sphinx(
+    buildername="text", testroot="incremental", confoverrides={"sphinx_argparse_cli_timing_budget": 1e-9}
+)
+def test_timing_budget(app: SphinxTestApp, warning: StringIO) -> None:
+    app.build()
+    assert "cli.rst:1: WARNING: sphinx_argparse_cli directive for incremental took" in warning.getvalue()
+    assert "over the budget of 1e-09s [sphinx-argparse-cli.timing]" in warning.getvalue()
+    assert not (Path(app.doctreedir) / "sphinx_argparse_cli_timing.json").exists()
+
+
+def test_timing_parallel_build(tmp_path: Path, make_app: Callable[..., SphinxTestApp]) -> None:
+    write_project(tmp_path / "src", documents=8, shape=Shape(breadth=1, options=1))
+    app = make_app(
+        buildername="html", srcdir=tmp_path / "src", parallel=2, confoverrides={"sphinx_argparse_cli_timing": True}
+    )
+    app.build()
+    report = json.loads((Path(app.doctreedir) / "sphinx_argparse_cli_timing.json").read_text())
+    assert sorted(timing["prog"] for timing in report["directives"]) == [f"tool-{at}" for at in range(8)]
+
+
+@pytest.mark.parametrize(
+    ("text", "fast"),
+    [
+        ("show program's version number and exit", True),
+        ("the log level: one of debug, info", True),
+        ("3.14 is close enough", True),
+        ("snake_case and a__b names", True),
+        ("x < y > z, 100% [1] sure (really)", True),
+        ("visit www.example.com today", True),
+        ("ends with a colon:", False),
+        ("see http://example.com", False),
+        ("mail to a@example.com", False),
+        ("a reference_ here", False),
+        ("some *emphasis*", False),
+        ("an ``inline literal``", False),
+        ("a |substitution|", False),
+        ("escaped \\*star", False),
+        ("a. list item", False),
+        ("iv) list item", False),
+        ("- a bullet", False),
+        ("trailing space ", False),
+        ("two\nlines", False),
+        ("literal block follows::", False),
+        ("----", False),
+    ],
+)
+def test_plain_help_fast_path(text: str, fast: bool) -> None:
+    assert bool(_PLAIN_HELP.fullmatch(text)) is fast
+    if fast:  # skipping the parser must not change the outcome
+        doctree = publish_doctree(text, settings_overrides={"report_level": 5})
+        assert [type(node) for node in doctree.children] == [paragraph]
+        assert doctree.children[0].children == [Text(text)]
+
+
+@pytest.mark.sphinx(buildername="text", testroot="incremental", srcdir="help-memo")
+def test_help_parsed_once_per_document(app: SphinxTestApp, monkeypatch: pytest.MonkeyPatch) -> None:
+    (Path(app.srcdir) / "parser.py").write_text(
+        "from argparse import ArgumentParser\n\n\n"
+        "def make() -> ArgumentParser:\n"
+        '    parser = ArgumentParser(prog="incremental")\n'
+        "    sub_parsers = parser.add_subparsers()\n"
+        '    for sub in (parser, sub_parsers.add_parser("first"), sub_parsers.add_parser("second")):\n'
+        '        sub.add_argument("--flag", help="a ``literal`` flag")\n'
+        '        sub.add_argument("--other", help="see :doc:`index`")\n'
+        "    return parser\n"
+    )
+    parsed: list[str] = []
+    nested_parse = RSTState.nested_parse
+
+    def counting(self: RSTState, block: list[str], *args: Any, **kwargs: Any) -> Any:
+        parsed.extend(block)
+        return nested_parse(self, block, *args, **kwargs)
+
+    monkeypatch.setattr(RSTState, "nested_parse", counting)
+    app.build()
+    assert parsed.count("a ``literal`` flag") == 2  # once for each of cli and again
+    assert parsed.count("see :doc:`index`") == 6  # cross-references are resolved per occurrence
+    text = (Path(app.outdir) / "cli.txt").read_text()
+    assert text.count('**"--flag"** "FLAG" - a "literal" flag') == 3
+
+
+@pytest.fixture
+def loaded_by(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, bool]]:
+    load_parser, loaded = _extract.load_parser, []
+
+    def tracked(module: str, func: str, *, hook: bool) -> tuple[ArgumentParser, list[str]]:
+        loaded.append((f"{module}:{func}", threading.current_thread() is threading.main_thread()))
+        return load_parser(module, func, hook=hook)
+
+    monkeypatch.setattr(_extract, "load_parser", tracked)
+    return loaded
+
+
+@pytest.mark.sphinx(buildername="html", testroot="registry")
+def test_registered_parsers_warmed_up(loaded_by: list[tuple[str, bool]], app: SphinxTestApp) -> None:
+    app.build()
+    assert not app.warning.getvalue()
+    assert sorted(loaded_by) == [("parser:make", True), ("runner:main", True)]  # once each, imported on the main thread
+    index = (Path(app.outdir) / "index.html").read_text()
+    assert 'id="tool---flag"' in index
+    assert 'id="runner---fast"' in index
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="registry",
+    srcdir="registry-failed",
+    confoverrides={
+        "sphinx_argparse_cli_parsers": {
+            "tool": {"module": "parser", "func": "make"},
+            "runner": {"module": "runner", "func": "missing"},
+            "exploding": {"module": "runner", "func": "explode"},
+            "incomplete": {"module": "parser"},
+        }
+    },
+)
+def test_registered_parsers_failing(app: SphinxTestApp) -> None:
+    index = Path(app.srcdir) / "index.rst"
+    index.write_text(f"{index.read_text()}\n.. sphinx_argparse_cli::\n  :parser: unknown\n")
+    app.build()
+    warnings = app.warning.getvalue()
+    assert "parser runner cannot be extracted: Module 'runner' has no attribute 'missing'" in warnings
+    assert (
+        "parser exploding cannot be extracted: Failed to extract parser from runner:explode: RuntimeError(" in warnings
+    )
+    assert "parser incomplete cannot be extracted: Parser 'incomplete' is not registered" in warnings
+    assert "Parser 'unknown' is not registered with a module and func in sphinx_argparse_cli_parsers" in warnings
+    assert 'id="tool---flag"' in (Path(app.outdir) / "index.html").read_text()
+
+
+@pytest.mark.sphinx(
+    buildername="html",
+    testroot="registry",
+    srcdir="registry-workers",
+    confoverrides={
+        "sphinx_argparse_cli_workers": 2,
+        "sphinx_argparse_cli_parsers": {
+            "tool": {"module": "parser", "func": "make"},
+            "runner": {"module": "runner", "func": "main", "hook": True},
+            "broken": {"module": "no_such_module", "func": "make"},
+        },
+    },
+)
+def test_registered_parsers_in_workers(loaded_by: list[tuple[str, bool]], app: SphinxTestApp) -> None:
+    app.build()
+    assert "parser broken cannot be extracted: Failed to import module 'no_such_module'" in app.warning.getvalue()
+    assert loaded_by == []
+    assert 'id="runner---fast"' in (Path(app.outdir) / "index.html").read_text()
+
+
+@pytest.mark.sphinx(buildername="html", testroot="registry", srcdir="registry-incremental")
+def test_registered_parsers_noop_rebuild(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp]) -> None:
+    app.build()
+    assert _docs_read_on_rebuild(make_app, app) == []
+
+
+@pytest.mark.sphinx(buildername="html", testroot="domain")
+def test_domain_roles(app: SphinxTestApp) -> None:
+    app.build()
+    usage = (Path(app.outdir) / "usage.html").read_text()
+    for anchor in ("tool---CLI-interface", "tool-build", "tool-build---jobs", "tool-build-target", "tool---verbose"):
+        assert f'href="index.html#{anchor}"' in usage
+    assert usage.count('href="index.html#tool---CLI-interface"') == 2  # the command role finds programs too
+    assert "cli:option reference target not found: tool --quiet" in app.warning.getvalue()
+
+
+@pytest.mark.sphinx(buildername="html", testroot="domain", srcdir="domain-index")
+def test_domain_index_and_inventory(app: SphinxTestApp) -> None:
+    app.build()
+    index = (Path(app.outdir) / "cli-index.html").read_text()
+    assert '<a href="index.html#tool-build"><code class="xref">tool build</code></a> <em>(sub-command)</em>' in index
+    assert CliIndex(app.env.get_domain("cli")).generate(["usage"]) == ([], False)
+    inventory = InventoryFile.loads((Path(app.outdir) / "objects.inv").read_bytes(), uri="https://example.org/")
+    objects = {kind: sorted(entries) for kind, entries in inventory.data.items() if kind.startswith("cli:")}
+    assert objects == {
+        "cli:program": ["tool"],
+        "cli:command": ["tool build"],
+        "cli:option": [
+            "tool --help",
+            "tool --verbose",
+            "tool -h",
+            "tool build --help",
+            "tool build --jobs",
+            "tool build -h",
+            "tool build target",
+        ],
+    }
+    assert inventory.data["cli:option"]["tool build --jobs"].uri == "https://example.org/index.html#tool-build---jobs"
+
+
+@pytest.mark.sphinx(buildername="html", testroot="nodes")
+def test_nodes_as_html(build_outcome: str) -> None:
+    usage = '<div class="highlight"><pre>tool [--output PATH] [--quiet] target\n</pre></div>'
+    assert f'<div class="sphinx-argparse-cli-wrap highlight-none notranslate">{usage}' in build_outcome
+    name = '<strong><code class="docutils literal notranslate"><span class="pre">-o</span></code></strong>'
+    assert f'<a class="reference internal" href="#tool--o" title="tool -o">{name}</a>' in build_outcome
+    words = '<span class="pre">my</span>&#160; <span class="pre">out</span> <span class="pre">dir</span>'
+    default = f'<code class="docutils literal notranslate">{words}</code>'
+    assert f" - where to write (default: {default})</p></li>" in build_outcome
+
+
+@pytest.mark.parametrize("pagerefs", [False, True])
+@pytest.mark.sphinx(buildername="latex", testroot="nodes")
+def test_nodes_as_latex(app: SphinxTestApp, make_app: Callable[..., SphinxTestApp], pagerefs: bool) -> None:
+    app = make_app(buildername="latex", srcdir=app.srcdir, confoverrides={"latex_show_pagerefs": pagerefs})
+    app.build()
+    latex = (Path(app.outdir) / "projectnamenotset.tex").read_text()
+    assert "\\phantomsection\\label{\\detokenize{index:tool---output}}\\label{\\detokenize{index:tool--o}}" in latex
+    page_ref = " (\\autopageref*{\\detokenize{index:tool--o}})" if pagerefs else ""
+    assert "\\sphinxupquote{\\sphinxhyphen{}o}}}}}}" + page_ref + " \\sphinxcode{\\sphinxupquote{PATH}}" in latex
+    assert "where to write (default: \\sphinxcode{\\sphinxupquote{my  out dir}})\n" in latex
+    assert "tool [\\PYGZhy{}\\PYGZhy{}output PATH] [\\PYGZhy{}\\PYGZhy{}quiet] target" in latex
+
+
+@pytest.mark.sphinx(buildername="xml", testroot="nodes")
+def test_nodes_lowered_for_other_builders(app: SphinxTestApp) -> None:
+    app.build()
+    xml = (Path(app.outdir) / "index.xml").read_text()
+    assert "cli_" not in xml
+    name = '<reference refid="tool--o" reftitle="tool -o"><strong><literal>-o</literal></strong></reference>'
+    assert '<paragraph ids="tool---output tool--o">' in xml
+    assert f"{name} <literal>PATH</literal> - where to write (default: <literal>my  out dir</literal>)" in xml
+
+
+@pytest.mark.sphinx(buildername="text", testroot="static", verbosity=1)
+def test_static_extraction(app: SphinxTestApp) -> None:
+    app.build()
+    assert not app.warning.getvalue()
+    assert "app.cli" not in sys.modules  # read without importing, as its package needs a dependency that is missing
+    text = (Path(app.outdir) / "index.txt").read_text()
+    assert "Build the project.\n\n   app [-h] [--version] [--verbose] {build,b} ...\n" in text
+    assert '* **"--jobs"** "JOBS", **"-j"** "JOBS" - parallel jobs (default: "4")' in text
+    assert '* **"--verbose"**, **"-v"** - show every step' in text
+    assert "imports dynamic:make, too dynamic to read:" in app.status.getvalue()
+    assert "dynamic.py:8: For statements are not followed" in app.status.getvalue()
+    assert '* **"--two"** - the two flag' in text
+
+
+@pytest.mark.sphinx(
+    buildername="text",
+    testroot="static",
+    srcdir="static-registered",
+    confoverrides={
+        "sphinx_argparse_cli_parsers": {
+            "app": {"module": "app.cli", "func": "main", "hook": True, "static": True},
+            "dynamic": {"module": "dynamic", "func": "make", "static": True},
+        }
+    },
+)
+def test_static_registered_warmed_up(loaded_by: list[tuple[str, bool]], app: SphinxTestApp) -> None:
+    app.build()
+    assert not app.warning.getvalue()
+    assert "app.cli" not in sys.modules
+    assert loaded_by == [("dynamic:make", True)]  # too dynamic to read, imported on the main thread
+
+
+@pytest.mark.parametrize(
+    ("testroot", "func", "hook"),
+    [
+        ("complex", "make", False),
+        ("nargs", "make", False),
+        ("tuple-metavar", "make", False),
+        ("subparsers", "make", False),
+        ("epilog-multiline", "make", False),
+        ("hook", "main", True),
+    ],
+)
+def test_static_matches_import(testroot: str, func: str, hook: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / f"test-{testroot}")
+    parser, sources = static_parser("parser", func, hook=hook)
+    assert extract_parser(ExtractRequest("parser", func, hook, None, 100, static=True))[1] == sources
+    assert "parser" not in sys.modules
+    assert sources == [str(Path(__file__).parents[1] / "roots" / f"test-{testroot}" / "parser.py")]
+    assert build_model(parser, 100) == build_model(load_parser("parser", func, hook=hook)[0], 100)
+
+
+def test_static_literals(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "literals.py").write_text(
+        "import argparse as ap\n"
+        "from argparse import SUPPRESS as HIDDEN, ArgumentParser\n"
+        "try:\n"
+        "    import yaml\n"
+        "except ImportError:\n"
+        "    yaml = None\n"
+        "    class Loader: ...\n"
+        "from pathlib import Path\n"
+        "UNSET: int\n"
+        "CALLED = dict(a=1)\n"
+        "NAME: str = 'lit'\n"
+        "CHOICES = ('x', 'y')\n"
+        "def add(parser, name, default={'key': ['value']}):\n"
+        "    'Add an option.'\n"
+        "    pass\n"
+        "    parser.add_argument(name, default=default, choices={'one'}, help=HIDDEN)\n"
+        "def make():\n"
+        "    parser: ArgumentParser = ap.ArgumentParser(prog=NAME, epilog=f'{NAME} epilog', add_help=False)\n"
+        "    parser.add_argument('--mode', choices=CHOICES, metavar='M')\n"
+        "    add(parser, name='--hidden')\n"
+        "    add(parser, '--other', default=None)\n"
+        "    return parser\n"
+    )
+    monkeypatch.syspath_prepend(tmp_path)
+    parser, _ = static_parser("literals", "make", hook=False)
+    assert (parser.prog, parser.epilog) == ("lit", "lit epilog")
+    options = parser._option_string_actions  # noqa: SLF001
+    assert options["--mode"].choices == ("x", "y")
+    assert options["--hidden"].default == {"key": ["value"]}
+    assert options["--hidden"].choices == {"one"}
+    assert options["--other"].default is None
+
+
+@pytest.mark.parametrize(
+    ("source", "hook", "reason"),
+    [
+        pytest.param("def make():\n    for _ in ():\n        pass", False, r":4: For statements", id="loop"),
+        pytest.param("def make():\n    return ArgumentParser(prog=name())", False, r":4: name is not", id="call"),
+        pytest.param("@cache\ndef make():\n    pass", False, r"make is not a plain function", id="decorated"),
+        pytest.param("def make():\n    pass\nmake = None", False, r"make is not a plain function", id="rebound"),
+        pytest.param("def make():\n    return ArgumentParser(*A)", False, r"unpacking arguments", id="unpack"),
+        pytest.param("def make():\n    return make()", False, r"make nests calls too deep", id="recursion"),
+        pytest.param("def make():\n    pass", True, r"make does not parse arguments", id="hook-returns"),
+        pytest.param("def make():\n    return None", False, r"make does not return a parser", id="no-parser"),
+        pytest.param("def make():\n    ArgumentParser().parse_args()", False, r"parses arguments instead", id="parses"),
+        pytest.param(
+            "def add(p, *names):\n    pass\ndef make():\n    add(1)", False, r"add is called with other", id="varargs"
+        ),
+        pytest.param("def add(p):\n    pass\ndef make():\n    add()", False, r"add is called without p", id="missing"),
+        pytest.param("def add():\n    pass\ndef make():\n    add(q=1)", False, r"called with unknown q", id="unknown"),
+        pytest.param(
+            "def make():\n    parser = ArgumentParser()\n    parser.prog = 'x'",
+            False,
+            r"assigning parser.prog",
+            id="attr",
+        ),
+        pytest.param("def make():\n    a, b = 1, 2", False, r"assigning \(a, b\) is not followed", id="unpack-assign"),
+        pytest.param("def make():\n    argparse.Namespace()", False, r"calling argparse.Namespace", id="class"),
+        pytest.param("def make():\n    return {**A}", False, r"\{\*\*A\} is not a literal", id="unpack-dict"),
+        pytest.param("def make():\n    return f'{1!r}'", False, r"formatting 1 is not followed", id="format"),
+        pytest.param(
+            "def make():\n    ArgumentParser().print_help()", False, r"calling .*print_help is not", id="method"
+        ),
+        pytest.param("def make():\n    return argparse._sys", False, r"argparse._sys is not a literal", id="private"),
+        pytest.param("def make():\n    run(ArgumentParser().parse_args())", True, None, id="hook-argument"),
+    ],
+)
+def test_static_too_dynamic(
+    source: str, hook: bool, reason: str | None, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "snippet.py").write_text(f"import argparse\nfrom argparse import ArgumentParser\n{source}\n")
+    monkeypatch.syspath_prepend(tmp_path)
+    if reason is None:
+        assert isinstance(static_parser("snippet", "make", hook=hook)[0], ArgumentParser)
+        return
+    with pytest.raises(TooDynamicError, match=reason):
+        static_parser("snippet", "make", hook=hook)
+
+
+@pytest.mark.parametrize(
+    ("module", "reason"),
+    [
+        ("no_such_module", r"No module named 'no_such_module'"),
+        ("namespace", r"Module 'namespace' has no Python source"),
+    ],
+)
+def test_static_module_not_found(module: str, reason: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "namespace").mkdir()
+    monkeypatch.syspath_prepend(tmp_path)
+    with pytest.raises(TooDynamicError, match=reason):
+        static_parser(module, "make", hook=False)
+
+
+def test_render_rst(capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / "test-nodes")
+    assert main(["parser:make"]) == 0
+    out = capsys.readouterr().out
+    assert out == (
+        ".. _`tool---CLI-interface`:\n\ntool - CLI interface\n====================\n\n"
+        ".. code:: text\n\n   tool [--output PATH] [--quiet] target\n\n"
+        ".. _`tool-positional-arguments`:\n\ntool positional arguments\n-------------------------\n\n"
+        ".. _`tool-target`:\n\n* ``target`` - what to build\n\n"
+        ".. _`tool-options`:\n\ntool options\n------------\n\n"
+        ".. _`tool---output`:\n.. _`tool--o`:\n\n"
+        "* ``--output`` ``PATH``, ``-o`` ``PATH`` - where to write (default: ``my  out dir``)\n\n"
+        ".. _`tool---quiet`:\n\n* ``--quiet``\n"
+    )
+    document = publish_doctree(out, settings_overrides={"report_level": 5})
+    assert not list(document.findall(system_message))
+    assert [node["ids"] for node in document.findall(bullet_list)] == [
+        ["tool-target"],
+        ["tool-o", "tool-output"],
+        ["tool-quiet"],
+    ]
+
+
+def test_render_markdown(capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / "test-nodes")
+    assert main(["parser:make", "--format", "md"]) == 0
+    assert capsys.readouterr().out == (
+        '# <a id="tool---CLI-interface"></a>tool - CLI interface\n\n'
+        "```text\ntool [--output PATH] [--quiet] target\n```\n\n"
+        '## <a id="tool-positional-arguments"></a>tool positional arguments\n\n'
+        '- <a id="tool-target"></a>**`target`** - what to build\n\n'
+        '## <a id="tool-options"></a>tool options\n\n'
+        '- <a id="tool---output"></a><a id="tool--o"></a>**`--output`** `PATH`, **`-o`** `PATH` - where to write'
+        " (default: `my  out dir`)\n"
+        '- <a id="tool---quiet"></a>**`--quiet`**\n'
+    )
+
+
+def test_render_json(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / "test-complex")
+    assert main(["parser:make", "--format", "json", "-o", str(tmp_path / "cli.json"), "--usage-width", "40"]) == 0
+    model = build_model(load_parser("parser", "make", hook=False)[0], 40)
+    assert (tmp_path / "cli.json").read_text() == json.dumps(dataclasses.asdict(model), indent=2) + "\n"
+
+
+def test_render_json_deep_tree(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / "test-deep")
+    assert main(["parser:make", "--format", "json", "-o", str(tmp_path / "cli.json")]) == 0
+    text = (tmp_path / "cli.json").read_text()
+    assert f'"prog": "deep {" ".join(f"l{level}" for level in range(250))}"' in text
+    assert text.endswith("\n  ]\n}\n")
+
+
+@pytest.mark.sphinx(buildername="dummy", testroot="complex")
+@pytest.mark.parametrize("fmt", ["rst", "md"])
+def test_render_matches_directive(fmt: str, app: SphinxTestApp, tmp_path: Path) -> None:
+    # the anchors of the rendered page are the ids the directive gives the same sections and options
+    main(["parser:make", "--format", fmt, "-o", str(tmp_path / "out")])
+    app.build()
+    doctree = app.env.get_doctree("index")
+    directive_ids = [ref_id for node in doctree.findall(section) for ref_id in node["ids"]]
+    directive_ids += [ref_id for node in doctree.findall(cli_option) for ref_id in node["ids"]]
+    pattern = r'<a id="([^"]+)"></a>' if fmt == "md" else r"^\.\. _`(.+)`:$"
+    rendered_ids = re.findall(pattern, (tmp_path / "out").read_text(), re.MULTILINE)
+    assert sorted(rendered_ids) == sorted(directive_ids)
+
+
+@pytest.mark.parametrize(
+    ("args", "expected"),
+    [
+        pytest.param(
+            ["--format", "rst"],
+            [
+                (
+                    ".. _`tool-group-again`:\n\ntool group again\n----------------\n\n"
+                    "common operation, again --level\n\n"
+                    "See `tool common <tool-common-(c)_>`__.\n"
+                ),
+                ".. _`tool-group-root`:\n\ntool group root\n---------------\n\nSee `tool <tool---CLI-interface_>`__.\n",
+            ],
+            id="rst",
+        ),
+        pytest.param(
+            ["--format", "md"],
+            [
+                "See [`tool common`](#tool-common-(c)).\n",
+                "See [`tool`](#tool---CLI-interface).\n",
+            ],
+            id="md",
+        ),
+        pytest.param(["--format", "md", "--title", ""], ["See `tool`.\n"], id="md-no-title"),
+    ],
+)
+def test_render_sub_command_ref(
+    args: list[str], expected: list[str], capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / "test-shared")
+    main(["parser:make", *args])
+    out = capsys.readouterr().out
+    for text in expected:
+        assert text in out
+
+
+def test_render_options(capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / "test-complex")
+    args = ["--title", "", "--usage-first", "--no-default-values", "--prog", "cx", "--epilog", "the end"]
+    main(["parser:make", "--format", "md", "--group-title-prefix", "", "--group-sub-title-prefix", "", *args])
+    out = capsys.readouterr().out
+    assert out.startswith("```text\ncx [-h] [--root]")
+    assert '```\n\nargparse tester\n\n# <a id="cx-options"></a>options\n\n' in out
+    assert '# <a id="cx-first-(f)"></a>(f)\n\n```text\ncx first [-h]' in out
+    assert '# <a id="cx-second"></a>\n\n```text\ncx second [-h]' in out
+    assert "(default:" not in out
+    assert out.endswith("`--help`** - show this help message and exit\n\nthe end\n")
+
+
+def test_render_pre_formatted(capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / "test-description-multiline")
+    main(["parser:make"])
+    out = capsys.readouterr().out
+    assert "\n\n.. code:: text\n\n   This description\n   spans multiple lines.\n\n     this line is indented.\n" in out
+    assert "\n\n.. code:: text\n\n   This group description\n\n   spans multiple lines.\n\n.. _`foo---dummy`:" in out
+
+
+def test_render_escapes() -> None:
+    parser = ArgumentParser(prog="t*ol", description="1. not a list but *plain* text", add_help=False)
+    parser.add_argument("--empty", default="", help="nothing 'quoted'\nover lines")
+    parser.add_argument("--padded", default=" x ")
+    parser.add_argument("--tick", default="a`b")
+    parser.add_argument("--ticks", default="`a``")
+    parser.add_argument_group("hidden").add_argument("--secret", help=SUPPRESS)
+    model = build_model(parser, 100)
+    rst = render(model, "rst", {"title": "_private"})
+    assert "\\_private\n=========\n" in rst
+    assert "\n\n\\1. not a list but \\*plain\\* text\n\n" in rst
+    assert "* ``--empty`` ``EMPTY`` - nothing ``'quoted'``\n  over lines (default: \"\")" in rst
+    assert '(default: " x ")' in rst
+    assert '(default: "a\\`b")' in rst
+    assert rst.endswith(".. _`t*ol-hidden`:\n\nt\\*ol hidden\n------------\n")
+    md = render(model, "md", {"title": 'a "quoted" <title>'})
+    assert md.startswith('# <a id="a-&quot;quoted&quot;-<title>"></a>a "quoted" \\<title\\>\n')
+    assert "\n\n1\\. not a list but \\*plain\\* text\n\n" in md
+    assert "- nothing `'quoted'`\n  over lines (default: \"\")" in md
+    assert "(default: `  x  `)" in md
+    assert "(default: ``a`b``)" in md
+    assert "(default: ``` `a`` ```)" in md
+
+
+def test_render_static(capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / "test-static")
+    assert main(["app.cli:main", "--hook", "--static", "--format", "md"]) == 0
+    assert "app.cli" not in sys.modules
+    assert "**`--jobs`** `JOBS`, **`-j`** `JOBS` - parallel jobs (default: `4`)" in capsys.readouterr().out
+    assert main(["dynamic:make", "--static", "--format", "md"]) == 0
+    captured = capsys.readouterr()
+    assert "importing dynamic:make, too dynamic to read:" in captured.err
+    assert "**`--two`** - the two flag" in captured.out
+
+
+def test_render_max_depth(capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(Path(__file__).parents[1] / "roots" / "test-split")
+    main(["parser:make", "--format", "md", "--max-depth", "1"])
+    out = capsys.readouterr().out
+    assert "See `tool build fast`.\n" in out
+    assert "tool-build-fast---unsafe" not in out
+    assert out.endswith(
+        '## <a id="tool-sub-command-summary"></a>tool sub-command summary\n\n'
+        "| Sub-command | Aliases | Help |\n| --- | --- | --- |\n"
+        "| `tool build fast` |  | skip the checks |\n| `tool build fast top` |  |  |\n"
+    )
+    main(["parser:make", "--max-depth", "0"])
+    document = publish_doctree(capsys.readouterr().out, settings_overrides={"report_level": 5})
+    assert not list(document.findall(system_message))
+    rows = [[cell.astext() for cell in row] for row in document.findall(docutils_row)]
+    assert rows[:3] == [
+        ["Sub-command", "Aliases", "Help"],
+        ["tool build", "b", "build the project"],
+        ["tool build fast", "", "skip the checks"],
+    ]
+    assert len(rows) == 6
+
+
+def test_render_failures(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["no_such_module:make"]) == 1
+    assert capsys.readouterr().err == "error: Failed to import module 'no_such_module'\n"
+    with pytest.raises(SystemExit, match="2"):
+        main(["no_func"])
+    assert "argument module:func: expected module:func, got 'no_func'" in capsys.readouterr().err
+    with pytest.raises(SystemExit, match="2"):
+        main(["parser:make", "--max-depth", "-1"])
+    assert "argument --max-depth: expected a number of levels, got '-1'" in capsys.readouterr().err
+    for width in ("0", "-5"):
+        with pytest.raises(SystemExit, match="2"):
+            main(["parser:make", f"--usage-width={width}"])
+        assert (
+            f"argument --usage-width: expected a positive number of columns, got '{width}'" in capsys.readouterr().err
+        )
+
+
+def test_render_without_sphinx() -> None:
+    root = Path(__file__).parents[1] / "roots" / "test-nodes"
+    code = (
+        "import sys\n"
+        "from sphinx_argparse_cli.__main__ import main\n"
+        "for fmt in ('rst', 'md', 'json'):\n"
+        "    main(['parser:make', '--format', fmt, '--static'])\n"
+        "print(sorted(name for name in sys.modules if name.partition('.')[0] in {'sphinx', 'docutils'}))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == "[]"